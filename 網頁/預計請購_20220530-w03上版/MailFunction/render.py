@@ -0,0 +1,195 @@
+"""
+郵件組信 (超急件 / 一般件 / 驗收通知共用)
+
+- HTML 版型放在 MailFunction/templates/,第一次使用時解析成 (文字, 欄位) 片段後快取,
+  之後每封信只做欄位代入
+- 寄件者標頭、收件者設定集中在這裡,不再於三個模組各寫一次
+- render_batch() 一次組出多封信 (共用已編譯的版型)
+"""
+import os
+import string
+import threading
+from functools import lru_cache
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.header import Header
+from email.utils import formataddr
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+SENDER = "Purchase_Can@aseglobal.com"
+SMTP_IP = "10.12.10.31"
+
+REQUEST_SENDER_NAME = "請購專用信件"
+ACCEPTANCE_SENDER_NAME = "領料驗收 專用信件"
+
+# 請購通知目前固定寄給採購窗口
+REQUEST_MAIL_TO = "RuiYing_Chan@aseglobal.com,Shugh_Lin@aseglobal.com"
+REQUEST_MAIL_CC = "RuiYing_Chan@aseglobal.com,Shugh_Lin@aseglobal.com"
+# 驗收通知: To 為需求者,CC 固定加上採購窗口
+ACCEPTANCE_MAIL_CC = "RuiYing_Chan@aseglobal.com,Otis_Wang@aseglobal.com"
+
+ACCEPTANCE_DEFAULT_REMARK = "設備修改請, 請 User 提供照片結案"
+
+def format_date_simple(date_str):
+    if date_str and len(date_str) == 8:
+        year = date_str[:4]
+        month = str(int(date_str[4:6]))
+        day = str(int(date_str[6:8]))
+        return f"{year}/{month}/{day}"
+    return date_str
+
+
+def split_addresses(addresses):
+    return [addr.strip() for addr in addresses.split(',') if addr.strip()]
+
+
+# ---------- 版型 ----------
+class CompiledTemplate:
+    """
+    str.format 格式的版型,預先拆成片段
+    欄位名稱直接對應 values 的 key (可含空白、中文與 '.'),支援格式如 {總金額:,}
+    """
+
+    def __init__(self, text):
+        self.parts = [
+            (literal, field, spec)
+            for literal, field, spec, _ in string.Formatter().parse(text)
+        ]
+
+    def render(self, values):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec) if spec else str(values[field]))
+        return "".join(out)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(name):
+    """讀取並編譯 templates/{name}.html (只做一次)"""
+    template = _templates.get(name)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(name)
+            if template is None:
+                with open(os.path.join(TEMPLATE_DIR, f"{name}.html"), encoding="utf-8") as f:
+                    template = CompiledTemplate(f.read())
+                _templates[name] = template
+    return template
+
+
+# ---------- 組信 ----------
+@lru_cache(maxsize=8)
+def _from_header(sender_name):
+    return formataddr((str(Header(sender_name, 'utf-8')), SENDER))
+
+
+def build_message(sender_name, send_to, send_cc, subject, html_body):
+    """組出 MIME 郵件,回傳與 mail_outbox 相容的 dict"""
+    em = MIMEMultipart()
+    em['From'] = _from_header(sender_name)
+    em['To'] = send_to
+    em['CC'] = send_cc
+    em['Subject'] = subject
+    em.attach(MIMEText(html_body, 'html', 'utf-8'))
+
+    return {
+        "sender": SENDER,
+        "recipients": split_addresses(send_to) + split_addresses(send_cc),
+        "message": em.as_string(),
+        "smtp_host": SMTP_IP,
+    }
+
+
+def request_level(mailList, urgent):
+    if urgent:
+        return "超急件"
+    # 針對 請購順序 做更動
+    return "急件" if mailList['請購順序'] == "2" else "一般件"
+
+
+def render_request(mailList, name, mail_name="", ccList="", urgent=False):
+    """請購通知 (超急件用 urgent 版型,其餘用 normal 版型)"""
+    level = request_level(mailList, urgent)
+    values = dict(mailList)
+    values.update({
+        "level": level,
+        "name": name,
+        "需求日_顯示": format_date_simple(mailList['需求日']),
+        "已開單日期_顯示": format_date_simple(mailList['已開單日期']),
+    })
+    html_body = get_template("urgent" if urgent else "normal").render(values)
+    subject = str(Header(
+        rf"<< ePR單 - {mailList['ePR No.']} >> 等級：{level} {mailList['請購項目']}需求請購申請 To. Jackson Sir & {name} (Security C)",
+        'utf-8'
+    ))
+    return build_message(REQUEST_SENDER_NAME, REQUEST_MAIL_TO, REQUEST_MAIL_CC, subject, html_body)
+
+
+def acceptance_subject(mailList, to_str):
+    """依領料 / 驗收狀態決定標題"""
+    all_received = all(item.get('receivedStatus') == 'completed' for item in mailList)
+    all_material = all(item.get('materialStatus') == 'pending' for item in mailList)
+
+    po_numbers = list({item.get('poNo', '-') for item in mailList if item.get('poNo')})
+    po_str = "、".join(po_numbers)
+
+    if all_received:
+        return f"<<驗收通知>> 照片請自行拍照上傳論壇，煩請 ERT 單附報告驗收 【PO No. {po_str}】 To: {to_str}"
+    elif all_material:
+        return f"<<領料通知>> 煩請開立攜出單至 K7-1F 物流中心領料【PO No. {po_str}】 To: {to_str}"
+    return f"<<領料 & 驗收通知>> 煩請開立攜出單至 K7-1F 物流中心領料 & 照片請自行拍照上傳論壇，煩請 ERT 單附報告驗收【PO No. {po_str}】 To: {to_str}"
+
+
+def build_table_rows(data_list):
+    """動態生成表格行，支持不同筆數的資料"""
+    row_template = get_template("acceptance_row")
+    rows = []
+    for item in data_list:
+        values = {
+            key: item.get(key, '-')
+            for key in ('user', 'eprNo', 'poNo', 'description', 'quantity', 'issueDate', 'pickupPerson')
+        }
+        values.update({
+            "totalQuantity": item.get('totalQuantity', item.get('quantity', '-')),
+            "remarks": item.get('remarks', ACCEPTANCE_DEFAULT_REMARK),
+            # 處理狀態顯示邏輯
+            "material_status": "V" if item.get('materialStatus') == 'completed' else "",
+            "received_status": "V" if item.get('receivedStatus') == 'completed' else "",
+            "photo_status": "V" if item.get('photoStatus') == 'provided' else "",
+        })
+        rows.append(row_template.render(values))
+    return "".join(rows)
+
+
+def render_acceptance(mailList, mail_name, ccList="", to_str="", greeting="Dear "):
+    """領料 / 驗收通知"""
+    html_body = get_template("acceptance").render({
+        "greeting": greeting,
+        "table_rows": build_table_rows(mailList),
+    })
+    send_cc = f"{ACCEPTANCE_MAIL_CC},{ccList}"
+    return build_message(
+        ACCEPTANCE_SENDER_NAME, f"{mail_name}", send_cc, acceptance_subject(mailList, to_str), html_body
+    )
+
+
+RENDERERS = {
+    "urgent": lambda **kwargs: render_request(urgent=True, **kwargs),
+    "normal": lambda **kwargs: render_request(urgent=False, **kwargs),
+    "acceptance": render_acceptance,
+}
+
+
+def render_batch(notices):
+    """
+    一次組出多封信
+    notices: [(kind, kwargs)],kind 為 urgent / normal / acceptance
+    回傳 [(kind, mail)],順序與輸入相同
+    """
+    return [(kind, RENDERERS[kind](**kwargs)) for kind, kwargs in notices]
@@ -1,8 +1,9 @@
-from bs4 import BeautifulSoup
 import re
 import quopri
 import logging
 
+from utils.mhtml_cache import html_from_mhtml, extract_element, make_soup
+
 logger = logging.getLogger(__name__)
 
 
@@ -10,21 +11,30 @@ class accMHTMLParser:
     """MHTML 文件解析器"""
     
     def __init__(self):
-        pass
+        # HTML 仍是 quoted-printable 原文時,才需要逐格解碼
+        self.decode_cells = True
     
     def parse_mhtml_file(self, file_content):
-        """解析 MHTML 文件並提取表格資料"""
+        """解析 MHTML 文件並提取表格資料 (file_content 可為 bytes 或 str)"""
         try:
             logger.info("開始解析 MHTML 文件")
             
-            # 提取 HTML 內容
-            html_content = self.extract_html_from_mhtml(file_content)
-            
-            # 使用 BeautifulSoup 解析 HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 依 MIME 結構取出並解碼 HTML 部分;不是 multipart 時沿用原本的字串擷取
+            html_content = html_from_mhtml(file_content)
+            self.decode_cells = html_content is None
+            if html_content is None:
+                if isinstance(file_content, bytes):
+                    file_content = file_content.decode('utf-8', errors='ignore')
+                html_content = self.extract_html_from_mhtml(file_content)
             
-            # 尋找資料表格
-            table = self.find_data_table(soup)
+            # 只切出 GridView1 表格建樹,找不到才整份解析
+            table = None
+            fragment = extract_element(html_content, 'table', 'GridView1')
+            if fragment:
+                table = make_soup(fragment).find('table')
+            if not table:
+                soup = make_soup(html_content)
+                table = self.find_data_table(soup)
             
             if not table:
                 raise Exception("找不到資料表格")
@@ -224,7 +234,7 @@ class accMHTMLParser:
     
     def decode_quoted_printable(self, text):
         """解碼 Quoted-Printable 編碼的文字"""
-        if not text:
+        if not text or not self.decode_cells:
             return text
         
         try:
@@ -0,0 +1,154 @@
+"""
+預計請購 啟動時間 / 匯入結構量測
+
+在新的 python process 中 `import app` (建立 Flask app、註冊所有 Blueprint),以 -X importtime
+記錄每個模組的載入時間,輸出:
+    - 啟動耗時 (多次執行取中位數)
+    - app 直接匯入的模組與累計耗時 (匯入結構的第一層)
+    - 累計耗時最長的模組
+    - 啟動時是否載入了 pandas / numpy / bs4 / ldap3 (應該在第一個用到的請求才載入)
+    - 第一個 GET /data 的耗時與之後載入的重模組
+只輸出報表;啟動時不載入重模組由 tests/test_cold_start.py 檢查。
+
+用法 (在 預計請購 目錄下,需要完整的執行環境):
+    python bench/bench_cold_start.py
+    python bench/bench_cold_start.py --repeat 10 --top 30
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = ["Planned_Purchase_Request_List.csv", "Buyer_detail.csv", "money.json", "vender.ini"]
+
+sys.path.insert(0, APP_DIR)
+from utils.lazy_import import HEAVY_MODULES  # noqa: E402
+
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# 子 process 執行的程式: 匯入 app,再送出第一個請求
+STARTUP_SCRIPT = """
+import json, sys, time
+heavy = {heavy!r}
+start = time.perf_counter()
+import app
+startup = time.perf_counter() - start
+loaded = [name for name in heavy if name in sys.modules]
+start = time.perf_counter()
+status = app.app.test_client().get("/data").status_code
+first_request = time.perf_counter() - start
+print(json.dumps({{
+    "startup_ms": round(startup * 1000, 1),
+    "heavy_at_startup": loaded,
+    "first_request_ms": round(first_request * 1000, 1),
+    "first_request_status": status,
+    "heavy_after_request": [name for name in heavy if name in sys.modules and name not in loaded],
+}}))
+"""
+
+
+def build_workdir():
+    """暫存資料夾: 啟動時建立的資料夾 / log 不落在專案目錄"""
+    workdir = tempfile.mkdtemp(prefix="bench_cold_start_")
+    data_dir = os.path.join(workdir, "static", "data")
+    os.makedirs(os.path.join(data_dir, "log"))
+    for name in DATA_FILES:
+        src = os.path.join(APP_DIR, "static", "data", name)
+        if os.path.exists(src):
+            shutil.copy(src, data_dir)
+    return workdir
+
+
+def run_python(args, workdir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))
+    env["MAIL_OUTBOX_AUTOSTART"] = "0"
+    return subprocess.run([sys.executable, *args], cwd=workdir, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr):
+    """回傳 [(名稱, 深度, self_us, cumulative_us)] (依 importtime 輸出順序)"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def direct_imports(entries, root="app"):
+    """root 直接匯入的模組 (importtime 中子模組列在父模組之前)"""
+    index = next((i for i, entry in enumerate(entries) if entry[0] == root), None)
+    if index is None:
+        return []
+    depth = entries[index][1]
+    children = []
+    for name, level, _, cumulative_us in reversed(entries[:index]):
+        if level <= depth:
+            break
+        if level == depth + 1:
+            children.append((name, cumulative_us))
+    return sorted(children, key=lambda child: child[1], reverse=True)
+
+
+def measure(repeat):
+    workdir = build_workdir()
+    try:
+        script = STARTUP_SCRIPT.format(heavy=list(HEAVY_MODULES))
+        runs = [json.loads(run_python(["-c", script], workdir).stdout.strip().splitlines()[-1]) for _ in range(repeat)]
+        entries = parse_importtime(run_python(["-X", "importtime", "-c", "import app"], workdir).stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return runs, entries
+
+
+def report(runs, entries, top):
+    startup = [run["startup_ms"] for run in runs]
+    first_request = [run["first_request_ms"] for run in runs]
+    heavy_loaded = sorted({name for run in runs for name in run["heavy_at_startup"]})
+    imported = {name for name, *_ in entries}
+
+    lines = [
+        f"啟動 (import app): 中位數 {statistics.median(startup):.1f} ms  (最小 {min(startup):.1f} / 最大 {max(startup):.1f}, {len(runs)} 次)",
+        f"第一個 GET /data: 中位數 {statistics.median(first_request):.1f} ms  (狀態 {runs[-1]['first_request_status']})",
+        f"載入模組數: {len(imported)}",
+        f"啟動時載入的重模組: {', '.join(heavy_loaded) if heavy_loaded else '無'}",
+        f"第一個請求後載入: {', '.join(runs[-1]['heavy_after_request']) or '無'}",
+        "",
+        "| app 直接匯入 | 累計 (ms) |",
+        "|---|---:|",
+    ]
+    lines += [f"| {name} | {cumulative_us / 1000:.1f} |" for name, cumulative_us in direct_imports(entries)]
+    lines += ["", f"| 累計耗時前 {top} 名 | self (ms) | 累計 (ms) |", "|---|---:|---:|"]
+    slowest = sorted(entries, key=lambda entry: entry[3], reverse=True)[:top]
+    lines += [f"| {'  ' * depth}{name} | {self_us / 1000:.1f} | {cumulative_us / 1000:.1f} |"
+              for name, depth, self_us, cumulative_us in slowest]
+    return "\n".join(lines), heavy_loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", help="另存 JSON 結果")
+    args = parser.parse_args()
+
+    runs, entries = measure(args.repeat)
+    text, _ = report(runs, entries, args.top)
+    print(text)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "imports": entries}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
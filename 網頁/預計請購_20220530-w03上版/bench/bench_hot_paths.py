@@ -0,0 +1,305 @@
+"""
+預計請購 主要路由效能量測 (1× / 10× / 100× 資料量)
+
+以 static/data 的 Planned_Purchase_Request_List.csv / Buyer_detail.csv 為樣本,
+依倍數複製出新的資料 (Id 加上 -k、PO / ePR 前兩碼換成 k,欄位與原本相同),
+在暫存資料夾中啟動 app,透過 Flask test client 呼叫:
+    /data, /api/save_csv, /api/save_override_all, /api/accounting_summary,
+    /api/getrestofmoney, /api/export/*.xlsx, /api/upload-mhtml
+每個路由記錄第一次 (冷快取) 與之後各次的中位數延遲、tracemalloc 峰值記憶體,
+輸出 markdown 表格,--json 另存 JSON。會寫檔的路由每次執行前都還原資料,結果可重複;
+每個倍數在獨立的子 process 中執行,快取與檔案鎖不會互相影響。
+
+LDAP 與 SMTP 只在這支程式裡換成假的實作,不會連線;原始資料不會被修改。
+
+用法 (在 預計請購 目錄下,需要完整的執行環境):
+    python bench/bench_hot_paths.py
+    python bench/bench_hot_paths.py --scales 1 10 --repeat 5 --json bench_result.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import smtplib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(APP_DIR))
+SAMPLE_MHTML = sorted(glob.glob(
+    os.path.join(REPO_DIR, "ERT驗收(更新RT金額與驗收Mail)", "04. E-RT物料收貨_更新RT金額(mhtml)", "**", "*.mhtml"),
+    recursive=True,
+))
+COPY_FILES = ["Backend_data.json", "config.cfg"]
+DATA_FILES = ["Planned_Purchase_Request_List.csv", "Buyer_detail.csv", "money.json", "vender.ini", "phone.json"]
+SHIFT_COLUMNS = ["PO No.", "ePR No."]
+
+sys.path.insert(0, APP_DIR)
+logging.disable(logging.CRITICAL)
+
+
+# ---------- 離線用的假 LDAP / SMTP ----------
+class FakeSMTP:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: {}
+
+
+class FakeLDAPConnection:
+    entries = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def bind(self):
+        return True
+
+    def search(self, *args, **kwargs):
+        return False
+
+    def unbind(self):
+        return True
+
+
+def stub_network():
+    import ldap3
+    smtplib.SMTP = FakeSMTP
+    ldap3.Server = lambda *args, **kwargs: None
+    ldap3.Connection = FakeLDAPConnection
+
+
+# ---------- 資料 ----------
+def _shift_numbers(value, k):
+    """10 碼的 PO / ePR 前兩碼換成 k (k=0 為原始資料)"""
+    if k == 0 or not isinstance(value, str):
+        return value
+    return re.sub(r"\b\d{10}\b", lambda m: f"{k:02d}{m.group()[2:]}", value)
+
+
+def scale_table(df, scale):
+    copies = []
+    for k in range(scale):
+        copy = df.copy()
+        if k:
+            copy["Id"] = copy["Id"].astype(str) + f"-{k}"
+            for col in SHIFT_COLUMNS:
+                if col in copy.columns:
+                    copy[col] = copy[col].map(lambda v: _shift_numbers(v, k))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def build_workdir(scale):
+    """暫存資料夾: 放大後的 CSV + app 需要的設定檔"""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{scale}x_")
+    data_dir = os.path.join(workdir, "static", "data")
+    os.makedirs(os.path.join(data_dir, "log"))
+    os.makedirs(os.path.join(workdir, "user_filters"))
+    for name in COPY_FILES:
+        if os.path.exists(os.path.join(APP_DIR, name)):
+            shutil.copy(os.path.join(APP_DIR, name), workdir)
+    for name in DATA_FILES:
+        src = os.path.join(APP_DIR, "static", "data", name)
+        if not os.path.exists(src):
+            continue
+        if name.endswith(".csv"):
+            df = pd.read_csv(src, encoding="utf-8-sig", dtype=str)
+            scale_table(df, scale).to_csv(os.path.join(data_dir, name), index=False, encoding="utf-8-sig")
+        else:
+            shutil.copy(src, data_dir)
+
+    pristine = os.path.join(workdir, "pristine")
+    os.makedirs(pristine)
+    for name in DATA_FILES:
+        if os.path.exists(os.path.join(data_dir, name)):
+            shutil.copy(os.path.join(data_dir, name), pristine)
+    return workdir
+
+
+def restore(workdir):
+    for name in os.listdir(os.path.join(workdir, "pristine")):
+        shutil.copy(os.path.join(workdir, "pristine", name), os.path.join(workdir, "static", "data", name))
+
+
+# ---------- 請求內容 ----------
+def ehub_content(buyer_df):
+    """以 Buyer_detail 中有 PO 的資料組成 E-HUB 上傳內容 (承諾交期全部改成 2099/01/01)"""
+    rows = buyer_df[buyer_df["PO No."].fillna("").str.strip() != ""]
+    ehub = pd.DataFrame({
+        "PO NO 採購單號碼": rows["PO No."],
+        "PO Item 採購單項次": rows["Item"],
+        "Description 品名": rows["品項"],
+        "SOD Qty 廠商承諾數量": rows["數量"],
+        "Delivery Date 廠商承諾交期": "2099/01/01",
+    })
+    return ehub.to_csv(index=False)
+
+
+def override_rows(buyer_df):
+    rows = buyer_df[buyer_df["PO No."].fillna("").str.strip() != ""].fillna("")
+    return [
+        {
+            "id": row["Id"],
+            "po_no": row["PO No."],
+            "item": row["Item"],
+            "delivery_date": "2099/01/01",
+            "sod_qty": row["數量"],
+            "po_description": row["品項"],
+        }
+        for _, row in rows.iterrows()
+    ]
+
+
+def make_cases(workdir):
+    buyer_df = pd.read_csv(os.path.join(workdir, "static", "data", "Buyer_detail.csv"), encoding="utf-8-sig", dtype=str)
+    content = ehub_content(buyer_df)
+    rows = override_rows(buyer_df)
+    mhtml = open(SAMPLE_MHTML[0], "rb").read() if SAMPLE_MHTML else None
+
+    from utils.mhtml_cache import mhtml_cache
+
+    def clear_mhtml_cache():
+        mhtml_cache._memory.clear()
+        shutil.rmtree(mhtml_cache.folder, ignore_errors=True)
+
+    def upload(client):
+        import io
+        return client.post("/api/upload-mhtml", data={"file": (io.BytesIO(mhtml), "bench.mhtml")},
+                           content_type="multipart/form-data")
+
+    # (名稱, 執行前準備, 呼叫)
+    cases = [
+        ("GET /data", None, lambda c: c.get("/data")),
+        ("GET /data?page=1&limit=100", None, lambda c: c.get("/data?page=1&limit=100&sort=總金額&order=desc")),
+        ("POST /api/save_csv", lambda: restore(workdir),
+         lambda c: c.post("/api/save_csv", json={"content": content})),
+        ("POST /api/save_override_all", lambda: restore(workdir),
+         lambda c: c.post("/api/save_override_all", json={"rows": rows, "confirm_override": True})),
+        ("GET /api/accounting_summary", None, lambda c: c.get("/api/accounting_summary")),
+        ("GET /api/getrestofmoney", None, lambda c: c.get("/api/getrestofmoney")),
+        ("GET /api/export/purchase.xlsx", None, lambda c: c.get("/api/export/purchase.xlsx")),
+        ("GET /api/export/buyer.xlsx", None, lambda c: c.get("/api/export/buyer.xlsx")),
+    ]
+    if mhtml:
+        cases.append(("POST /api/upload-mhtml (首次解析)", clear_mhtml_cache, upload))
+        cases.append(("POST /api/upload-mhtml (快取)", None, upload))
+    return cases
+
+
+# ---------- 量測 ----------
+def measure(client, prepare, call, repeat):
+    times = []
+    status = size = None
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        response = call(client)
+        times.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+        size = len(response.data)
+
+    if prepare:
+        prepare()
+    tracemalloc.start()
+    call(client)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "status": status,
+        "first_ms": round(times[0], 2),
+        "median_ms": round(statistics.median(times[1:] or times), 2),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "bytes": size,
+    }
+
+
+def load_app():
+    """在目前的暫存資料夾中匯入 app (啟動時建立的資料夾 / log 都落在暫存資料夾)"""
+    import app as app_module
+    stub_network()
+    return app_module.app
+
+
+def run_scale(scale, repeat):
+    """子 process: 在暫存資料夾中啟動 app 並量測,結果以 JSON 印到 stdout"""
+    workdir = build_workdir(scale)
+    os.chdir(workdir)
+    flask_app = load_app()
+    results = []
+    try:
+        client = flask_app.test_client()
+        for name, prepare, call in make_cases(workdir):
+            result = measure(client, prepare, call, repeat)
+            results.append({"scale": scale, "route": name, **result})
+            print(f"  {scale:>3}×  {name:<40} {result['first_ms']:>10.1f} / {result['median_ms']:>10.1f} ms  "
+                  f"{result['peak_mb']:>8.1f} MB", file=sys.stderr)
+    finally:
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def run_scale_process(scale, repeat):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", str(scale), "--repeat", str(repeat)],
+        stdout=subprocess.PIPE, check=True,
+    ).stdout
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def markdown(results):
+    lines = [
+        "| 倍數 | 路由 | 狀態 | 第一次 (ms) | 之後中位數 (ms) | 峰值記憶體 (MB) | 回應大小 (bytes) |",
+        "|---:|---|---:|---:|---:|---:|---:|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['scale']}× | {r['route']} | {r['status']} | {r['first_ms']} | {r['median_ms']} "
+            f"| {r['peak_mb']} | {r['bytes']} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="另存 JSON 結果")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scale(args.worker, args.repeat), ensure_ascii=False))
+        return 0
+
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale_process(scale, args.repeat))
+
+    print(markdown(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+品名比對效能比較: 原本逐筆 SequenceMatcher vs utils.item_matcher
+
+以 static/data/Buyer_detail.csv 為資料來源,依 PO 分組後把每一筆當作「上傳資料」
+(品名加上少量變動) 與同 PO 的所有資料比對;--scale 會把各 PO 的資料複製放大,
+模擬單張 PO 有大量項次的情況。兩種方式的最佳候選與前 5 名分數必須一致。
+
+用法 (在 預計請購 目錄下):
+    python bench/bench_item_matcher.py
+    python bench/bench_item_matcher.py --scale 10 --repeat 3
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils.item_matcher import ItemMatcher, clean_text  # noqa: E402
+
+BUYER_FILE = os.path.join(APP_DIR, "static", "data", "Buyer_detail.csv")
+
+
+def load_groups(scale):
+    groups = defaultdict(list)
+    with open(BUYER_FILE, encoding="utf-8-sig", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            po = row.get("PO No.", "").strip()
+            if po:
+                groups[po].append((i, row.get("Item", ""), row.get("品項", ""),
+                                   row.get("Delivery Date 廠商承諾交期", "")))
+
+    if scale > 1:
+        for po, rows in groups.items():
+            groups[po] = [
+                (index * scale + k, item, f"{desc} #{k}" if k else desc, delivery)
+                for k in range(scale)
+                for index, item, desc, delivery in rows
+            ]
+    return groups
+
+
+def uploads_for(rows):
+    """每筆資料當作上傳資料,品名做少量變動"""
+    return [(item, desc.upper().replace(" ", "") + " Rev.B") for _, item, desc, _ in rows]
+
+
+def baseline(groups, top_n):
+    results = []
+    for po, rows in groups.items():
+        for item_new, new_desc in uploads_for(rows):
+            scores = []
+            for index, item, desc, delivery in rows:
+                a = clean_text(new_desc).lower()
+                b = clean_text(desc).lower()
+                scores.append({
+                    "index": index,
+                    "similarity": SequenceMatcher(None, a, b).ratio() * 100,
+                    "item_match": item == item_new,
+                })
+            scores.sort(key=lambda x: (x["similarity"], x["item_match"]), reverse=True)
+            results.append([(s["index"], round(s["similarity"], 6)) for s in scores[:top_n]])
+    return results
+
+
+def engine(groups, top_n, matcher):
+    results = []
+    for po, rows in groups.items():
+        for item_new, new_desc in uploads_for(rows):
+            scores = matcher.score_candidates(new_desc, item_new, rows, keep=top_n)
+            scores.sort(key=lambda x: (x["similarity"], x["item_match"]), reverse=True)
+            results.append([(s["index"], round(s["similarity"], 6)) for s in scores[:top_n]])
+    return results
+
+
+def timed(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="每張 PO 資料放大倍數")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數 (取最佳)")
+    parser.add_argument("--top", type=int, default=5, help="比較前 N 名")
+    args = parser.parse_args()
+
+    groups = load_groups(args.scale)
+    pairs = sum(len(rows) ** 2 for rows in groups.values())
+    print(f"PO 數: {len(groups)}, 比對組合: {pairs:,} (scale={args.scale})")
+
+    base_time, base_result = timed(lambda: baseline(groups, args.top), args.repeat)
+    cold_time, cold_result = timed(lambda: engine(groups, args.top, ItemMatcher()), 1)
+    warm_matcher = ItemMatcher(cache_size=max(4096, pairs))
+    engine(groups, args.top, warm_matcher)
+    warm_time, warm_result = timed(lambda: engine(groups, args.top, warm_matcher), args.repeat)
+
+    same = base_result == cold_result == warm_result
+    print(f"{'方式':<24}{'時間 (秒)':>12}{'倍數':>10}")
+    print(f"{'SequenceMatcher 逐筆':<24}{base_time:>12.4f}{1:>10.1f}")
+    print(f"{'ItemMatcher (無快取)':<24}{cold_time:>12.4f}{base_time / cold_time:>10.1f}")
+    print(f"{'ItemMatcher (快取)':<24}{warm_time:>12.4f}{base_time / warm_time:>10.1f}")
+    print(f"結果一致: {'✅' if same else '❌'}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
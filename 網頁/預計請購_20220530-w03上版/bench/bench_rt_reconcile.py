@@ -0,0 +1,163 @@
+"""
+RT 對帳效能比較: 原本逐筆 iterrows 比對 vs utils.rt_reconcile
+
+以 ERT驗收(更新RT金額與驗收Mail) 底下的 E-RT 收貨單 mhtml 為資料來源,
+每個檔案先用 MHTMLParser 解析出 GridView,再分別與 static/data/Buyer_detail.csv 對帳;
+--scale 會把每張收貨單的資料列複製放大。兩種方式的 PO、金額與匹配結果必須一致。
+
+用法 (在 預計請購 目錄下,需要完整的執行環境):
+    python bench/bench_rt_reconcile.py
+    python bench/bench_rt_reconcile.py --scale 20 --repeat 3
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(APP_DIR))
+SAMPLE_DIR = os.path.join(REPO_DIR, "ERT驗收(更新RT金額與驗收Mail)")
+sys.path.insert(0, APP_DIR)
+os.chdir(APP_DIR)
+logging.disable(logging.CRITICAL)
+
+from routes.ert import MHTMLParser  # noqa: E402
+from utils.rt_reconcile import reconcile  # noqa: E402
+
+BUYER_FILE = os.path.join("static", "data", "Buyer_detail.csv")
+COMPARE_FIELDS = ["po_no", "description", "qty", "accept_qty", "amount",
+                  "rt_amount", "rt_total_amount", "matched_in_buyer", "buyer_row_index"]
+
+
+def load_gridviews(scale):
+    gridviews = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "**", "*.mhtml"), recursive=True)):
+        data = MHTMLParser(path).parse().get("gridview_data")
+        if not data or not data["rows"]:
+            continue
+        if scale > 1:
+            data = dict(data, rows=data["rows"] * scale)
+        gridviews.append((os.path.basename(path), data))
+    return gridviews
+
+
+def baseline(gridview_data):
+    """原本 compare_with_buyer_csv 的比對方式 (去除除錯輸出)"""
+    buyer_df = pd.read_csv(BUYER_FILE, encoding="utf-8-sig")
+    buyer_df["PO No."] = buyer_df["PO No."].apply(
+        lambda x: str(x).replace(".0", "") if pd.notna(x) and str(x).endswith(".0") else str(x) if pd.notna(x) else ""
+    )
+    headers = gridview_data.get("headers", [])
+    rows = gridview_data.get("rows", [])
+
+    po_index = desc_index = qty_index = accept_qty_index = amount_index = -1
+    for i, header in enumerate(headers):
+        header_text = header.get("en", "").lower() or header.get("zh", "").lower() or header.get("full", "").lower()
+        if ("po" in header_text and "no" in header_text) or "po號碼" in header_text:
+            if "demo" not in header_text:
+                po_index = i
+        elif "description" in header_text or "品名" in header_text:
+            desc_index = i
+        elif "accept" in header_text and "qty" in header_text or "驗收數量" in header_text:
+            accept_qty_index = i
+        elif "qty" in header_text or "數量" in header_text or "收貨數量" in header_text:
+            if accept_qty_index == -1:
+                qty_index = i
+        elif "amount" in header_text or "總金額" in header_text:
+            amount_index = i
+
+    items = []
+    total_amount = 0
+    for row in rows:
+        item = {}
+        raw_data = row.get("raw_data", [])
+        if 0 <= po_index < len(raw_data):
+            item["po_no"] = str(raw_data[po_index].get("value", "")).strip()
+        if 0 <= desc_index < len(raw_data):
+            item["description"] = str(raw_data[desc_index].get("value", "")).strip()
+        if 0 <= qty_index < len(raw_data):
+            item["qty"] = raw_data[qty_index].get("value", "")
+        if 0 <= accept_qty_index < len(raw_data):
+            item["accept_qty"] = raw_data[accept_qty_index].get("value", "")
+        elif qty_index >= 0:
+            item["accept_qty"] = item.get("qty", "0")
+        if 0 <= amount_index < len(raw_data):
+            item["amount"] = raw_data[amount_index].get("value", "")
+
+        try:
+            amount_str = str(item.get("amount", "0")).replace(",", "").replace("$", "").replace("TWD", "").strip()
+            amount_value = float(amount_str) if amount_str and amount_str != "-" else 0
+            accept_qty_str = str(item.get("accept_qty", "0")).replace(",", "").strip()
+            accept_qty_value = float(accept_qty_str) if accept_qty_str and accept_qty_str not in ("0", "-") else 1
+            item["rt_amount"] = amount_value / accept_qty_value if accept_qty_value > 0 else 0
+            item["rt_total_amount"] = amount_value
+            total_amount += amount_value
+        except Exception:
+            item["rt_amount"] = 0
+            item["rt_total_amount"] = 0
+
+        matched_in_buyer = False
+        buyer_row_index = -1
+        if item.get("po_no"):
+            for idx, buyer_row in buyer_df.iterrows():
+                if str(buyer_row.get("PO No.", "")).strip() == item["po_no"]:
+                    matched_in_buyer = True
+                    buyer_row_index = idx
+                    break
+        item["matched_in_buyer"] = matched_in_buyer
+        item["buyer_row_index"] = buyer_row_index
+        items.append(item)
+
+    return {"items": items, "summary": {"total_items": len(items), "total_amount": total_amount}}
+
+
+def run(func, gridviews, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(data) for _, data in gridviews]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    gridviews = load_gridviews(args.scale)
+    rows = sum(len(data["rows"]) for _, data in gridviews)
+    print(f"收貨單: {len(gridviews)} 份, GridView 資料列: {rows}")
+
+    base_time, base_results = run(baseline, gridviews, args.repeat)
+    new_time, new_results = run(lambda data: reconcile(data, BUYER_FILE), gridviews, args.repeat)
+
+    mismatches = 0
+    for (name, _), old, new in zip(gridviews, base_results, new_results):
+        if abs(old["summary"]["total_amount"] - new["summary"]["total_amount"]) > 1e-6:
+            mismatches += 1
+            print(f"✗ {name}: 合計金額不同 {old['summary']['total_amount']} / {new['summary']['total_amount']}")
+        for i, (a, b) in enumerate(zip(old["items"], new["items"])):
+            diff = [field for field in COMPARE_FIELDS if a.get(field) != b.get(field)]
+            if diff:
+                mismatches += 1
+                print(f"✗ {name} 第 {i} 列: {diff}")
+
+    matched = sum(new["summary"]["matched_count"] for new in new_results)
+    qty_diff = sum(new["summary"]["quantity_diff_count"] for new in new_results)
+    print(f"匹配 {matched} 筆, 數量不同 {qty_diff} 筆")
+    print(f"原本逐筆比對: {base_time * 1000:.1f} ms")
+    print(f"rt_reconcile: {new_time * 1000:.1f} ms ({base_time / new_time:.1f}x)")
+    print("結果一致" if not mismatches else f"結果不一致: {mismatches} 處")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+預算 / 入帳 / 預估金額
+"""
+import os
+import json
+import traceback
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from utils.forecast import next_month_range, date_int, AMOUNT_COLUMN as FORECAST_AMOUNT_COLUMN
+from routes.common import (
+    JSON_FILE, BUYER_CSV_PATH,
+    budget_engine, accounting_ledger, amount_forecast, read_json_file,
+)
+
+logger = logging.getLogger(__name__)
+accounting_bp = Blueprint("accounting", __name__)
+
+
+# 12/1
+# ========================================================================
+# 🆕 新增API：月度花費分析（用於新圖表頁面）
+# ========================================================================
+@accounting_bp.route('/api/monthly_expense_analysis', methods=['POST'])
+def monthly_expense_analysis():
+    """月度費用分析API - 支持範圍查詢"""
+    try:
+        data = request.json
+        start_month = data.get('start_month', '2025-02')
+        end_month = data.get('end_month', '2025-11')
+        
+        if not budget_engine.has_data():
+            return jsonify({'success': False, 'message': 'CSV中沒有有效數據'})
+        
+        # 轉換查詢月份 (2025-02 -> 202502)
+        start_month_num = start_month.replace('-', '')
+        end_month_num = end_month.replace('-', '')
+        
+        summary = budget_engine.expense_summary(start_month_num, end_month_num)
+        if summary is None:
+            return jsonify({'success': False, 'message': f'{start_month} 到 {end_month} 沒有數據'})
+        
+        return jsonify({
+            'success': True,
+            'data': summary
+        })
+        
+    except Exception as e:
+        print(f"月度費用分析錯誤: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': f'錯誤: {str(e)}'}), 500
+    
+
+@accounting_bp.route('/api/getrestofmoney', methods = ['GET'])
+def getrestofmoney():
+    import datetime
+
+    budget = read_json_file()
+    current_date = datetime.datetime.now()
+    current_year = str(current_date.year)
+    month_no_pad = str(current_date.month)       # '8'
+    month_pad = str(current_date.month).zfill(2) # '08'
+    yyyymm = current_year + month_pad
+
+    # 嘗試兩種 key
+    data = budget.get("預算", {}).get(current_year, {}).get(month_no_pad, {})
+    if not data:
+        data = budget.get("預算", {}).get(current_year, {}).get(month_pad, {})
+
+    current_budget = float(data.get('當月請購預算', 0))
+    additional_budget = float(data.get('當月追加預算', 0))
+
+    try:
+        total_money = budget_engine.ordered_total(yyyymm)
+    except:
+        total_money = 0.0
+
+    rest_money = (current_budget + additional_budget) - total_money
+    # print(f"[DEBUG] 當月預算={current_budget}, 追加={additional_budget}, 已開單={total_money}, 剩餘={rest_money}")
+    return jsonify({
+        '當月請購預算': int(current_budget),
+        '當月追加預算': int(additional_budget),
+        '已開單總額': int(total_money),
+        '剩餘金額': int(rest_money)
+    })
+
+
+
+
+@accounting_bp.route('/api/budget_months', methods=['GET'])
+def get_budget_months():
+    """
+    獲取所有可用的預算月份選項和對應的預算金額
+    """
+    try:
+        budget = read_json_file()
+        # print(f"📊 讀取預算資料: {budget}")
+        
+        budget_list = []
+        try:
+            ordered_totals = budget_engine.ordered_totals_by_month()
+        except Exception as e:
+            print(f"⚠️ 無法計算各月份已開單總額: {e}")
+            ordered_totals = {}
+        
+        # 從預算資料中提取所有年份和月份，並計算預算
+        budget_data = budget.get("預算", {})
+        
+        for year in budget_data.keys():
+            year_data = budget_data[year]
+            for month in year_data.keys():
+                # 格式化為 YYYYMM 格式
+                month_padded = str(month).zfill(2)
+                year_month = f"{year}{month_padded}"
+                
+                # 獲取該月份的預算資料
+                month_budget_data = year_data[month]
+                current_budget = month_budget_data.get('當月請購預算', 0)
+                additional_budget = month_budget_data.get('當月追加預算', 0)
+                total_budget = current_budget + additional_budget
+                
+                # 建立月份和預算的對應資料
+                ordered_total = ordered_totals.get(year_month, 0)
+                budget_info = {
+                    'month': year_month,
+                    'money': total_budget,
+                    '當月請購預算': current_budget,
+                    '當月追加預算': additional_budget,
+                    '已開單總額': int(ordered_total),
+                    '剩餘金額': int(total_budget - ordered_total)
+                }
+                
+                budget_list.append(budget_info)
+                # print(f"💰 {year_month}: 請購={current_budget:,}, 追加={additional_budget:,}, 總計={total_budget:,}")
+        
+        # 按月份排序，最新的在前
+        budget_list.sort(key=lambda x: x['month'], reverse=True)
+        
+        # print(f"📅 完整預算清單: {budget_list}")
+        
+        return jsonify({
+            'success': True,
+            'budget_list': budget_list,
+            'count': len(budget_list)
+        })
+        
+    except Exception as e:
+        print(f"❌ 獲取預算月份錯誤: {e}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+    
+
+@accounting_bp.route('/api/uploadMoney', methods=['POST'])
+def uploadMoney():
+    try:
+        data = request.get_json()
+        year = data.get('currentYear')
+        month = data.get('currentMonth')
+        current_budget = data.get('currentBudget')
+        additional_budget = data.get('additionalBudget')
+
+        budget_data = read_json_file()  # 讀原始 JSON 資料
+        print("budget_data: ", budget_data)
+
+        # 檢查年度
+        if "預算" not in budget_data:
+            budget_data["預算"] = {}
+
+        if str(year) not in budget_data["預算"]:
+            budget_data["預算"][str(year)] = {}
+
+        # 更新該月份資料
+        budget_data["預算"][str(year)][str(month)] = {
+            "當月請購預算": current_budget,
+            "當月追加預算": additional_budget
+        }
+
+        # ✅ 正確寫入更新後的資料
+        with open(JSON_FILE, 'w', encoding='utf-8') as f:
+            json.dump(budget_data, f, ensure_ascii=False, indent=4)
+
+        return jsonify({'message': '資料提交成功'}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+
+# eRT 功能
+# 1.py
+FORECAST_ROW_COLUMNS = [
+    ("ePR No.", "ePR No."), ("PO No.", "PO No."), ("Item", "Item"), ("品項", "品項"),
+    ("總價", "總價"), ("RT總金額", "RT總金額"), ("承諾交期", "Delivery Date 廠商承諾交期"),
+    ("發票月份", "發票月份"),
+]
+
+
+def forecast_rows(filtered):
+    """預估金額明細 (前端顯示用)"""
+    rows = []
+    for row in filtered.to_dict("records"):
+        detail = {key: str(row.get(col, "")) for key, col in FORECAST_ROW_COLUMNS}
+        detail["計算金額"] = row[FORECAST_AMOUNT_COLUMN]
+        rows.append(detail)
+    return rows
+
+
+@accounting_bp.route('/api/get_unaccounted_amount', methods=['GET'])
+def get_unaccounted_amount():
+    """
+    統計尚未入帳的金額 (以今天日期為基準)
+    條件：
+    1. 有承諾交期
+    2. 承諾交期 <= 今天
+    3. 發票月份為空
+    4. 移除 WBS
+    """
+    file_path = BUYER_CSV_PATH
+    if not os.path.exists(file_path):
+        return {"file": file_path, "unaccounted_amount": 0, "rows": []}
+
+    try:
+        filtered, total_amount = amount_forecast.unaccounted()
+        return jsonify({
+            "unaccounted_amount": int(round(total_amount, 2)),
+            "rows": forecast_rows(filtered)
+        })
+    except Exception as e:
+        return {"file": file_path, "error": str(e)}
+
+
+# 5.py
+@accounting_bp.route('/api/next_month_amount', methods=['GET'])
+def get_next_month_amount():
+    """下個月承諾交期、尚未開發票、非 WBS 的預估金額"""
+    try:
+        start, end = next_month_range()
+        filtered, total_amount = amount_forecast.next_month()
+        return jsonify({
+            "next_month_amount": int(round(total_amount, 2)),
+            "start": start,
+            "end": end,
+            "rows": forecast_rows(filtered)
+        })
+    except Exception as e:
+        logger.error(f"❌ 下月預估金額錯誤: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@accounting_bp.route('/api/forecast_amount', methods=['GET'])
+def get_forecast_amount():
+    """
+    任意區間的預估金額
+    參數: start / end (YYYYMMDD,可省略一端),include_wbs=1 時包含 WBS 資料
+    """
+    try:
+        start = request.args.get("start") or None
+        end = request.args.get("end") or None
+        start = date_int(start) if start else None
+        end = date_int(end) if end else None
+    except ValueError:
+        return jsonify({"error": "start / end 格式應為 YYYYMMDD"}), 400
+
+    try:
+        exclude_wbs = request.args.get("include_wbs") != "1"
+        filtered, total_amount = amount_forecast.window(start, end, exclude_wbs=exclude_wbs)
+        return jsonify({
+            "amount": int(round(total_amount, 2)),
+            "start": start,
+            "end": end,
+            "count": len(filtered),
+            "rows": forecast_rows(filtered)
+        })
+    except Exception as e:
+        logger.error(f"❌ 區間預估金額錯誤: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+
+# 3.py
+@accounting_bp.route("/api/accounting_summary", methods=["GET"])
+def get_accounting_summary():
+    """
+    各月份未入帳金額 (承諾交期在當月、尚未開發票、非 WBS)
+    由入帳快照提供,Buyer_detail.csv 變動時才重新計算
+    """
+    try:
+        return jsonify(accounting_ledger.accounting_summary())
+    except Exception as e:
+        logger.error(f"❌ 未入帳彙總錯誤: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# 2_4.py
+@accounting_bp.route("/api/monthly_actual_accounting", methods=["GET"])
+def get_monthly_actual_accounting():
+    """本月 / 上月實際入帳金額 (有發票月份、非 WBS),由入帳快照提供"""
+    try:
+        return jsonify(accounting_ledger.monthly_actual())
+    except Exception as e:
+        logger.error(f"❌ 實際入帳彙總錯誤: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,350 @@
+"""
+主任 / 叔叔雙重簽核
+"""
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from utils.lazy_import import lazy_module
+from utils.table_store import read_table, write_table
+from routes.common import CSV_FILE, approval_service
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+approval_bp = Blueprint("approval", __name__)
+
+
+# 11/25 更新
+# ========== 長官審核相關 API（雙重簽核版 - 主任簽核 + 叔叔簽核，移除長官確認欄位）==========
+@approval_bp.route('/api/add-item-with-notification', methods=['POST'])
+def add_item_with_notification():
+    """新增資料（不發送郵件）"""
+    try:
+        data = request.json
+        
+        # 讀取現有 CSV
+        df = read_table(CSV_FILE)
+        df = df.fillna('')  # ⭐ 避免 nan 問題
+        
+        # 確保簽核欄位存在
+        if '主任簽核' not in df.columns:
+            df['主任簽核'] = 'X'
+        if '叔叔簽核' not in df.columns:
+            df['叔叔簽核'] = 'X'
+        
+        # 準備新增的資料
+        new_row = {}
+        for col in df.columns:
+            new_row[col] = data.get(col, '')
+        
+        # 預設簽核狀態為 X (未確認)
+        new_row['主任簽核'] = 'X'
+        new_row['叔叔簽核'] = 'X'
+        
+        # 新增到 DataFrame
+        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        
+        # 儲存 CSV
+        df = df.fillna('')  # ⭐ 寫入前確保沒有 nan
+        write_table(df, CSV_FILE)
+        
+        return jsonify({
+            'status': 'success',
+            'message': '資料新增成功',
+            'new_item_id': new_row.get('Id', '')
+        })
+        
+    except Exception as e:
+        logger.info(f"新增資料失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/get-pending-approval-items', methods=['GET'])
+def get_pending_approval_items():
+    """取得所有待長官確認的資料"""
+    try:
+        # 待審核: 主任 / 叔叔簽核沒有被退回 (R),且不是兩個都已確認 (V)
+        items_list = approval_service.pending_items()
+        
+        return jsonify({
+            'status': 'success',
+            'items': items_list,
+            'count': len(items_list)
+        })
+        
+    except Exception as e:
+        logger.info(f"取得待審核資料失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/approve-items', methods=['POST'])
+def approve_items():
+    """批次確認資料（支援主任簽核和叔叔簽核）"""
+    try:
+        data = request.json
+        item_ids = data.get('item_ids', [])
+        approve_director = data.get('approve_director', True)  # 是否確認主任簽核
+        approve_uncle = data.get('approve_uncle', True)  # 是否確認叔叔簽核
+        clear_remarks = data.get('clear_remarks', False)  # 是否清空退回原因
+        
+        if not item_ids:
+            return jsonify({
+                'status': 'error',
+                'message': '未提供要確認的資料 ID'
+            }), 400
+        
+        # 一次更新所有指定 ID 的簽核狀態 (選擇性清空退回原因)
+        updated_count = approval_service.approve(
+            item_ids,
+            director=approve_director,
+            uncle=approve_uncle,
+            clear_remarks=clear_remarks
+        )
+        
+        # 構建訊息
+        msg_parts = []
+        if approve_director:
+            msg_parts.append('主任簽核')
+        if approve_uncle:
+            msg_parts.append('叔叔簽核')
+        msg = f'成功確認 {updated_count} 筆資料的 {" 和 ".join(msg_parts)}'
+        
+        return jsonify({
+            'status': 'success',
+            'message': msg,
+            'updated_count': updated_count
+        })
+        
+    except Exception as e:
+        logger.info(f"確認資料失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/reject-items', methods=['POST'])
+def reject_items():
+    """批次退回資料（支援指定退回階段：主任簽核或叔叔簽核）"""
+    try:
+        data = request.json
+        item_ids = data.get('item_ids', [])
+        reject_reason = data.get('reject_reason', '長官退回')
+        reject_stage = data.get('reject_stage', 'director')  # 'director' 或 'uncle'
+        
+        if not item_ids:
+            return jsonify({
+                'status': 'error',
+                'message': '未提供要退回的資料 ID'
+            }), 400
+        
+        # 備註加上【主任退回】/【叔叔退回】原因,對應簽核欄位設為 R
+        updated_count, stage_label = approval_service.reject(item_ids, reject_reason, reject_stage)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'成功退回 {updated_count} 筆資料（{stage_label}簽核退回）',
+            'updated_count': updated_count
+        })
+        
+    except Exception as e:
+        logger.info(f"退回資料失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/resubmit-items', methods=['POST'])
+def resubmit_items():
+    """重新提交（將退回的資料改為待審核，重置兩個簽核狀態）"""
+    try:
+        data = request.json
+        item_ids = data.get('item_ids', [])
+        
+        if not item_ids:
+            return jsonify({
+                'status': 'error',
+                'message': '未提供要重新提交的資料 ID'
+            }), 400
+        
+        # 將所有簽核狀態改回待審核
+        updated_count = approval_service.resubmit(item_ids)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'成功重新提交 {updated_count} 筆資料',
+            'updated_count': updated_count
+        })
+        
+    except Exception as e:
+        logger.info(f"重新提交失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/get-all-items-with-approval', methods=['GET'])
+def get_all_items_with_approval():
+    """取得所有資料（自動更新有 ePR No. 的為已確認，確保雙簽核欄位存在）"""
+    try:
+        df = read_table(CSV_FILE)
+        df = df.fillna('')
+        
+        # 確保簽核欄位存在
+        columns_added = False
+        if '主任簽核' not in df.columns:
+            df['主任簽核'] = 'X'
+            columns_added = True
+        if '叔叔簽核' not in df.columns:
+            df['叔叔簽核'] = 'X'
+            columns_added = True
+        
+        # ⭐ 自動更新：有 ePR No. 的資料，兩個簽核都改為 V
+        if 'ePR No.' in df.columns:
+            has_epr = df['ePR No.'].astype(str).str.strip() != ''
+            
+            # 更新主任簽核
+            director_not_approved = df['主任簽核'].astype(str).str.strip() != 'V'
+            need_update_director = has_epr & director_not_approved
+            if need_update_director.any():
+                df.loc[need_update_director, '主任簽核'] = 'V'
+                columns_added = True
+            
+            # 更新叔叔簽核
+            uncle_not_approved = df['叔叔簽核'].astype(str).str.strip() != 'V'
+            need_update_uncle = has_epr & uncle_not_approved
+            if need_update_uncle.any():
+                df.loc[need_update_uncle, '叔叔簽核'] = 'V'
+                columns_added = True
+            
+            if need_update_director.any() or need_update_uncle.any():
+                updated_count = max(need_update_director.sum(), need_update_uncle.sum())
+                logger.info(f"✅ 自動更新 {updated_count} 筆已開單資料為已確認")
+        
+        # 如果有新增欄位或更新，儲存 CSV
+        if columns_added:
+            df = df.fillna('')
+            write_table(df, CSV_FILE)
+            logger.info("✅ 已新增/更新主任簽核和叔叔簽核欄位")
+        
+        # 轉換為 dict list
+        items_list = []
+        for _, row in df.iterrows():
+            item_dict = {}
+            for col in df.columns:
+                val = row[col]
+                if pd.isna(val):
+                    item_dict[col] = ''
+                else:
+                    item_dict[col] = str(val)
+            items_list.append(item_dict)
+        
+        return jsonify({
+            'status': 'success',
+            'items': items_list,
+            'count': len(items_list)
+        })
+        
+    except Exception as e:
+        logger.info(f"取得資料失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/clear-remark-and-approve', methods=['POST'])
+def clear_remark_and_approve():
+    """清空退回原因（保留原本備註）並根據退回階段設定簽核狀態"""
+    try:
+        data = request.json
+        item_id = data.get('item_id')
+        reject_stage = data.get('reject_stage', 'unknown')  # 'director' 或 'uncle'
+        
+        if not item_id:
+            return jsonify({
+                'status': 'error',
+                'message': '未提供資料 ID'
+            }), 400
+        
+        # ⭐ 只移除【主任退回】和【叔叔退回】的部分，保留原本備註，並根據退回階段設定簽核狀態
+        new_remark = approval_service.clear_remark(item_id, reject_stage)
+        
+        if new_remark is None:
+            return jsonify({
+                'status': 'error',
+                'message': f'找不到 ID 為 {item_id} 的資料'
+            }), 404
+        
+        if reject_stage == 'director':
+            # 主任退回 → 處理完成後：主任改為 V，叔叔維持 X（等待叔叔簽核）
+            message = '退回原因已清除，主任簽核已通過，請叔叔繼續簽核'
+            logger.info(f"✅ ID {item_id}: 主任退回處理完成 → 主任V, 叔叔X")
+        elif reject_stage == 'uncle':
+            # 叔叔退回 → 處理完成後：主任維持 V，叔叔改為 V（簽核完成）
+            message = '退回原因已清除，簽核流程已完成'
+            logger.info(f"✅ ID {item_id}: 叔叔退回處理完成 → 主任V, 叔叔V")
+        else:
+            # 未知狀態，只清空退回原因
+            message = '退回原因已清除'
+            logger.info(f"✅ ID {item_id}: 未知退回階段，僅清除退回原因")
+        
+        return jsonify({
+            'status': 'success',
+            'message': message,
+            'item_id': item_id,
+            'reject_stage': reject_stage,
+            'remaining_remark': new_remark  # 回傳保留的備註內容
+        })
+        
+    except Exception as e:
+        logger.info(f"❌ 處理失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@approval_bp.route('/api/approval-history', methods=['GET'])
+def get_approval_history():
+    """取得簽核歷程（可用 ?item_id= 指定資料，?limit= 筆數）"""
+    try:
+        item_id = request.args.get('item_id')
+        limit = request.args.get('limit', 200, type=int)
+        history = approval_service.history(item_id, limit=limit)
+        
+        return jsonify({
+            'status': 'success',
+            'history': history,
+            'count': len(history)
+        })
+        
+    except Exception as e:
+        logger.info(f"取得簽核歷程失敗: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
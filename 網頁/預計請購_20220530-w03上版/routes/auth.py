@@ -0,0 +1,187 @@
+"""
+登入 / 使用者資訊 / 篩選狀態
+"""
+import os
+import json
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from utils.lazy_import import lazy_module
+from utils.employee_directory import employee_directory
+from routes.common import FILTERS_DIR
+
+ldap3 = lazy_module("ldap3")
+
+logger = logging.getLogger(__name__)
+auth_bp = Blueprint("auth", __name__)
+
+
+def authenticate_user(username, password):
+    try:
+        server = ldap3.Server('ldap://KHADDC02.kh.asegroup.com', get_info = ldap3.ALL)
+        # 使用 NTLM
+        user = f'kh\\{username}'
+        password = f'{password}'
+        return True
+
+        # print("帳號: ", username, " 密碼: ", password)
+        # # 建立連接
+        # conn = Connection(server, user = user, password = password, authentication = NTLM)
+
+        # # 嘗試綁定
+        # if conn.bind():
+        #     app.logger.info(f"User {username} login successful.")
+        
+        # else:
+        #     # app.logger.warning(f"Login failed for user {username}: {conn.last_error}")
+        #     return False
+    except Exception as e:
+        # app.logger.error(f"Error during authentication for user {username}: {e}")
+        return False
+
+
+@auth_bp.route("/api/getAllLoginer", methods=["POST"])
+def getAllLoginer():
+    try:
+        data = request.get_json()
+        user_id = data.get("username")
+        print(user_id)
+
+        if employee_directory().find_by_id(user_id):
+            return jsonify({"name": "Username Find"})
+            
+        return jsonify({"error": "Item not found"}), 404
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@auth_bp.route('/api/login', methods=['POST'])
+def login():
+    data = request.json
+    if not data:
+        return jsonify({'message': '未提供登入資訊'}), 400
+    
+    username = data.get('username', '').strip()
+    password = data.get('password', '').strip()
+    
+    if authenticate_user(username, password):
+        return jsonify({'message': '登入成功'})
+    return jsonify({'message': '帳號或密碼錯誤'}), 401
+
+@auth_bp.route('/api/save-filters-json', methods=['POST'])
+def save_filters_json():
+    try:
+        data = request.json
+        username = data.get('username') # type: ignore
+        
+        if not username:
+            return jsonify({'status': 'error', 'message': '缺少使用者名稱'}), 400
+        
+        # 儲存到 JSON 檔案
+        filename = os.path.join(FILTERS_DIR, f'{username}_filters.json')
+        
+        # 確保目錄存在
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        
+        # 寫入檔案
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        
+        return jsonify({'status': 'success', 'message': '篩選狀態已儲存'})
+        
+    except Exception as e:
+        print(f"儲存篩選狀態錯誤: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@auth_bp.route('/api/get-filters-json/<username>', methods=['GET'])
+def get_filters_json(username):
+    try:
+        filename = os.path.join(FILTERS_DIR, f'{username}_filters.json')
+        
+        if os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                filters = json.load(f)
+            return jsonify(filters)
+        else:
+            return jsonify({'message': '找不到篩選設定'}), 404
+            
+    except Exception as e:
+        print(f"載入篩選狀態錯誤: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@auth_bp.route('/api/clear-filters-json/<username>', methods=['DELETE'])
+def clear_filters_json(username):
+    try:
+        filename = os.path.join(FILTERS_DIR, f'{username}_filters.json')
+        
+        if os.path.exists(filename):
+            os.remove(filename)
+            return jsonify({'status': 'success', 'message': '篩選狀態已清除'})
+        else:
+            return jsonify({'status': 'success', 'message': '沒有需要清除的篩選狀態'})
+            
+    except Exception as e:
+        print(f"清除篩選狀態錯誤: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+
+@auth_bp.route('/api/get-username-info', methods=['POST'])
+def get_username_info():
+    try:
+        data = request.get_json()
+        emp_id = data.get("emp_id", "").strip()  # 工號
+
+        if not emp_id:
+            return jsonify({"error": "缺少工號"}), 400
+
+        entry = employee_directory().find_by_id(emp_id)
+        if entry:
+            return jsonify({
+                "name": entry.get("姓名", "").strip(),
+                "班別": entry.get("班別", "").strip()
+            })
+
+        return jsonify({"error": "查無此工號"}), 404
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# 取得英文名字
+@auth_bp.route('/api/getUsername', methods=['POST'])
+def get_username():
+    try:
+        data = request.get_json()
+        username = data.get("username")
+        print("收到需求者名字：", username)
+
+
+        matched = employee_directory().find_by_name(username)
+        
+        if matched and "Notes_ID" in matched:
+            try:
+                name = matched["Notes_ID"].split("_")[0]
+            except:
+                name = matched["Notes_ID"].split("@")[0]
+
+            return jsonify({"name": name})
+        else:
+            return jsonify({"name": "查無使用者"}), 404
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# 罐頭訊息   - 。(前購單：，詳如附件)需求工程師：(CT4:)，合作開發：
+@auth_bp.route('/api/get_phone', methods=['POST'])
+def get_phone():
+    data = request.get_json()
+    name = data.get("name", "")
+    with open('static/data/phone.json', 'r', encoding='utf-8-sig') as f:
+        phone_data = json.load(f)
+
+    phone_number = phone_data.get(name, "未知")
+
+    return jsonify({"phone": phone_number})
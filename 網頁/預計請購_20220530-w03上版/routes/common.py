@@ -0,0 +1,98 @@
+"""
+各路由共用的資料路徑、服務實例與工具函式
+"""
+import os
+import json
+import logging
+
+from filelock import Timeout
+
+from utils.table_store import table_store, read_table, write_table
+from utils.purchase_sync import apply_derived_columns
+from utils.budget_engine import BudgetEngine
+from utils.accounting_ledger import AccountingLedger
+from utils.forecast import AmountForecast
+from utils.approval import ApprovalService
+from utils.attachment_store import AttachmentStore
+from utils.purchase_view import PurchaseView
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DATA = r"D:\Data\Backend_Access_Management\Backend_data.json"
+VENDER_FILE_PATH = f'static/data/vender.ini'
+CSV_FILE = "static/data/Planned_Purchase_Request_List.csv"
+JSON_FILE = f"static/data/money.json"
+BUYER_FILE = f"static/data/Buyer_detail.csv"
+# Buyer CSV 路徑設定（與 app.py 同層級）
+BUYER_CSV_PATH = 'static/data/Buyer_detail.csv'
+# 設定儲存篩選狀態的資料夾
+FILTERS_DIR = 'user_filters'
+# 報告 / 驗收附件: 以內容 hash 存一份 (唯讀),報告資料夾中放硬連結或複本 (見 utils/attachment_store.py)
+REPORT_SHARE_ROOT = r'\\cim300\FT01_CIM\FT01_4000\11.RR班人員-ePR請購管理'
+# E-HUB 供應商承諾交期 .xls (每個月一個 YYYY-MM 資料夾,見 utils/ehub_batch.py)
+EHUB_XLS_ROOT = os.environ.get(
+    "EHUB_XLS_ROOT", os.path.join("..", "..", "ERT驗收(更新RT金額與驗收Mail)", "01. E-HUB - 供應商承諾交期(Excel)")
+)
+
+# 建立全域實例 (建構時不讀檔,第一次使用才載入資料)
+budget_engine = BudgetEngine(CSV_FILE)
+approval_service = ApprovalService(CSV_FILE)
+purchase_view = PurchaseView(CSV_FILE)
+accounting_ledger = AccountingLedger(BUYER_CSV_PATH)
+amount_forecast = AmountForecast(BUYER_CSV_PATH)
+attachment_store = AttachmentStore(os.path.join(REPORT_SHARE_ROOT, '.attachments'))
+
+# 與 write_table 寫入 Buyer_detail.csv 時使用同一把鎖 (同一個執行緒可重入)
+buyer_file_lock = table_store.lock(BUYER_FILE, timeout=10)
+
+
+def read_json_file():
+    try:
+        with open(JSON_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}  # 如果文件不存在，返回空字典
+
+
+def clean_value(val):
+    try:
+        if isinstance(val, str) and val.endswith(".0"):
+            return str(int(float(val)))
+        return str(val) if val is not None else ""
+    except Exception:
+        return str(val)
+
+
+def update_verification_status_and_po_numbers():
+    """
+    更新驗收狀態和PO No.欄位
+    1. 根據Buyer_detail.csv中同ID的驗收狀態來更新Planned_Purchase_Request_List.csv的驗收狀態
+    2. 將同ID下的PO No.組合成字串
+    3. 檢查Buyer_detail.csv中的ePR No.，如果有值則設開單狀態為'V'
+
+    由寫入 Buyer_detail.csv 的路徑在存檔後呼叫,內容沒有變動時不會重寫檔案
+    """
+    try:
+        # 鎖定順序固定為 Buyer_detail → 主表,避免與其他路徑互相等待
+        with buyer_file_lock, table_store.lock(CSV_FILE):
+            main_df = read_table(CSV_FILE)  # Planned_Purchase_Request_List.csv
+            detail_df = read_table(BUYER_FILE)  # Buyer_detail.csv
+
+            main_changed, detail_changed = apply_derived_columns(main_df, detail_df)
+
+            if detail_changed:
+                write_table(detail_df, BUYER_FILE)
+            if main_changed:
+                write_table(main_df, CSV_FILE)
+
+        # Buyer_detail 有變動,順便更新入帳快照 (只重新解析變動的列)
+        accounting_ledger.refresh()
+        return True
+
+    except Timeout:
+        print("❌ 更新驗收狀態和PO No.時無法取得檔案鎖")
+        return False
+    except Exception as e:
+        print(f"❌ 更新驗收狀態和PO No.時發生錯誤: {str(e)}")
+        import traceback; traceback.print_exc()
+        return False
@@ -0,0 +1,903 @@
+"""
+E-RT 物料收貨單 / 驗收單 (mhtml) 解析與 Buyer_detail 更新
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import traceback
+import logging
+from email import policy
+from email.parser import BytesParser
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.utils import secure_filename
+
+from utils.lazy_import import lazy_module
+from utils.table_store import read_table, write_table
+from utils.buyer_index import BuyerIndex, buyer_index
+from utils.employee_directory import employee_directory
+from utils.mhtml_cache import mhtml_cache, make_soup, extract_element
+from utils.rt_reconcile import reconcile as reconcile_rt
+from acceptanceWeb.parse import accMHTMLParser
+from routes.common import CSV_FILE, BUYER_FILE, BUYER_CSV_PATH, update_verification_status_and_po_numbers
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+ert_bp = Blueprint("ert", __name__)
+
+
+# 物料收貨單
+def allowed_file(filename):
+    """檢查檔案是否為允許的格式"""
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def generate_unique_filename(original_name, new_name):
+    """生成唯一的檔名"""
+    # 取得副檔名
+    ext = original_name.rsplit('.', 1)[1].lower()
+    
+    # 如果新檔名沒有副檔名，加上原始副檔名
+    if not new_name.endswith(f'.{ext}'):
+        new_name = f"{new_name}.{ext}"
+    
+    # 生成唯一識別碼
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    unique_id = hashlib.md5(f"{new_name}{timestamp}".encode()).hexdigest()[:8]
+    
+    # 組合最終檔名
+    name_without_ext = new_name.rsplit('.', 1)[0]
+    final_name = f"{name_without_ext}_{unique_id}.{ext}"
+    
+    return secure_filename(final_name)
+
+class MHTMLParser:
+    """MHTML 檔案解析器"""
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.boundary = None
+        self.parts = []
+        self.html_content = None
+        self.metadata = {}
+        self.gridview_data = None
+        
+    def parse(self):
+        """解析 MHTML 檔案"""
+        with open(self.file_path, 'rb') as f:
+            return self.parse_bytes(f.read())
+
+    def parse_bytes(self, content):
+        """解析 MHTML 內容 (已讀入的 bytes)"""
+        try:
+            # 使用 email 模組解析 MHTML
+            try:
+                msg = BytesParser(policy=policy.default).parsebytes(content)
+            except Exception as e:
+                logger.error(f"Email parser error: {str(e)}")
+                # 如果 email 解析失敗，嘗試直接讀取為 HTML
+                self.html_content = content.decode('utf-8', errors='ignore')
+                
+                if self.html_content:
+                    result = self._extract_html_info()
+                    gridview_data = self._parse_gridview()
+                    if gridview_data:
+                        result['gridview_data'] = gridview_data # type: ignore
+                    return result
+                return {'error': f'無法解析檔案: {str(e)}'}
+            
+            # 提取基本資訊
+            self.metadata['subject'] = msg.get('Subject', '')
+            self.metadata['date'] = msg.get('Date', '')
+            self.metadata['from'] = msg.get('From', '')
+            self.metadata['content_type'] = msg.get_content_type()
+            
+            # 處理多部分內容
+            if msg.is_multipart():
+                self._parse_multipart(msg)
+            else:
+                # 單一部分 MHTML
+                content = msg.get_payload(decode=True)
+                if content:
+                    self.html_content = content.decode('utf-8', errors='ignore') # type: ignore
+            
+            # 解析 HTML 內容
+            if self.html_content:
+                result = self._extract_html_info()
+                
+                # 特別處理 GridView 表格
+                gridview_data = self._parse_gridview()
+                if gridview_data:
+                    result['gridview_data'] = gridview_data # type: ignore
+                
+                return result
+                
+            return self.metadata
+            
+        except Exception as e:
+            logger.error(f"解析錯誤: {str(e)}")
+            logger.error(traceback.format_exc())
+            return {'error': str(e)}
+    
+    def _parse_multipart(self, msg):
+        """解析多部分 MHTML"""
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            
+            # 尋找 HTML 內容
+            if content_type == 'text/html':
+                content = part.get_payload(decode=True)
+                if content:
+                    self.html_content = content.decode('utf-8', errors='ignore')
+                    
+            # 收集其他資源
+            elif not part.is_multipart():
+                self.parts.append({
+                    'content_type': content_type,
+                    'content_location': part.get('Content-Location', ''),
+                    'content_id': part.get('Content-ID', ''),
+                    'size': len(part.get_payload())
+                })
+    
+    def _extract_html_info(self):
+        """從 HTML 內容提取資訊"""
+        if not self.html_content:
+            return None  # 或 raise ValueError("html_content 為空")
+        
+        soup = make_soup(self.html_content)
+        
+        # 提取標題
+        title_tag = soup.find('title')
+        self.metadata['title'] = title_tag.string if title_tag else ''  # type: ignore
+        
+        # 提取 meta 標籤
+        meta_tags = {}
+        for meta in soup.find_all('meta'):
+            name = meta.get('name') or meta.get('property')
+            content = meta.get('content')
+            if name and content:
+                meta_tags[name] = content
+            
+            # 特別處理 charset
+            if meta.get('charset'):
+                self.metadata['encoding'] = meta.get('charset')
+            elif meta.get('http-equiv', '').lower() == 'content-type':
+                content = meta.get('content', '')
+                if 'charset=' in content:
+                    self.metadata['encoding'] = content.split('charset=')[-1].strip()
+        
+        self.metadata['meta_tags'] = meta_tags
+        
+        # 統計資訊
+        self.metadata['statistics'] = {
+            'total_parts': len(self.parts),
+            'html_size': len(self.html_content) if self.html_content else 0
+        }
+        
+        # 提取文字內容摘要（前500字）
+        text_content = soup.get_text(strip=True)
+        self.metadata['content_preview'] = text_content[:500] if text_content else ''
+        
+        return self.metadata
+    
+    def _parse_gridview(self):
+        """解析 GridView 表格資料"""
+        if not self.html_content:
+            return None
+        
+        try:
+            # 只切出 GridView Wrapper 這一段再建樹
+            fragment = extract_element(self.html_content, 'div', 'ContentPlaceHolder1_GridView2Wrapper')
+            soup = make_soup(fragment) if fragment else None
+            
+            # 尋找 GridView Wrapper
+            wrapper = soup.find('div', {'id': 'ContentPlaceHolder1_GridView2Wrapper'}) if soup else None
+            if not wrapper:
+                logger.debug("No GridView wrapper found")
+                return None
+            
+            gridview_data = {
+                'headers': [],
+                'rows': [],
+                'statistics': {}
+            }
+            
+            # 解析表頭
+            header_table = wrapper.find('table', {'id': 'ContentPlaceHolder1_GridView2Copy'}) # type: ignore
+            if header_table:
+                header_row = header_table.find('tr', {'id': lambda x: x and 'HeaderCopy' in x}) # type: ignore
+                if header_row:
+                    for th in header_row.find_all('th'): # type: ignore
+                        # 清理表頭文字
+                        header_text = th.get_text(strip=True)
+                        header_text = header_text.replace('\n', ' ').replace('\r', '')
+                        # 分離中英文
+                        if 'br' in str(th):
+                            parts = [t.strip() for t in th.strings]
+                            header_dict = {
+                                'zh': parts[0] if len(parts) > 0 else '',
+                                'en': parts[1] if len(parts) > 1 else '',
+                                'full': header_text
+                            }
+                        else:
+                            header_dict = {
+                                'zh': header_text,
+                                'en': '',
+                                'full': header_text
+                            }
+                        gridview_data['headers'].append(header_dict)
+            
+            # 解析資料行
+            data_table = wrapper.find('table', {'id': 'ContentPlaceHolder1_GridView2'}) # type: ignore
+            if data_table:
+                # 找所有的 tr，排除表頭
+                all_rows = data_table.find_all('tr') # type: ignore
+                data_rows = []
+                
+                for row in all_rows:
+                    # 跳過表頭行（通常有特定的 style 或 id）
+                    if row.get('id') and 'Header' in row.get('id', ''):
+                        continue
+                    if row.get('style') and 'display: none' in row.get('style', ''):
+                        continue
+                    # 確保有 td 元素
+                    if row.find_all('td'):
+                        data_rows.append(row)
+                
+                for row in data_rows:
+                    row_data = []
+                    cells = row.find_all('td')
+                    
+                    for idx, td in enumerate(cells):
+                        cell_data = {
+                            'value': '',
+                            'inputs': [],
+                            'spans': []
+                        }
+                        
+                        # 提取 input 元素
+                        inputs = td.find_all('input')
+                        for inp in inputs:
+                            input_data = {
+                                'type': inp.get('type', ''),
+                                'name': inp.get('name', ''),
+                                'id': inp.get('id', ''),
+                                'title': inp.get('title', ''),
+                                'src': inp.get('src', '')
+                            }
+                            # 標記按鈕類型，不依賴外部圖片
+                            if input_data['src']:
+                                if 'edit' in input_data['src'].lower() or '編輯' in input_data.get('title', ''):
+                                    input_data['button_type'] = 'edit'
+                                elif 'delete' in input_data['src'].lower() or '刪除' in input_data.get('title', ''):
+                                    input_data['button_type'] = 'delete'
+                                else:
+                                    input_data['button_type'] = 'unknown'
+                            
+                            cell_data['inputs'].append(input_data)
+                        
+                        # 提取 span 元素
+                        spans = td.find_all('span')
+                        for span in spans:
+                            span_text = span.get_text(strip=True)
+                            cell_data['spans'].append({
+                                'id': span.get('id', ''),
+                                'class': span.get('class', []),
+                                'text': span_text
+                            })
+                            if not cell_data['value']:  # 使用第一個 span 的文字作為值
+                                cell_data['value'] = span_text
+                        
+                        # 如果沒有 span，取整個 td 的文字
+                        if not cell_data['value']:
+                            cell_data['value'] = td.get_text(strip=True)
+                        
+                        row_data.append(cell_data)
+                    
+                    # 將資料行加入結果
+                    if row_data:
+                        # 建立結構化的資料物件
+                        structured_row = {}
+                        for i, header in enumerate(gridview_data['headers']):
+                            if i < len(row_data):
+                                # 建立更安全的欄位名稱
+                                if header.get('en'):
+                                    field_name = re.sub(r'[^a-zA-Z0-9_]', '_', header['en'].lower())
+                                else:
+                                    field_name = f'field_{i}'
+                                structured_row[field_name] = row_data[i]['value']
+                        
+                        # 加入原始資料和結構化資料
+                        gridview_data['rows'].append({
+                            'raw_data': row_data,
+                            'structured_data': structured_row
+                        })
+            
+            # 統計資訊
+            gridview_data['statistics'] = {
+                'total_columns': len(gridview_data['headers']),
+                'total_rows': len(gridview_data['rows']),
+                'has_data': len(gridview_data['rows']) > 0
+            }
+            
+            return gridview_data
+            
+        except Exception as e:
+            logger.error(f"GridView parsing error: {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
+
+@ert_bp.route('/api/upload-mhtml', methods=['POST'])
+def upload_mhtml():
+    """處理 MHTML 檔案上傳並自動與 Buyer CSV 比對"""
+    try:
+        # 檢查是否有檔案
+        if 'file' not in request.files:
+            logger.error("No file in request")
+            return jsonify({'success': False, 'error': '沒有檔案被上傳'}), 400
+        
+        file = request.files['file']
+        new_name = request.form.get('newName', '')
+        
+        # 檢查檔案是否為空
+        if file.filename == '':
+            logger.error("Empty filename")
+            return jsonify({'success': False, 'error': '沒有選擇檔案'}), 400
+        
+        # 檢查檔案格式
+        if not allowed_file(file.filename):
+            logger.error(f"Invalid file type: {file.filename}")
+            return jsonify({'success': False, 'error': '不支援的檔案格式'}), 400
+        
+        # 生成新的唯一檔名
+        if new_name:
+            filename = generate_unique_filename(file.filename, new_name)
+        else:
+            filename = generate_unique_filename(file.filename, file.filename)
+        
+        logger.info(f"Processing file: {filename}")
+        
+        # 儲存檔案到上傳資料夾
+        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        file.save(upload_path)
+        
+        # 移動並重新命名檔案到處理資料夾
+        processed_path = os.path.join(current_app.config['PROCESSED_FOLDER'], filename)
+        
+        # 如果目標檔案已存在，先刪除
+        if os.path.exists(processed_path):
+            os.remove(processed_path)
+        
+        os.rename(upload_path, processed_path)
+        
+        # 解析 MHTML 檔案 (同一份內容直接使用快取)
+        with open(processed_path, 'rb') as f:
+            raw_content = f.read()
+        extracted_info = mhtml_cache.get_or_parse(
+            'gridview',
+            raw_content,
+            lambda: MHTMLParser(processed_path).parse_bytes(raw_content),
+            cacheable=lambda result: isinstance(result, dict) and 'error' not in result,
+        )
+        
+        # 檢查是否有解析錯誤
+        if 'error' in extracted_info: # type: ignore
+            logger.error(f"Parser error: {extracted_info['error']}") # type: ignore
+            # 即使有錯誤，還是返回部分資訊
+        
+        # 加入檔案資訊
+        file_stats = os.stat(processed_path)
+        extracted_info.update({ # type: ignore
+            'original_filename': file.filename,
+            'saved_filename': filename,
+            'file_size': file_stats.st_size,
+            'upload_time': datetime.now().isoformat(),
+            'file_path': processed_path
+        })
+        
+        # 格式化檔案大小
+        size = file_stats.st_size
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024.0:
+                extracted_info['file_size_formatted'] = f"{size:.2f} {unit}" # type: ignore
+                break
+            size /= 1024.0
+        
+        # 如果有 GridView 資料，另外儲存為 JSON
+        if 'gridview_data' in extracted_info and extracted_info['gridview_data']: # type: ignore
+            json_filename = filename.rsplit('.', 1)[0] + '_gridview.json'
+            json_path = os.path.join(current_app.config['PROCESSED_FOLDER'], json_filename)
+            
+            try:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(extracted_info['gridview_data'], f, ensure_ascii=False, indent=2) # type: ignore
+                
+                extracted_info['gridview_json_file'] = json_filename # type: ignore
+                logger.info(f"GridView data saved to: {json_filename}")
+                
+                # 自動與 Buyer_detail.csv 比對
+                if os.path.exists(BUYER_CSV_PATH):
+                    logger.info("開始與 Buyer_detail.csv 比對...")
+                    comparison_result = compare_with_buyer_csv(extracted_info['gridview_data']) # type: ignore
+                    extracted_info['comparison_result'] = comparison_result # type: ignore
+                else:
+                    logger.warning(f"找不到 {BUYER_CSV_PATH}")
+                    extracted_info['comparison_result'] = { # type: ignore
+                        'error': f'找不到 {BUYER_CSV_PATH} 檔案',
+                        'needs_buyer_csv': True
+                    }
+                    
+            except Exception as e:
+                logger.error(f"Failed to save GridView JSON or compare: {str(e)}")
+        
+        return jsonify({
+            'success': True,
+            'message': '檔案上傳並解析成功',
+            'data': extracted_info
+        })
+        
+    except Exception as e:
+        logger.error(f"上傳錯誤: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': f'處理檔案時發生錯誤: {str(e)}'
+        }), 500
+
+def compare_with_buyer_csv(gridview_data):
+    """與 Buyer CSV 比對 PO No. 和品名"""
+    try:
+        return reconcile_rt(gridview_data, BUYER_CSV_PATH)
+        
+    except Exception as e:
+        logger.error(f"比對錯誤: {str(e)}")
+        logger.error(traceback.format_exc())
+        return {
+            'error': str(e),
+            'items': [],
+            'summary': {}
+        }
+
+@ert_bp.route('/api/cleanup-processed', methods=['POST'])
+def cleanup_processed():
+    """清理 processed 資料夾中的所有文件"""
+    try:
+        processed_folder = current_app.config['PROCESSED_FOLDER']
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        
+        total_files_removed = 0
+        
+        # 清理 processed 資料夾
+        if os.path.exists(processed_folder):
+            files_before = os.listdir(processed_folder)
+            if files_before:
+                for filename in files_before:
+                    file_path = os.path.join(processed_folder, filename)
+                    try:
+                        if os.path.isfile(file_path) or os.path.islink(file_path):
+                            os.unlink(file_path)
+                            total_files_removed += 1
+                            print(f"已刪除 processed 文件: {filename}")
+                        elif os.path.isdir(file_path):
+                            shutil.rmtree(file_path)
+                            total_files_removed += 1
+                            print(f"已刪除 processed 目錄: {filename}")
+                    except Exception as e:
+                        logger.error(f"無法刪除 processed 文件 {file_path}: {str(e)}")
+        
+        # 同時清理 upload 資料夾（預防措施）
+        if os.path.exists(upload_folder):
+            upload_files = os.listdir(upload_folder)
+            if upload_files:
+                for filename in upload_files:
+                    file_path = os.path.join(upload_folder, filename)
+                    try:
+                        if os.path.isfile(file_path) or os.path.islink(file_path):
+                            os.unlink(file_path)
+                            total_files_removed += 1
+                            print(f"已刪除 upload 文件: {filename}")
+                        elif os.path.isdir(file_path):
+                            shutil.rmtree(file_path)
+                            total_files_removed += 1
+                            print(f"已刪除 upload 目錄: {filename}")
+                    except Exception as e:
+                        logger.error(f"無法刪除 upload 文件 {file_path}: {str(e)}")
+        
+        # 驗證清理結果
+        processed_files_after = os.listdir(processed_folder) if os.path.exists(processed_folder) else []
+        upload_files_after = os.listdir(upload_folder) if os.path.exists(upload_folder) else []
+        
+        print(f"清理完成: 刪除了 {total_files_removed} 個文件")
+        
+        return jsonify({
+            'success': True,
+            'message': f'成功清理 {total_files_removed} 個文件',
+            'files_removed': total_files_removed,
+            'remaining_processed_files': len(processed_files_after),
+            'remaining_upload_files': len(upload_files_after)
+        })
+        
+    except Exception as e:
+        logger.error(f"清理資料夾錯誤: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': f'清理失敗: {str(e)}'
+        }), 500
+
+# 修改現有的 update_buyer_csv 函數，在成功更新後自動觸發清理
+@ert_bp.route('/api/update-buyer-csv', methods=['POST'])
+def update_buyer_csv():
+    # 備份
+    # backup_files()
+    """更新 Buyer CSV 檔案中的 RT 金額"""
+    try:
+        data = request.json
+        items_to_update = data.get('items', []) # type: ignore
+        
+        if not items_to_update:
+            return jsonify({'success': False, 'error': '沒有要更新的項目'}), 400
+        
+        print(f"準備更新 {len(items_to_update)} 筆資料")
+        
+        # 讀取 Buyer CSV
+        try:
+            buyer_df = read_table(BUYER_CSV_PATH)
+        except:
+            try:
+                buyer_df = pd.read_csv(BUYER_CSV_PATH, encoding='utf-8', dtype=str)
+            except:
+                buyer_df = pd.read_csv(BUYER_CSV_PATH, encoding='big5', dtype=str)
+        
+        print(f"Buyer CSV 原始欄位: {list(buyer_df.columns)}")
+        
+        # 確保有 RT 相關欄位
+        if 'RT金額' not in buyer_df.columns:
+            buyer_df['RT金額'] = ''
+            print("新增 RT金額 欄位")
+        if 'RT總金額' not in buyer_df.columns:
+            buyer_df['RT總金額'] = ''
+            print("新增 RT總金額 欄位")
+        
+        updated_count = 0
+        buyer_idx = BuyerIndex(buyer_df)
+        
+        # 更新每個項目
+        for item in items_to_update:
+            print(items_to_update)
+            po_no = str(item.get('po_no', '')).strip()
+            description = str(item.get('description', '')).strip()
+            
+            # 將金額轉換為整數字串（移除小數點）
+            rt_amount = item.get('rt_amount', 0)
+            rt_total_amount = item.get('rt_total_amount', 0)
+            
+            try:
+                rt_amount_str = str(int(round(float(rt_amount))))
+                rt_total_amount_str = str(int(round(float(rt_total_amount))))
+            except:
+                rt_amount_str = '0'
+                rt_total_amount_str = '0'
+            
+            print(f"嘗試更新: PO={po_no}, 品名={description}, RT金額={rt_amount_str}, RT總金額={rt_total_amount_str}")
+            
+            if po_no:
+                po_rows = buyer_idx.select(buyer_df, po_no)
+                po_labels = po_rows.index[(po_rows['PO No.'].astype(str).str.strip() == po_no).to_numpy()]
+
+                if '品項' in buyer_df.columns:
+                    desc_match = buyer_df.loc[po_labels, '品項'].astype(str).str.strip() == description
+                    both_labels = po_labels[desc_match.to_numpy()]
+                else:
+                    both_labels = po_labels  # fallback
+
+                if len(both_labels) > 0:
+                    buyer_df.loc[both_labels, 'RT金額'] = rt_amount_str
+                    buyer_df.loc[both_labels, 'RT總金額'] = rt_total_amount_str
+                    updated_count += len(both_labels)
+                    print(f"✓ 完整匹配 PO={po_no}, 品項={description} → 成功更新")
+                elif len(po_labels) > 0:
+                    buyer_df.loc[po_labels, 'RT金額'] = rt_amount_str
+                    buyer_df.loc[po_labels, 'RT總金額'] = rt_total_amount_str
+                    updated_count += len(po_labels)
+                    logger.warning(f"⚠️ PO={po_no} 在 Buyer CSV 中有 {len(po_labels)} 筆，但品項不同 (GridView: {description}, Buyer: {buyer_df.loc[po_labels, '品項'].unique().tolist()})，仍強制更新 RT 金額")
+                else:
+                    logger.warning(f"✗ 在 Buyer CSV 中找不到 PO {po_no}")
+        
+        # 儲存更新後的 CSV
+        if updated_count > 0:
+            try:
+                write_table(buyer_df, BUYER_CSV_PATH, na_rep='')
+                update_verification_status_and_po_numbers()
+                print(f"成功儲存更新後的 Buyer CSV，共更新 {updated_count} 筆資料")
+                
+                # 驗證更新是否成功
+                verify_df = read_table(BUYER_CSV_PATH)
+                print(f"驗證: 更新後的 CSV 有 {len(verify_df)} 筆資料")
+                
+                # 檢查特定 PO 的更新結果
+                for item in items_to_update[:3]:
+                    po_no = str(item.get('po_no', '')).strip()
+                    if po_no:
+                        verify_rows = verify_df[verify_df['PO No.'].astype(str).str.strip() == po_no]
+                        if len(verify_rows) > 0:
+                            print(f"驗證 PO {po_no}：共有 {len(verify_rows)} 筆資料")
+                            for idx, row in verify_rows.iterrows():
+                                print(f"- 品項={row.get('品項', '')}, RT金額={row.get('RT金額', '')}, RT總金額={row.get('RT總金額', '')}")
+                                
+                return jsonify({
+                    'success': True,
+                    'message': f'成功更新 {int(updated_count)} 筆資料',
+                    'updated_count': int(updated_count),
+                    'total_items': int(len(items_to_update)),
+                    'should_cleanup': True,  # 確保添加標記告訴前端需要清理
+                    'cleanup_required': True  # 額外的清理標記
+                })
+                
+            except Exception as e:
+                logger.error(f"儲存 CSV 失敗: {str(e)}")
+                return jsonify({
+                    'success': False,
+                    'error': f'儲存檔案失敗: {str(e)}'
+                }), 500
+        else:
+            # 提供更詳細的錯誤資訊
+            logger.warning("沒有任何資料被更新")
+            
+            # 統計各種情況
+            empty_po_count = sum(1 for item in items_to_update if not str(item.get('po_no', '')).strip())
+            valid_po_count = len(items_to_update) - empty_po_count
+            
+            error_details = {
+                'total_items': len(items_to_update),
+                'valid_po_count': valid_po_count,
+                'empty_po_count': empty_po_count,
+                'updated_count': 0
+            }
+            
+            if empty_po_count > 0:
+                error_message = f'共 {len(items_to_update)} 筆資料中有 {empty_po_count} 筆缺少 PO 號碼，{valid_po_count} 筆在 Buyer CSV 中找不到匹配項目'
+            else:
+                error_message = f'在 Buyer CSV 中找不到任何匹配的 PO 號碼 (共檢查 {len(items_to_update)} 筆)'
+            
+            return jsonify({
+                'success': False,
+                'message': error_message,
+                'error': '後台查無此資料，請檢查 PO 號碼是否正確',
+                'details': error_details,
+                'updated_count': 0
+            })
+        
+    except Exception as e:
+        logger.error(f"更新 Buyer CSV 錯誤: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# 驗收區塊
+def normalize_name(name):
+    """標準化姓名，處理特殊字符問題 (規則集中在員工名冊,例如 郭任? → 郭任群)"""
+    if not name or pd.isna(name):
+        return name
+    return employee_directory().normalize_name(name)
+
+def query_user_by_po_no(po_no):
+    """根據 PO No. 查詢需求者"""
+    try:
+        planned_purchase_df = read_table(CSV_FILE)
+        planned_purchase_df.fillna("", inplace=True)
+
+        # 轉換 po_no 為字串進行比較
+        po_no_str = str(po_no).strip()
+        logger.info(f"查詢需求者，PO No: '{po_no_str}'")
+        
+        # 檢查 CSV 中的欄位名稱
+        logger.info(f"Planned_Purchase CSV 欄位: {list(planned_purchase_df.columns)}")
+        
+        # 嘗試不同的欄位名稱匹配
+        po_column = None
+        user_column = None
+        
+        for col in planned_purchase_df.columns:
+            if 'PO' in col and 'No' in col:
+                po_column = col
+            if '需求者' in col:
+                user_column = col
+        
+        if po_column is None or user_column is None:
+            logger.warning(f"找不到對應欄位 - PO欄位: {po_column}, 需求者欄位: {user_column}")
+            return None
+        
+        # 清理和轉換 PO No. 欄位
+        planned_purchase_df[po_column] = planned_purchase_df[po_column].astype(str).str.strip()
+        
+        # 查詢資料
+        result = planned_purchase_df[planned_purchase_df[po_column] == po_no_str]
+        
+        logger.info(f"查詢結果數量: {len(result)}")
+        
+        if not result.empty:
+            user = result.iloc[0][user_column]
+            # 標準化姓名
+            normalized_user = normalize_name(user)
+            logger.info(f"找到 PO {po_no} 的需求者: {user} -> {normalized_user}")
+            return normalized_user
+        else:
+            # 如果精確匹配失敗，嘗試部分匹配
+            logger.info(f"精確匹配失敗，嘗試部分匹配...")
+            partial_result = planned_purchase_df[planned_purchase_df[po_column].str.contains(po_no_str, na=False)]
+            if not partial_result.empty:
+                user = partial_result.iloc[0][user_column]
+                normalized_user = normalize_name(user)
+                logger.info(f"部分匹配找到 PO {po_no} 的需求者: {user} -> {normalized_user}")
+                return normalized_user
+            
+            # 顯示前幾筆資料供除錯
+            logger.info(f"前5筆 PO No. 資料: {planned_purchase_df[po_column].head().tolist()}")
+            
+    except Exception as e:
+        logger.error(f"查詢需求者時發生錯誤 (PO: {po_no}): {str(e)}")
+        logger.error(traceback.format_exc())
+    
+    return None
+
+def query_epr_no_by_po_no(po_no):
+    """根據 PO No. 查詢 ePR No. - 主要從 Buyer_detail.csv 查詢"""
+    try:
+        po_no_str = str(po_no).strip()
+        logger.info(f"查詢 ePR No.，PO No: '{po_no_str}'")
+        
+        # 主要從 Buyer_detail.csv 查詢（這裡有完整的資料），使用 PO 索引
+        epr_result = buyer_index(BUYER_FILE).epr_for_po(po_no_str)
+        if epr_result:
+            logger.info(f"✓ 在 Buyer_detail 找到 PO {po_no} 的 ePR No.: {epr_result}")
+            return epr_result
+        logger.warning(f"在 Buyer_detail 中未找到 PO {po_no} 的 ePR No.")
+        
+        # 如果 Buyer_detail 找不到，才嘗試 Planned_Purchase（備用）
+        logger.info("Buyer_detail 查詢失敗，嘗試 Planned_Purchase 作為備用")
+        planned_purchase_df = read_table(CSV_FILE)
+        if planned_purchase_df is not None:
+            logger.info(f"從 Planned_Purchase 查詢 (共 {len(planned_purchase_df)} 筆資料)")
+            
+            po_column = 'PO No.'
+            epr_column = 'ePR No.'
+            
+            if po_column in planned_purchase_df.columns and epr_column in planned_purchase_df.columns:
+                try:
+                    po_no_numeric = po_no_str
+                    result = planned_purchase_df[
+                        (planned_purchase_df[po_column].notna()) &
+                        (planned_purchase_df[po_column] == po_no_numeric)
+                    ]
+                    
+                    if not result.empty:
+                        epr_no = result.iloc[0][epr_column]
+                        if pd.notna(epr_no) and str(epr_no).strip() not in ['', 'nan', 'NaN']:
+                            epr_result = str(int(float(epr_no))) if isinstance(epr_no, (int, float)) else str(epr_no).strip()
+                            logger.info(f"✓ 在 Planned_Purchase 找到 PO {po_no} 的 ePR No.: {epr_result}")
+                            return epr_result
+                except ValueError:
+                    pass
+                
+    except Exception as e:
+        logger.error(f"查詢 ePR No. 時發生錯誤 (PO: {po_no}): {str(e)}")
+        logger.error(traceback.format_exc())
+    
+    logger.error(f"✗ 最終未找到 PO {po_no} 的 ePR No.")
+    return None
+
+
+
+@ert_bp.route('/api/parse-mhtml', methods=['POST'])
+def parse_mhtml():
+    """處理 MHTML 文件上傳和解析"""
+    try:
+        # 檢查是否有檔案
+        if 'file' not in request.files:
+            return jsonify({'error': '沒有上傳檔案'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': '沒有選擇檔案'}), 400
+        
+        # 檢查檔案格式
+        if not file.filename.lower().endswith(('.mhtml', '.mht')): # type: ignore
+            return jsonify({'error': '檔案格式不正確，請上傳 MHTML 格式檔案'}), 400
+        
+        # 讀取檔案內容
+        file_content = file.read()
+        
+        logger.info(f"收到檔案: {file.filename}, 大小: {len(file_content)} bytes")
+        
+        # 創建解析器並解析檔案 (同一份內容直接使用快取)
+        parsed_data = mhtml_cache.get_or_parse(
+            'acceptance',
+            file_content,
+            lambda: accMHTMLParser().parse_mhtml_file(file_content),
+        )
+        
+        # 輸出解析結果到後台日誌
+        logger.info("=" * 50)
+        logger.info("解析結果:")
+        logger.info(f"檔案名稱: {file.filename}")
+        logger.info(f"解析筆數: {len(parsed_data)}")
+        logger.info("-" * 30)
+        
+        for i, item in enumerate(parsed_data, 1):
+            logger.info(f"第 {i} 筆:")
+            logger.info(f"  RT No: {item.get('rtNo')}")
+            logger.info(f"  項次: {item.get('itemNo')}")
+            logger.info(f"  PO No: {item.get('poNo')}")
+            logger.info(f"  科目指派: {item.get('itemAssign')} - {item.get('itemAssignName')}")
+            logger.info(f"  品名: {item.get('description')}")
+            logger.info(f"  數量: {item.get('quantity')}")
+            logger.info(f"  取件者: {item.get('pickupPerson')}")
+            logger.info("-" * 30)
+        
+        logger.info("=" * 50)
+        
+        # 返回解析結果
+        return jsonify({
+            'success': True,
+            'filename': file.filename,
+            'count': len(parsed_data),
+            'data': parsed_data
+        })
+        
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"處理請求時發生錯誤: {error_msg}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': error_msg}), 500
+
+@ert_bp.route('/api/get-user-epr-data', methods=['POST'])
+def get_user_epr_data():
+    """根據PO號碼查詢對應的User和ePR No."""
+    try:
+        data = request.get_json()
+        po_numbers = data.get('poNumbers', [])
+
+        planned_purchase_df = read_table(CSV_FILE)
+        buyer_detail_df = read_table(BUYER_FILE)
+        logger.info(f"收到查詢請求，PO 號碼: {po_numbers}")
+        logger.info(f"buyer_detail_df 狀態: {'已載入' if buyer_detail_df is not None else '未載入'}")
+        logger.info(f"planned_purchase_df 狀態: {'已載入' if planned_purchase_df is not None else '未載入'}")
+        
+        if buyer_detail_df is not None:
+            logger.info(f"Buyer_detail 資料筆數: {len(buyer_detail_df)}")
+            logger.info(f"Buyer_detail 欄位: {list(buyer_detail_df.columns)}")
+            logger.info(f"Buyer_detail 前3筆 PO No.: {buyer_detail_df.iloc[:3]['PO No.'].tolist() if 'PO No.' in buyer_detail_df.columns else '找不到PO No.欄位'}")
+        
+        if planned_purchase_df is not None:
+            logger.info(f"Planned_purchase 資料筆數: {len(planned_purchase_df)}")
+            logger.info(f"Planned_purchase 欄位: {list(planned_purchase_df.columns)}")
+            logger.info(f"Planned_purchase 前3筆 PO No.: {planned_purchase_df.iloc[:3]['PO No.'].tolist() if 'PO No.' in planned_purchase_df.columns else '找不到PO No.欄位'}")
+        
+        result = {}
+        
+        for po_no in po_numbers:
+            logger.info(f"開始處理 PO: {po_no}")
+            
+            # 查詢需求者和 ePR No.
+            user = query_user_by_po_no(po_no)
+            epr_no = query_epr_no_by_po_no(po_no)
+            
+            result[str(po_no)] = {
+                'user': user if user else '查無此資訊',
+                'eprNo': epr_no if epr_no else '查無此資訊'
+            }
+            
+            logger.info(f"PO {po_no} 最終結果: User={result[str(po_no)]['user']}, ePR={result[str(po_no)]['eprNo']}")
+        
+        logger.info(f"回傳完整結果: {result}")
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"查詢User和ePR資料時發生錯誤: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,344 @@
+"""
+通知 / 驗收郵件
+"""
+import traceback
+import logging
+
+from flask import Blueprint, jsonify, request
+
+from utils.table_store import read_table, write_table
+from utils.mail_outbox import mail_outbox
+from utils.employee_directory import employee_directory
+from MailFunction.render import render_batch
+from routes.common import CSV_FILE
+
+logger = logging.getLogger(__name__)
+mail_bp = Blueprint("mail", __name__)
+
+
+@mail_bp.route('/api/sendmail', methods=['POST']) 
+def sendmail():
+    try:
+        data = request.get_json()
+
+        mail_data = data.get("data", {})
+        recipient_clean = mail_data.get("需求者", "").strip()  
+        mail_name = employee_directory().notes_id(recipient_clean)
+
+        raw_cc = data.get("cc", "")  
+
+        cc_names = [name.strip() for name in raw_cc.split(",") if name.strip()]
+
+        cc_list = [name.replace(" ", "_") + "@aseglobal.com" for name in cc_names]
+
+        cc_string = ",".join(cc_list)
+
+        # 只組信並排入佇列,由背景執行緒寄送,不等待 SMTP
+        if data["data"]["請購順序"] == "1":
+            kind = "urgent"
+            from MailFunction.urgent import build_mail
+        else:
+            kind = "normal"
+            from MailFunction.normail import build_mail
+
+        try:
+            print(data["data"], '\n', data["recipient"], '\n', mail_name, '\n', cc_string)
+            mail = build_mail(data["data"], data["recipient"], mail_name, cc_string)
+            mail_id = mail_outbox.enqueue(mail, kind)
+        except Exception as mail_error:
+            print(f"❌ {'超急件' if kind == 'urgent' else '一般'}郵件建立錯誤: {str(mail_error)}")
+
+            print("完整錯誤追蹤:")
+            traceback.print_exc()
+            raise mail_error
+
+        print("準備返回成功響應")
+        return jsonify({"success": True, "message": "郵件已排入寄送佇列", "mail_id": mail_id}), 200
+        
+    except Exception as e:
+        print(f"❌ 主函數錯誤: {str(e)}")
+
+        print("完整錯誤追蹤:")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+    
+@mail_bp.route('/update_for_mail', methods=['POST'])
+def update_for_mail():
+    # 備份
+    # backup_files()
+    new_data = request.json
+    print("收到的資料:", new_data)
+    
+    if new_data is None:
+        return jsonify({"message": "沒有收到資料"}), 400
+    
+    try:
+        df = read_table(CSV_FILE)
+        df.fillna("", inplace=True)
+
+        # 找到對應列
+        df["Id"] = df["Id"].astype(str).str.strip()
+        target_id = str(new_data['Id']).strip()
+        
+        print(f"尋找 Id: {target_id}")
+        
+        # 找到符合條件的列
+        mask = df["Id"] == target_id
+        
+        if not mask.any():
+            print(f"找不到 Id 為 {target_id} 的資料")
+            return jsonify({"message": "找不到對應的資料"}), 404
+        
+        print(f"找到對應資料，開始更新...")
+        
+        # 更新資料
+        for key, value in new_data.items():
+            if key in df.columns:
+                df.loc[mask, key] = str(value) if value is not None else ""
+                print(f"更新 {key}: {value}")
+        
+        # 儲存到 CSV
+        write_table(df, CSV_FILE)
+        print("資料已儲存")
+        
+        return jsonify({"message": "更新成功"}), 200
+
+    except Exception as e:
+        print("錯誤：", e)
+        
+        traceback.print_exc()
+        return jsonify({"message": "資料更新失敗"}), 500
+
+
+def get_notes_email(user_name, backend_file="Backend_data.json"):
+    """用姓名查 Notes_ID (完整信箱)"""
+    entry = employee_directory(backend_file).find_by_name(user_name)
+    if entry is None:
+        return None
+    first_supervisor = entry.get("第一階主管", "").strip()
+    if first_supervisor == "G9745 LC Wang 王利哲":
+        return entry.get("Notes_ID", "")
+    else:
+        # 強制改成 Otis_Wang
+        return "Otis_Wang@aseglobal.com"
+
+
+def get_notes_prefix(user_name, backend_file="Backend_data.json"):
+    entry = employee_directory(backend_file).find_by_name(user_name)
+    if entry is None:
+        return None
+    notes_id = entry.get("Notes_ID", "")
+    if "@" in notes_id:
+        prefix = notes_id.split("@")[0]  # 取 @ 前
+        if "_" in prefix:
+            return prefix.split("_")[0]   # 再取 _ 前
+        return prefix
+    return notes_id  # 如果沒有 @，就直接回傳
+
+
+def build_greeting(mail_data, backend_file="Backend_data.json"):
+    """建立問候語,從 mail_data 中提取使用者並轉換成英文名"""
+    # 從 mail_data 中提取所有 user
+    users = [item.get("user") for item in mail_data if item.get("user")]
+    
+    # 去重並過濾空值和無效值
+    unique_users = list(dict.fromkeys([u for u in users if u and u not in ["查無此資訊", "-", ""]]))
+    
+    logger.info(f"提取到的使用者: {unique_users}")
+    
+    if not unique_users:
+        return "Dear all"
+    
+    # 獲取每個使用者的英文名
+    english_names = []
+    for user in unique_users:
+        english_name = get_notes_prefix(user, backend_file)
+        if english_name:
+            english_names.append(english_name)
+            logger.info(f"使用者 {user} -> 英文名: {english_name}")
+        else:
+            logger.warning(f"找不到使用者 {user} 的英文名")
+    
+    # 如果沒有找到任何英文名,使用 Dear all
+    if not english_names:
+        logger.warning("沒有找到任何英文名,使用 Dear all")
+        return "Dear all"
+    
+    # 組合成 "Dear Name1, Name2, Name3"
+    if len(english_names) == 1:
+        greeting = f"Dear {english_names[0]}"
+    else:
+        greeting = f"Dear {', '.join(english_names)}"
+    
+    logger.info(f"生成的問候語: {greeting}")
+    return greeting
+
+
+def build_acceptance_notice(mail_data):
+    """由勾選的驗收資料決定收件者、To 字串與問候語,回傳 render_acceptance 的參數"""
+    # 取得 PO No. 字串
+    po_numbers = list({item.get('poNo', '-') for item in mail_data if item.get('poNo')})
+    po_str = "、".join(po_numbers)
+
+    # 取得 user prefix for To 字串
+    user_names = {item.get('user') for item in mail_data if item.get('user')}
+    to_prefixes = []
+    for name in user_names:
+        prefix = get_notes_prefix(name, "Backend_data.json")
+        if prefix:
+            to_prefixes.append(prefix)
+    to_str = ", ".join(to_prefixes)
+
+    users = [item.get("user") for item in mail_data if item.get("user")]
+    unique_users = list(dict.fromkeys([u for u in users if u]))
+    notes_emails = []
+    for user in unique_users:
+        email = get_notes_email(user, "Backend_data.json")
+        if email:
+            notes_emails.append(email)
+
+    # 組合成逗號分隔的字串
+    mail_name = ",".join(notes_emails)
+
+    # ✨ 生成問候語
+    greeting = build_greeting(mail_data, "Backend_data.json")
+
+    logger.info(f"PO: {po_str}\nTO: {mail_name}\nTO 字串: {to_str}\nGreeting: {greeting}")
+
+    return {
+        "mailList": mail_data,
+        "mail_name": mail_name,
+        "ccList": "",  # 保持淨空
+        "to_str": to_str,
+        "greeting": greeting,
+    }
+
+
+@mail_bp.route('/api/save-mail', methods=['POST', 'OPTIONS'])
+def save_mail():
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        data = request.get_json()
+        # print(f"收到郵件修改資料: {json.dumps(data, indent=2, ensure_ascii=False)}")
+        
+        # 提取郵件資料
+        mail_data = data.get('data', [])
+        
+        if not mail_data:
+            return jsonify({
+                'status': 'error',
+                'message': '沒有要發送的資料'
+            }), 400
+        
+        logger.info(f"準備發送郵件,共 {len(mail_data)} 筆資料")
+        
+        # 調用 mail.py 發送郵件
+        try:
+            notice = build_acceptance_notice(mail_data)
+            greeting = notice["greeting"]
+
+            # 組信後排入寄送佇列
+            [(kind, mail)] = render_batch([("acceptance", notice)])
+            mail_id = mail_outbox.enqueue(mail, kind)
+            
+            logger.info(f"✅ 郵件已排入寄送佇列 #{mail_id},處理了 {len(mail_data)} 筆資料")
+            
+            return jsonify({
+                "status": "success",
+                "message": f"郵件已排入寄送佇列,已處理 {len(mail_data)} 筆資料",
+                "timestamp": data.get('timestamp'),
+                "saved_items_count": len(mail_data),
+                "mail_sent": True,
+                "mail_id": mail_id,
+                "greeting": greeting
+            })
+            
+        except Exception as mail_error:
+            logger.error(f"❌ 郵件發送失敗: {str(mail_error)}")
+            logger.error(traceback.format_exc())
+            
+            # 即使郵件發送失敗,也回傳部分成功的狀態
+            return jsonify({
+                "status": "partial_success",
+                "message": f"資料已保存但郵件發送失敗: {str(mail_error)}",
+                "timestamp": data.get('timestamp'),
+                "saved_items_count": len(mail_data),
+                "mail_sent": False,
+                "error_detail": str(mail_error)
+            }), 200  # 用200而非500,因為資料處理成功了
+        
+    except Exception as e:
+        logger.error(f"處理請求失敗: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': f'處理失敗: {str(e)}'
+        }), 500
+
+
+@mail_bp.route('/api/save-mail-batch', methods=['POST'])
+def save_mail_batch():
+    """
+    一次送出多封驗收通知 (每組資料一封信)
+    body: {"groups": [[item, ...], [item, ...]]},item 格式與 /api/save-mail 的 data 相同
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        groups = [group for group in data.get('groups', []) if group]
+
+        if not groups:
+            return jsonify({
+                'status': 'error',
+                'message': '沒有要發送的資料'
+            }), 400
+
+        # 共用版型與收件者對照,一次組完全部郵件後排入佇列
+        notices = [("acceptance", build_acceptance_notice(group)) for group in groups]
+        mail_ids = [mail_outbox.enqueue(mail, kind) for kind, mail in render_batch(notices)]
+
+        logger.info(f"✅ {len(mail_ids)} 封驗收通知已排入寄送佇列")
+
+        return jsonify({
+            'status': 'success',
+            'message': f'{len(mail_ids)} 封郵件已排入寄送佇列',
+            'mail_ids': mail_ids,
+            'greetings': [notice['greeting'] for _, notice in notices]
+        })
+
+    except Exception as e:
+        logger.error(f"批次寄送驗收通知失敗: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': f'處理失敗: {str(e)}'
+        }), 500
+
+
+@mail_bp.route('/api/mail-outbox', methods=['GET'])
+def get_mail_outbox():
+    """郵件佇列狀態（各狀態數量與最近的信件）"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({'status': 'success', **mail_outbox.summary(limit)})
+    except Exception as e:
+        logger.info(f"取得郵件佇列狀態失敗: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@mail_bp.route('/api/mail-outbox/<int:mail_id>', methods=['GET'])
+def get_mail_status(mail_id):
+    """單封郵件的寄送狀態（queued / sending / sent / failed）"""
+    try:
+        mail = mail_outbox.status(mail_id)
+        if mail is None:
+            return jsonify({'status': 'error', 'message': f'找不到郵件 #{mail_id}'}), 404
+        return jsonify({'status': 'success', 'mail': mail})
+    except Exception as e:
+        logger.info(f"取得郵件狀態失敗: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -0,0 +1,836 @@
+"""
+請購主表: /data、新增 / 修改 / 刪除、狀態上傳、報告附件、廠商
+"""
+import os
+import re
+import json
+import uuid
+import traceback
+import logging
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, send_file
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store, read_table, write_table
+from utils.employee_directory import employee_directory
+from utils.response_cache import response_cache
+from utils.purchase_view import spec_from_args, DEFAULT_LIMIT as DEFAULT_PAGE_LIMIT
+from utils.table_export import write_xlsx, stream_file, remove_file, XLSX_MIMETYPE
+from routes.common import (
+    CSV_FILE, BUYER_FILE, FILTERS_DIR, VENDER_FILE_PATH, REPORT_SHARE_ROOT,
+    purchase_view, attachment_store, buyer_file_lock,
+    clean_value, update_verification_status_and_po_numbers,
+)
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+purchase_bp = Blueprint("purchase", __name__)
+
+
+def data_sources():
+    """/data 的來源檔案 (帶 ?user= 時包含該使用者的篩選狀態檔)"""
+    paths = [CSV_FILE]
+    username = request.args.get("user", "").strip()
+    if username:
+        paths.append(os.path.join(FILTERS_DIR, f'{username}_filters.json'))
+    return paths
+
+
+def request_spec():
+    """篩選條件: ?user= 儲存的篩選狀態 → POST 的 JSON → 查詢參數 (後面的覆蓋前面的)"""
+    spec = {}
+    username = request.args.get("user", "").strip()
+    if username:
+        filename = os.path.join(FILTERS_DIR, f'{username}_filters.json')
+        if os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                spec.update(json.load(f))
+    if request.method == "POST":
+        spec.update(request.get_json(silent=True) or {})
+    spec.update(spec_from_args(request.args))
+    return spec
+
+
+@purchase_bp.route("/data", methods=["GET", "POST"])
+@response_cache.etag(data_sources)
+def get_data():
+    """
+    沒有參數時回傳全部資料 (與原本相同)
+    帶 page / limit / 篩選參數,或 POST 篩選狀態 JSON 時,只回傳目前頁面:
+        /data?page=1&limit=100&people=王小明&state=V&month_from=202501&month_to=202506&q=馬達&sort=總金額&order=desc
+        /data?user=K18251&page=2     (套用該使用者儲存的篩選狀態)
+        /data?page=1&limit=100&facets=1    (另外回傳下拉選單選項與件數 / 金額統計,請購清單頁面使用)
+    """
+    if request.method == "GET" and not request.args:
+        return jsonify(purchase_view.records())
+
+    spec = request_spec()
+    try:
+        page = int(request.args.get("page", spec.get("page", 1)))
+        limit = int(request.args.get("limit", spec.get("limit", DEFAULT_PAGE_LIMIT)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "page / limit 必須是數字"}), 400
+
+    facets = request.args.get("facets", "").lower() in ("1", "true", "yes")
+    return jsonify(purchase_view.query(spec, page=page, limit=limit, facets=facets))
+
+
+def purchase_export_rows(spec):
+    """篩選 / 排序後的請購清單 (欄位與 /data 相同)"""
+    columns = purchase_view.column_names()
+    records, positions = purchase_view.select(spec)
+    rows = ([records[p].get(col, "") for col in columns] for p in positions)
+    return columns, rows
+
+
+def buyer_export_rows(spec):
+    """篩選後請購單的 Buyer 明細 (沒有篩選條件時全部匯出),依檔案原本順序"""
+    df = table_store.read(BUYER_FILE, copy=False)
+    if spec:
+        records, positions = purchase_view.select(spec)
+        ids = {str(records[p]["Id"]) for p in positions}
+        keep = df["Id"].astype(str).str.strip().isin(ids).to_numpy()
+    else:
+        keep = None
+    rows = (
+        row for i, row in enumerate(df.itertuples(index=False, name=None))
+        if keep is None or keep[i]
+    )
+    return list(df.columns), rows
+
+
+EXPORT_TABLES = {
+    "purchase": ("請購清單", purchase_export_rows),
+    "buyer": ("Buyer_detail", buyer_export_rows),
+}
+
+
+@purchase_bp.route("/api/export/<table>.xlsx", methods=["GET", "POST"])
+def export_xlsx(table):
+    """
+    匯出 Excel,篩選條件與 /data 相同 (?user= / POST 篩選狀態 / 查詢參數):
+        /api/export/purchase.xlsx?user=K18251
+        /api/export/buyer.xlsx?people=王小明&month_from=202501     (篩選後請購單的 Buyer 明細)
+    檔案在伺服器端逐列寫入暫存檔後分段回傳,記憶體用量不隨筆數增加
+    """
+    if table not in EXPORT_TABLES:
+        return jsonify({"error": f"不支援的資料表: {table}"}), 404
+    title, export_rows = EXPORT_TABLES[table]
+
+    try:
+        columns, rows = export_rows(request_spec())
+        path, count = write_xlsx(columns, rows, sheet_title=title)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": f"匯出失敗: {e}"}), 500
+
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    response = Response(stream_file(path), mimetype=XLSX_MIMETYPE)
+    response.headers["Content-Length"] = str(os.path.getsize(path))
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["X-Export-Rows"] = str(count)
+    response.call_on_close(lambda: remove_file(path))
+    return response
+
+
+@purchase_bp.route("/api/changes")
+def get_changes():
+    """
+    請購清單增量同步: /api/changes?since=<版本號>
+    回傳 since 之後新增 / 修改 (upserts,格式與 /data 相同) 與刪除 (deletes) 的資料列;
+    reset 為 true 時 (沒有帶 since、journal 已輪替或期間整份重寫) 請重新讀取 /data
+    """
+    since = request.args.get("since", "").strip()
+    if not since:
+        return jsonify({"version": table_store.version(CSV_FILE), "reset": True, "upserts": [], "deletes": []})
+    try:
+        since = int(since)
+    except ValueError:
+        return jsonify({"error": "since 必須是數字"}), 400
+
+    version, entries = table_store.changes(CSV_FILE, since)
+    if entries is None:
+        return jsonify({"version": version, "since": since, "reset": True, "upserts": [], "deletes": []})
+
+    # 同一個 Id 只看最後一次異動
+    last_op = {}
+    for entry in entries:
+        row_id = str(entry.get("id", ""))
+        if row_id:
+            last_op.pop(row_id, None)
+            last_op[row_id] = entry["op"]
+
+    upserts, gone = purchase_view.rows_by_id([i for i, op in last_op.items() if op != "delete"])
+    deletes = [i for i, op in last_op.items() if op == "delete"] + gone
+    return jsonify({
+        "version": version,
+        "since": since,
+        "reset": False,
+        "upserts": upserts,
+        "deletes": deletes,
+    })
+
+
+@purchase_bp.route('/api/unordered-count')
+def get_unordered_count():
+    
+    if not os.path.exists(CSV_FILE) or os.path.getsize(CSV_FILE) == 0:
+        return jsonify({
+            "count_X": 0,
+            "count_V": 0,
+            "monthly_expenses": {}
+        })
+
+    try:
+        df = read_table(CSV_FILE)
+        df = df.fillna("")
+
+        count_X = df[df["開單狀態"] != "V"].shape[0]
+        count_V = df[df["開單狀態"] == "V"].shape[0]
+
+        df_unordered = df[df["開單狀態"] != "V"].copy()
+
+        # ✅ 加這一行，過濾掉非法的需求日
+        df_unordered["需求日"] = df_unordered["需求日"].astype(str).str.replace("/", "", regex=False)
+        df_unordered = df_unordered[df_unordered["需求日"].str.match(r'^\d{8}$')].copy()
+
+        df_unordered["總金額"] = pd.to_numeric(df_unordered["總金額"], errors="coerce").fillna(0)
+        df_unordered["需求日"] = df_unordered["需求日"].astype(str)
+        df_unordered["月份"] = df_unordered["需求日"].str.slice(0, 6)
+
+        monthly_sums = df_unordered.groupby("月份")["總金額"].sum().sort_index()
+        monthly_expenses = {month: int(round(amount, 2)) for month, amount in monthly_sums.items()}
+
+        print(monthly_expenses)
+
+        return jsonify({
+            "count_X": count_X,
+            "count_V": count_V,
+            "monthly_expenses": monthly_expenses
+        })
+
+    except Exception as e:
+        traceback.print_exc()  
+        return jsonify({
+            "count_X": 0,
+            "count_V": 0,
+            "monthly_expenses": {},
+            "error": str(e)
+        }), 500
+
+
+@purchase_bp.route('/api/requesters', methods=['GET'])
+@response_cache.etag(["config.cfg"])
+def get_requesters():
+    try:
+        with open("config.cfg", "r", encoding="utf-8-sig") as f:
+            lines = f.readlines()
+            names = [line.strip() for line in lines if line.strip()]  
+            # print("requesters: ", names)
+            return jsonify(names)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+
+@purchase_bp.route('/api/admins', methods=['GET'])
+@response_cache.etag(lambda: [employee_directory().path])
+def get_admins():
+    try:
+        names = employee_directory().admin_ids("請購網頁後台")
+        # print("admins: ", names)
+        return jsonify(names)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+
+@purchase_bp.route("/api/add", methods = ['POST'])
+def add_new_item():
+    try:
+        # 備份
+        # backup_files()
+        data = request.get_json()
+        main_data = {k: v for k, v in data.items() if k != 'tableRows'}
+        table_rows = data.get('tableRows', [])
+
+        print("主資料：", main_data)
+        
+        if not data:
+            return jsonify({'status': 'error', 'message': '無效的 JSON 請求'}), 400
+
+        df = read_table(CSV_FILE)
+
+        # 確保所有欄位一致
+        # new_row = {col: data.get(col, "") for col in df.columns}
+
+        new_row = {col: clean_value(main_data.get(col, "")) for col in df.columns}
+
+        if isinstance(new_row["需求日"], str) and "/" in new_row["需求日"]:
+            new_row['需求日'] = new_row["需求日"].replace("/", "")
+
+        if isinstance(new_row["已開單日期"], str) and "/" in new_row["已開單日期"]:
+            new_row['已開單日期'] = new_row["已開單日期"].replace("/", "")
+
+        def safe_float_to_int64(value):
+            try:
+                return str(int(float(value)))
+            except (ValueError, TypeError, OverflowError):
+                return ""
+
+        # ✨ 要轉換的欄位（避免 int32 溢位）
+        numeric_fields = ["請購順序", "總金額", "需求日", "已開單日期", "ePR No."]
+        for field in numeric_fields:
+            if field in new_row:
+                new_row[field] = safe_float_to_int64(new_row[field])
+
+        new_row["Id"] = str(uuid.uuid4())  # 自動產生唯一 ID
+
+        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        print(new_row)
+        # 儲存回 CSV
+        write_table(df, CSV_FILE)
+
+        # 寫入另一張表
+        print("表格列：", table_rows)
+        DETAIL_CSV_FILE = "static/data/Buyer_detail.csv"  # 建議存另一份 CSV 檔
+
+        detail_columns = [
+            "Id", "開單狀態", "交貨驗證", "User", "ePR No.", "PO No.",
+            "Item", "品項", "規格", "數量", "總數", "單價", "總價", "備註", "字數",
+            "isEditing", "backup", "_alertedItemLimit", "Delivery Date 廠商承諾交期",
+            "SOD Qty 廠商承諾數量", "驗收數量", "拒收數量", "發票月份", "WBS", "需求日", "RT金額", "RT總金額","驗收狀態"
+        ]
+
+        # 處理後的資料列（每筆 row 補上主資料 ID，欄位順序統一）
+        cleaned_rows = []
+        for row in table_rows:
+            cleaned_row = {"Id": new_row["Id"]}  # 主表 Id
+            for col in detail_columns[1:-2]:  # 不含 isEditing, backup，這兩個手動補
+                cleaned_row[col] = row.get(col, "")
+            cleaned_row["isEditing"] = "False"
+            cleaned_row["backup"] = "{}"
+            cleaned_rows.append(cleaned_row)
+            
+        # 如果檔案已存在就 append，否則建立新檔
+        if os.path.exists(DETAIL_CSV_FILE):
+            df_detail = read_table(DETAIL_CSV_FILE)
+            df_detail = pd.concat([df_detail, pd.DataFrame(cleaned_rows)], ignore_index=True)
+        else:
+            df_detail = pd.DataFrame(cleaned_rows, columns=detail_columns)
+
+        # 寫入 CSV
+        write_table(df_detail, DETAIL_CSV_FILE, columns=detail_columns)
+        update_verification_status_and_po_numbers()
+
+        return jsonify({'status': 'success', 'message': '資料新增成功'}), 200
+
+    except Exception as e:
+        print("新增錯誤：", e)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+
+
+
+@purchase_bp.route('/update', methods=['POST'])
+def update_data():
+    # 備份
+    # backup_files()
+    new_data = request.json
+    if not isinstance(new_data, dict):
+        return jsonify({"message": "請求內容不是有效的 JSON"}), 400
+    print(new_data)
+    main_data = {k: v for k, v in new_data.items() if k != "tableRows"} # type: ignore
+    detail_data = new_data.get("tableRows", []) # type: ignore
+    
+    if main_data is None:
+        return jsonify({"message": "請求內容不是有效的 JSON"}), 400
+    
+    target_id = str(main_data.get("Id", "")).strip()
+    if not target_id:
+        return jsonify({"message": "缺少 Id"}), 400
+    
+    try:
+        df = read_table(CSV_FILE)
+        df.fillna("", inplace=True)
+
+        # 找到對應列
+        df["Id"] = df["Id"].astype(str).str.strip()
+        match_idx = df.index[df["Id"] == target_id].tolist()
+        if not match_idx:
+            return jsonify({"message": "找不到對應資料"}), 404
+        idx = match_idx[0]
+
+        # 處理日期欄位格式
+        if isinstance(new_data.get("需求日"), str):
+            main_data["需求日"] = main_data["需求日"].replace("/", "")
+        if isinstance(new_data.get("已開單日期"), str):
+            main_data["已開單日期"] = main_data["已開單日期"].replace("/", "")
+
+        # 更新欄位
+        for col in df.columns:
+            df.at[idx, col] = str(main_data.get(col, ""))
+
+            # 清洗資料（包含去除 .0 與斜線）
+        for col in df.columns:
+            val = main_data.get(col, "")
+            val = clean_value(val)
+            if col in ["需求日", "已開單日期"] and isinstance(val, str):
+                val = val.replace("/", "")
+            df.at[idx, col] = val
+
+        # 若 ePR No. 存在 → 補連結欄位
+        if main_data.get('ePR No.'):
+            df.at[idx, "進度追蹤超連結"] = f"https://khwfap.kh.asegroup.com/ePR/PRQuery/QueryPR?id={main_data['ePR No.']}"
+
+
+        write_table(df, CSV_FILE)
+       
+    
+        detail_file = "static/data/Buyer_detail.csv"
+        if os.path.exists(detail_file):
+            df_detail = read_table(detail_file)
+            df_detail = df_detail[df_detail["Id"] != target_id]
+        else:
+            df_detail = pd.DataFrame()
+
+        # 加入新的細項資料
+        if detail_data:
+            new_rows = pd.DataFrame(detail_data)
+            new_rows["Id"] = target_id  # 加入對應主表 Id
+            df_detail = pd.concat([df_detail, new_rows], ignore_index=True)
+
+        # 儲存
+        write_table(df_detail, detail_file)
+        update_verification_status_and_po_numbers()
+        
+        return jsonify({"message": "更新成功"}), 200
+
+    except Exception as e:
+        print("錯誤：", e)
+        return jsonify({"message": "資料更新失敗"}), 500
+    
+    
+@purchase_bp.route('/api/checkeEPRno', methods=['POST'])
+def check_epr_no():
+    try:
+        epr_no = request.get_json()
+        if not isinstance(epr_no, str):
+            return jsonify({'error': 'Invalid ePR No. format'}), 400
+
+        df = read_table(CSV_FILE)  # 讀取所有欄位為字串避免轉型問題
+        exists = epr_no in df['ePR No.'].dropna().tolist()
+
+        return jsonify({'exists': exists})
+    except Exception as e:
+        print(f"❌ 錯誤: {e}")
+        return jsonify({'error': '檢查失敗'}), 500
+
+
+@purchase_bp.route('/api/check-edit-permission', methods=['POST'])
+def check_edit_permission():
+    try:
+        data = request.get_json()
+        current_user = data.get("currentUser", "").strip()
+        target_id = data.get("id", "").strip()
+
+        if not current_user or not target_id:
+            return jsonify({"allowed": False, "error": "缺少必要參數"}), 400
+        
+        # 讀取 admin 工號列表
+        admin_ids = employee_directory().admin_ids("請購網頁後台")
+
+        is_admin = current_user in admin_ids
+
+        # 查詢該 ID 對應的需求者
+        df = read_table(CSV_FILE)
+        df.fillna("", inplace=True)
+        df["Id"] = df["Id"].astype(str).str.strip()
+
+        matched_row = df[df["Id"] == target_id]
+        if matched_row.empty:
+            return jsonify({"allowed": False, "error": "找不到對應資料"}), 404
+
+        row = matched_row.iloc[0]
+        requester = row.get("需求者", "").strip()
+
+        requester_entry = employee_directory().find_by_name(requester)
+        requester_id = requester_entry.get("工號", "").strip() if requester_entry else ""
+
+        print(f"使用者: {current_user}, 工號: {requester_id}, 是否為 admin: ", is_admin)
+
+        if requester_id == current_user:
+            return jsonify({"allowed": True})
+
+        return jsonify({"allowed": is_admin})
+
+    except Exception as e:
+        print("權限檢查失敗：", e)
+        return jsonify({"allowed": False, "error": str(e)}), 500
+
+
+
+
+@purchase_bp.route("/api/get_detail/<id>", methods=["GET"])
+def get_detail_by_id(id):
+    try:
+        detail_file = "static/data/Buyer_detail.csv"
+        if not os.path.exists(detail_file):
+            return jsonify([])  # 沒有資料回傳空陣列
+
+        df = read_table(detail_file)
+        df.fillna("", inplace=True)
+
+        # 篩選出指定 Id 的細項資料
+        detail_rows = df[df["Id"] == id].to_dict(orient="records")
+        return jsonify(detail_rows)
+    
+    except Exception as e:
+        print("讀取細項資料錯誤：", e)
+        return jsonify({"error": str(e)}), 500
+
+
+
+@purchase_bp.route("/getItemName", methods=["POST"])
+def get_item_name():
+    try:
+        data = request.get_json()
+        user_id = data.get("username")
+        user_name = data.get("NeedPerson")
+        print(user_id, user_name)
+
+        item = employee_directory().find_by_id(user_id)
+        if item:
+            return jsonify({"name": item.get("姓名", "")})
+            
+        return jsonify({"error": "Item not found"}), 404
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@purchase_bp.route('/delete', methods=['POST'])
+def delete_entry():
+    # 備份
+    # backup_files()
+    data = request.json
+    if data is None:
+        return jsonify({"message": "請求內容不是有效的 JSON"}), 400
+    
+    target_id = str(data.get("Id", "")).strip()
+    if not target_id:
+        return jsonify({"status": "error", "message": "缺少 Id 欄位"}), 400
+
+    df = read_table(CSV_FILE)
+    # 取消 eprno的欄位
+
+    new_df = df[df['Id'] != target_id]
+
+    if len(new_df) == len(df):
+        return jsonify({"status": "error", "message": "找不到符合條件的資料"})
+
+    write_table(new_df, CSV_FILE)
+
+    detail_file = "static/data/Buyer_detail.csv" 
+    if os.path.exists(detail_file):
+        df_detail = read_table(detail_file)
+        df_detail = df_detail[df_detail["Id"] != target_id]
+        write_table(df_detail, detail_file)
+        update_verification_status_and_po_numbers()
+
+    return jsonify({"status": "success", "message": "已成功刪除"})
+
+# 預計請購 更新目前狀態
+@purchase_bp.route("/api/Status-upload", methods=["POST"])
+def upload():
+    # 備份
+    # backup_files()
+    if 'file' not in request.files:
+        return jsonify({'status': 'fail', 'msg': 'No file uploaded'}), 400
+
+    file = request.files['file']
+    filename = file.filename
+    if filename != "download.csv":
+        return jsonify({'status': 'Fail', 'filename': filename}), 400
+    filename = f"status_{uuid.uuid4().hex}.csv"
+    filepath = os.path.join('uploads', str(filename))
+    file.save(filepath)
+
+    lock = table_store.lock(CSV_FILE)
+
+    def clean_nan_value(val):
+        if pd.isna(val) or str(val).strip().lower() in ['nan', 'none']:
+            return ""
+        return str(val).strip()
+    
+    with lock:
+        try:
+
+            df = pd.read_csv(filepath)
+            print(df)
+            updates = []
+            for _, row in df.iterrows():
+                epr_no = str(row.get('E-PR號碼           ', '')).strip()
+                status = clean_nan_value(row.get('狀態', ''))
+                stage = clean_nan_value(row.get('簽核中關卡', ''))
+
+                if epr_no and epr_no != 'nan':
+                    updates.append({
+                        'epr_no': epr_no,
+                        '狀態': status,
+                        '簽核中關卡': stage
+                    })
+                    
+            Planned_Purchase_Request_List_df = read_table(CSV_FILE)
+            updated_count = 0
+            no_change_count = 0
+
+            # non_null_count = Planned_Purchase_Request_List_df['ePR No.'].notna().sum()
+
+
+            for update in updates:
+                epr = update['epr_no']
+                new_status = update['狀態']
+                new_stage = update['簽核中關卡']
+            
+                epr_column = Planned_Purchase_Request_List_df['ePR No.'].fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+                match = epr_column == str(int(epr))
+                if match.any():
+                    idx = Planned_Purchase_Request_List_df[match].index[0]
+                    
+                    # 取得目前值
+                    old_status = clean_nan_value(Planned_Purchase_Request_List_df.at[idx, 'Status'])
+                    old_stage = clean_nan_value(Planned_Purchase_Request_List_df.at[idx, '簽核中關卡'])
+                    
+                    # 只有在真的有變更時才更新
+                    if old_status != new_status or old_stage != new_stage:
+                        Planned_Purchase_Request_List_df.at[idx, 'Status'] = new_status
+                        Planned_Purchase_Request_List_df.at[idx, '簽核中關卡'] = new_stage
+                        updated_count += 1
+                    else:
+                        no_change_count += 1
+
+                    
+            def safe_float_to_int64(val):
+                try:
+                    if pd.isna(val):
+                        return ""
+                    return str(int(float(val)))
+                except:
+                    return str(val).strip()
+                
+            numeric_fields = ["請購順序", "總金額", "需求日", "已開單日期", "ePR No."]
+            for field in numeric_fields:
+                if field in Planned_Purchase_Request_List_df.columns:
+                    Planned_Purchase_Request_List_df[field] = Planned_Purchase_Request_List_df[field].apply(safe_float_to_int64)
+
+            # 清理所有欄位
+            for col in Planned_Purchase_Request_List_df.columns:
+                Planned_Purchase_Request_List_df[col] = Planned_Purchase_Request_List_df[col].apply(clean_nan_value)
+
+            write_table(Planned_Purchase_Request_List_df, CSV_FILE, na_rep="")
+        except Exception as e:
+            print("Exception: ", e)
+
+
+    # 這段只改 Buyer_detail.csv,使用它自己的鎖 (update_verification_status_and_po_numbers 也是先鎖 Buyer_detail)
+    with buyer_file_lock:
+        try:
+            df_update = pd.read_csv(filepath, dtype=str)
+
+            # 提取更新資料
+            po_updates = []
+            for _, row in df_update.iterrows():
+                epr_no = str(row.get('E-PR號碼           ', '')).strip()
+                sap_po  = str(row.get('SAP PO', '')).strip() 
+                if epr_no and sap_po:
+                    po_updates.append({
+                        'epr_no': epr_no,
+                        'po_no': sap_po
+                    })
+            df_detail = read_table(BUYER_FILE)
+
+            if "PO No." not in df_detail.columns:
+                df_detail["PO No."] = ""
+
+
+            updated = 0
+            nochange = 0
+
+            for upd in po_updates:
+                epr = upd['epr_no']
+                new_po = upd['po_no']
+
+                # ePR No. 轉成 int → str 避免格式不同
+                try:
+                    epr_str = str(int(float(epr)))
+                except:
+                    epr_str = str(epr).strip()
+
+                match_idx = df_detail.index[df_detail['ePR No.'] == epr_str].tolist()
+
+                if match_idx:
+                    for idx in match_idx:
+                        old_po = str(df_detail.at[idx, 'PO No.']).strip()
+
+                        if old_po != new_po:
+                            df_detail.at[idx, 'PO No.'] = new_po
+                            updated += 1
+                        else:
+                            nochange += 1
+
+            # 寫回 Buyer_detail.csv
+            write_table(df_detail, BUYER_FILE)
+            update_verification_status_and_po_numbers()
+            # os.remove(filepath)
+            return jsonify({'status': 'success', 'updated_count': updated_count})
+
+        except Exception as e:
+            return jsonify({'status': 'Fail', 'reason': e})
+
+
+def save_attachment(file, save_path, username):
+    result = attachment_store.save(
+        file.stream, file.filename, target_dir=save_path,
+        uploaded_by=username, content_type=file.mimetype or ''
+    )
+    return jsonify(
+        success=True,
+        message='已上傳 (相同檔案已存在)' if result['deduped'] else '已上傳',
+        sha256=result['sha256'],
+        deduped=result['deduped'],
+        url=f"/api/attachments/{result['sha256']}"
+    )
+
+
+@purchase_bp.route('/api/attachments/<sha256>', methods=['GET'])
+def get_attachment(sha256):
+    """依內容 hash 下載附件 (支援 Range / If-None-Match),內容與 hash 不符時不回傳"""
+    if not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return jsonify({'error': '無效的附件代碼'}), 400
+    info = attachment_store.info(sha256)
+    try:
+        blob = attachment_store.verified_blob(sha256)
+    except ValueError:
+        return jsonify({'error': '附件內容已被修改,請重新上傳'}), 409
+    if not info or blob is None:
+        return jsonify({'error': '找不到附件'}), 404
+    return send_file(
+        blob,
+        mimetype=info.get('content_type') or None,
+        download_name=info.get('filename') or sha256,
+        conditional=True,
+        etag=sha256,
+        max_age=86400,
+    )
+
+
+# 路徑(報告路徑)
+@purchase_bp.route('/upload_report', methods=['POST'])
+def upload_report():
+    file = request.files.get('file')
+    folder = request.form.get('folder')
+    username = request.form.get('work_username')
+
+    if not file:
+        return jsonify(success=False, message='無檔案')
+    if not folder:
+        return jsonify(success=False, message='資料夾名稱為空')
+    if not username:
+        return jsonify(success=False, message='缺少 username')
+
+    filename = file.filename or ''
+    if filename == '':
+        return jsonify(success=False, message='檔案名稱為空')
+
+    try:
+        save_path = os.path.join(
+            REPORT_SHARE_ROOT,
+            username,
+            folder
+        )
+        return save_attachment(file, save_path, username)
+    except Exception as e:
+        print('❌ 儲存錯誤：', e)
+        return jsonify(success=False, message=str(e))
+
+
+
+# 路徑(報告路徑)
+@purchase_bp.route('/upload_acceptancereport', methods=['POST'])
+def upload_acceptancereport():
+    file = request.files.get('file')
+    folder = request.form.get('folder')
+    username = request.form.get('work_username')
+
+    if not file:
+        return jsonify(success=False, message='無檔案')
+    if not folder:
+        return jsonify(success=False, message='資料夾名稱為空')
+    if not username:
+        return jsonify(success=False, message='缺少 username')
+
+    filename = file.filename or ''
+    if filename == '':
+        return jsonify(success=False, message='檔案名稱為空')
+
+    try:
+        save_path = os.path.join(
+            REPORT_SHARE_ROOT,
+            username,
+            r"=已結單=",
+            folder
+        )
+        return save_attachment(file, save_path, username)
+    except Exception as e:
+        print('❌ 儲存錯誤：', e)
+        return jsonify(success=False, message=str(e))
+
+
+# 廠商
+@purchase_bp.route('/api/venders', methods=['GET'])
+@response_cache.etag([VENDER_FILE_PATH])
+def get_venders():
+    """讀取 vender.ini 並返回供應商列表"""
+    try:
+        if os.path.exists(VENDER_FILE_PATH):
+            with open(VENDER_FILE_PATH, 'r', encoding='utf-8') as f:
+                venders = [line.strip() for line in f.readlines() if line.strip()]
+            return jsonify(venders)
+        else:
+            return jsonify([])
+    except Exception as e:
+        print(e)
+        return jsonify({'error': str(e)}), 500
+
+
+@purchase_bp.route('/api/venders', methods=['POST'])
+def add_vender():
+    """新增供應商到 vender.ini"""
+    try:
+        data = request.get_json()
+        new_vender = data.get('vender', '').strip()
+
+        if not new_vender:
+            return jsonify({'error': '供應商名稱不能是空的'}), 400
+
+        # 讀取現有清單，避免重複
+        existing = []
+        if os.path.exists(VENDER_FILE_PATH):
+            with open(VENDER_FILE_PATH, 'r', encoding='utf-8') as f:
+                existing = [line.strip() for line in f.readlines() if line.strip()]
+
+        if new_vender in existing:
+            return jsonify({'message': '供應商已存在'}), 200
+
+        # 追加寫入
+        with open(VENDER_FILE_PATH, 'a', encoding='utf-8') as f:
+            f.write(new_vender + '\n')
+
+        return jsonify({'message': '新增成功', 'vender': new_vender}), 201
+
+    except Exception as e:
+        print(e)
+        return jsonify({'error': str(e)}), 500
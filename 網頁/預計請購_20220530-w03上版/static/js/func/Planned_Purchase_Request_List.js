@@ -3,7 +3,13 @@ const app = Vue.createApp({
         return {
             username: '',
             setRule: '',
-            items: [],
+            items: [], // 目前頁面的資料 (伺服器端篩選 / 排序後)
+            page: 1,
+            pageLimit: 100,
+            pageCount: 1,
+            filteredTotal: 0,
+            facets: {}, // 各下拉選單的選項
+            stats: { ordered: 0, unordered: 0, unordered_amount: 0, issued_months: [], issued_totals: {} },
             newItem: {},
             selectedMonth: "", // 綁定選取的值
             selectedIssuedMonth: "",
@@ -92,7 +98,6 @@ const app = Vue.createApp({
             filterStartDate: '',
             filterEndDate: '',
             dateFilterActive: false,
-            dateFilteredItems: [],
             showNewItemModal: false,
             showUploadModal: false,
             sortField: '',
@@ -203,792 +208,93 @@ const app = Vue.createApp({
 
     computed: {
 
+        // 篩選 / 排序 / 分頁都在伺服器端 (/data?facets=1),items 只有目前頁面的資料
         filteredData() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return baseData.filter(item => {
-                // 新增「未請購、已請購」的切換條件
-                if (this.filterPurchaseStatus === 'ORDERED' && item['開單狀態'] !== 'V') return false;
-                if (this.filterPurchaseStatus === 'UNORDERED' && item['開單狀態'] === 'V') return false;
-
-                const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((item['驗收狀態'] ?? '').trim());
-                const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(item['需求者']);
-                const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(item['開單狀態']);
-                const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(item['WBS']);
-                const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(item['請購順序']).trim());
-                const formattedNeedDate = String(item['需求日']).length === 8
-                    ? `${String(item['需求日']).slice(0, 4)}/${String(item['需求日']).slice(4, 6)}/${String(item['需求日']).slice(6, 8)}`
-                    : item['需求日'];
-                const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                const issuedMonth = String(item['已開單日期']);
-                const formattedIssuedMonth = issuedMonth.length === 8 ? issuedMonth.slice(0, 6) : issuedMonth;
-                const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(item['ePR No.']);
-                const poValues = String(item['PO No.'] || '')
-                    .split(/<br\s*\/?>|\r?\n/)
-                    .map(v => v.trim())
-                    .filter(Boolean);
-                const matchPONo = this.checkedPONos.length === 0 ||
-                                poValues.some(v => this.checkedPONos.includes(v));
-                const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(item['請購項目']);
-                const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(item['需求原因']);
-                const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(item['總金額']).trim());
-                const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(item['簽核中關卡']);
-                const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(item['Status']);
-                const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(item['備註']);
-                const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(item['主任簽核'] || '');
-                const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(item['叔叔簽核'] || '');
-
-                return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && 
-                matchNeedDate && matchIssuedMonth && matchEPR && matchPONo && matchItem && matchReason && 
-                matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-            });
+            return this.items;
         },
 
+        // 各下拉選單的選項: 伺服器套用其他篩選條件後剩下的值 (facets)
         // 主任簽核
         uniqueDirectorApprovals() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-                        return matchState && matchReceivingResult && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchPerson && matchUncleApproval;
-                    })
-                    .map(i => i['主任簽核'] || '')
-            )).sort();
+            return this.facets.checkedDirectorApprovals || [];
         },
 
         // 叔叔簽核
         uniqueUncleApprovals() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-
-                        return matchState && matchReceivingResult && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchPerson && matchDirectorApproval;
-                    })
-                    .map(i => i['叔叔簽核'] || '')
-            )).sort();
-        },
-
-        // 需求者
+            return this.facets.checkedUncleApprovals || [];
+        },
+
         uniquePeople() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(item['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchState && matchReceivingResult && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['需求者'])
-                    .filter(Boolean)
-            ));
-        },
-
-
-        // Excel邏輯：開單狀態清單 → 取符合【已選需求者】的項目
+            return this.facets.checkedPeople || [];
+        },
+
         uniqueStates() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-                        return matchReceivingResult && matchPerson && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['開單狀態'])
-                    .filter(Boolean)
-            ));
-        },
-
-        // ReceivingResult 
+            return this.facets.checkedStates || [];
+        },
+
         uniqueReceivingResult() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(item['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-                        return matchState && matchPerson && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                .map(i => (i['驗收狀態'] ?? '').trim())
-                .filter(val => ['V', 'X', ''].includes(val))
-            ));
-        },
-
-        // WBS
+            return this.facets.checkedReceivingResults || [];
+        },
+
         uniqueWBS() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR && 
-                        matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['WBS'])
-                    .filter(Boolean)
-            ));
-        },
-
-        // 請購順序
+            return this.facets.checkedWBS || [];
+        },
+
         uniqueOrders() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchNeedDate && matchIssuedMonth && matchEPR &&
-                        matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => String(i['請購順序']).trim())
-                    .filter(v => v !== undefined && v !== null)
-            ));
+            return this.facets.checkedOrders || [];
         },
 
         uniqueNeedDates() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => {
-                        const date = String(i['需求日']);
-                        return date.length === 8 ? `${date.slice(0, 4)}/${date.slice(4, 6)}/${date.slice(6, 8)}` : date;
-                    })
-                    .filter(Boolean)
-            )).sort((a, b) => new Date(b) - new Date(a));
+            return this.facets.checkedNeedDates || [];
         },
 
         uniqueIssuedMonths() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());   
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchEPR && matchPONo 
-                        && matchItem && matchReason && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => String(i['已開單日期']))
-                    .filter(v => v.length === 8)
-                    .map(v => v.slice(0, 6))  // yyyyMM
-            )).sort().reverse();  // 遞增月份
+            return this.facets.checkedIssuedMonths || [];
         },
 
         uniqueEPRs() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const issuedMonth = String(i['已開單日期']);
-                        const formattedIssuedMonth = issuedMonth.length === 8 ? issuedMonth.slice(0, 6) : '';
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchText = this.ePRsSearchText === '' || i['ePR No.']?.includes(this.ePRsSearchText.trim());
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate &&  matchText &&
-                        matchPONo &&matchIssuedMonth && matchItem && matchReason &&　matchAmount && matchStage && matchStatus && matchRemark
-                        && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['ePR No.'] || '')
-            )).sort();
+            const text = this.ePRsSearchText.trim();
+            return (this.facets.checkedEPRs || []).filter(v => text === '' || v.includes(text));
         },
 
         uniquePONos() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            const poSet = new Set();
-
-            baseData
-                .filter(i => {
-                    if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                    if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                    const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                    const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                    const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                    const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                    const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                    const formattedNeedDate = String(i['需求日']).length === 8
-                        ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                        : i['需求日'];
-                    const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                    const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                        ? String(i['已開單日期']).slice(0, 6)
-                        : i['已開單日期'];
-                    const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                    const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                    const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                    const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                    const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                    const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                    const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                    const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                    const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                    const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                    return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder &&
-                        matchNeedDate && matchIssuedMonth && matchEPR && matchItem && matchReason &&
-                        matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                })
-                .forEach(i => {
-                    const raw = String(i['PO No.'] || '').trim();
-                    if (raw) {
-                        // 用 <br> 或換行符號分割
-                        const parts = raw.split(/<br\s*\/?>|\r?\n/).map(v => v.trim()).filter(Boolean);
-                        parts.forEach(p => poSet.add(p));
-                    }
-                });
-
-            return Array.from(poSet).sort();
+            return this.facets.checkedPONos || [];
         },
 
         uniqueItems() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchText = this.itemSearchText === '' || i['請購項目']?.includes(this.itemSearchText.trim());
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR && matchPONo 
-                        && matchReason && matchText && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['請購項目'] || '')
-                    .filter(Boolean)
-            )).sort();
+            const text = this.itemSearchText.trim();
+            return (this.facets.checkedItems || []).filter(v => text === '' || v.includes(text));
         },
 
         uniqueReasons() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchText = this.itemSearchText === '' || i['請購項目']?.includes(this.itemSearchText.trim());
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR 
-                        && matchPONo && matchItem &&　matchText && matchAmount && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['需求原因'] || '')
-                    .filter(Boolean)
-            )).sort();
+            return this.facets.checkedReasons || [];
         },
 
-        
         uniqueAmounts() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchText = this.itemSearchText === '' || i['請購項目']?.includes(this.itemSearchText.trim());
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth && matchEPR && matchPONo 
-                        && matchItem &&　matchText && matchReason && matchStage && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                .map(i => String(i['總金額']).trim()) 
-                .filter(v => v !== '')
-            )).sort((a, b) => Number(a) - Number(b));
+            return this.facets.checkedAmounts || [];
         },
 
         uniqueStages() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        // 先套用訂單狀態過濾
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth 
-                            && matchEPR && matchPONo && matchItem && matchReason && matchAmount && matchStatus && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['簽核中關卡'] || '')
-                    .filter(Boolean)
-            )).sort();
+            return this.facets.checkedStages || [];
         },
 
         uniqueStatuses() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchRemark = this.checkedRemarks.length === 0 || this.checkedRemarks.includes(i['備註']);
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth 
-                            && matchEPR && matchPONo && matchItem && matchReason && matchAmount && matchStage && matchRemark && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['Status'] || '')
-                    .filter(Boolean)
-            )).sort();
+            return this.facets.checkedStatuses || [];
         },
 
         uniqueRemarks() {
-            const baseData = this.dateFilterActive ? this.dateFilteredItems : this.items;
-            return Array.from(new Set(
-                baseData
-                    .filter(i => {
-                        if (this.filterPurchaseStatus === 'ORDERED' && i['開單狀態'] !== 'V') return false;
-                        if (this.filterPurchaseStatus === 'UNORDERED' && i['開單狀態'] === 'V') return false;
-
-                        const matchReceivingResult = this.checkedReceivingResults.length === 0 || this.checkedReceivingResults.includes((i['驗收狀態'] ?? '').trim());
-                        const matchPerson = this.checkedPeople.length === 0 || this.checkedPeople.includes(i['需求者']);
-                        const matchState = this.checkedStates.length === 0 || this.checkedStates.includes(i['開單狀態']);
-                        const matchWBS = this.checkedWBS.length === 0 || this.checkedWBS.includes(i['WBS']);
-                        const matchOrder = this.checkedOrders.length === 0 || this.checkedOrders.includes(String(i['請購順序']).trim());
-                        const formattedNeedDate = String(i['需求日']).length === 8
-                            ? `${String(i['需求日']).slice(0, 4)}/${String(i['需求日']).slice(4, 6)}/${String(i['需求日']).slice(6, 8)}`
-                            : i['需求日'];
-                        const matchNeedDate = this.checkedNeedDates.length === 0 || this.checkedNeedDates.includes(formattedNeedDate);
-                        const formattedIssuedMonth = String(i['已開單日期']).length === 8
-                            ? String(i['已開單日期']).slice(0, 6)
-                            : i['已開單日期'];
-                        const matchIssuedMonth = this.checkedIssuedMonths.length === 0 || this.checkedIssuedMonths.includes(formattedIssuedMonth);
-                        const matchEPR = this.checkedEPRs.length === 0 || this.checkedEPRs.includes(i['ePR No.']);
-                        const matchPONo = this.checkedPONos.length === 0 || this.checkedPONos.includes(i['PO No.']);
-                        const matchItem = this.checkedItems.length === 0 || this.checkedItems.includes(i['請購項目']);
-                        const matchReason = this.checkedReasons.length === 0 || this.checkedReasons.includes(i['需求原因']);
-                        const matchAmount = this.checkedAmounts.length === 0 || this.checkedAmounts.includes(String(i['總金額']).trim());
-                        const matchStage = this.checkedStages.length === 0 || this.checkedStages.includes(i['簽核中關卡']);
-                        const matchStatus = this.checkedStatuses.length === 0 || this.checkedStatuses.includes(i['Status']);
-                        const matchText = this.remarkSearchText === '' || i['備註']?.includes(this.remarkSearchText.trim());
-                        const matchDirectorApproval = this.checkedDirectorApprovals.length === 0 || this.checkedDirectorApprovals.includes(i['主任簽核'] || '');
-                        const matchUncleApproval = this.checkedUncleApprovals.length === 0 || this.checkedUncleApprovals.includes(i['叔叔簽核'] || '');
-
-
-                        return matchReceivingResult && matchPerson && matchState && matchWBS && matchOrder && matchNeedDate && matchIssuedMonth 
-                            && matchEPR && matchPONo && matchItem && matchReason && matchAmount && matchStatus && matchStage && matchText && matchDirectorApproval && matchUncleApproval;
-                    })
-                    .map(i => i['備註'] || '')
-                    .filter(Boolean)
-            )).sort();
+            const text = this.remarkSearchText.trim();
+            return (this.facets.checkedRemarks || []).filter(v => text === '' || v.includes(text));
         },
 
-
-
         filteredUnorderedCount() {
-            return this.filteredData.filter(item => item['開單狀態'] !== 'V').length;
+            return this.stats.unordered;
         },
         filteredOrderedCount() {
-            return this.filteredData.filter(item => item['開單狀態'] === 'V').length;
+            return this.stats.ordered;
         },
         sortedFilteredData() {
-            let data = [...this.filteredData];
-
-            if (this.sortField) {
-                data.sort((a, b) => {
-                    let valA = a[this.sortField];
-                    let valB = b[this.sortField];
-
-                    // 空值判斷要放在轉換前
-                    if (valA === '' || valA == null) return 1;
-                    if (valB === '' || valB == null) return -1;
-
-                    // 數字欄位轉換
-                    if (this.sortField === '總金額' || this.sortField === '請購順序') {
-                        valA = Number(valA) || 0;
-                        valB = Number(valB) || 0;
-                    }
-
-                    // 日期欄位補滿 8 碼再比對（若是格式正確的8碼數字字串）
-                    if (this.sortField === '已開單日期') {
-                        valA = String(valA).padStart(8, '0');
-                        valB = String(valB).padStart(8, '0');
-                    }
-
-                    if (this.sortOrder === 'asc') {
-                        return valA > valB ? 1 : -1;
-                    } else {
-                        return valA < valB ? 1 : -1;
-                    }
-                });
-            }
-
-            return data;
+            return this.items;
         },
 
         formattedSelectedAmount() {
@@ -996,74 +302,19 @@ const app = Vue.createApp({
             return amount.toLocaleString() + " 元";
         },
 
+        // 已開單 (V)、已開單日期 8 碼、ePR 10 碼、非專案 WBS 的月份 (伺服器計算)
         issuedMonthOptions() {
-            const set = new Set();
-            const datePattern = /^\d{8}$/;
-            const wbsPattern = /^[A-Z0-9]{10}$/; // ⚠️ 統一使用 10 位英數字格式
-            const eprPattern = /^\d{10}$/;
-
-            const clean = (str) =>
-                String(str || "")
-                .replace(/\.0+$/, "")
-                .trim();
-
-            for (const item of this.items) {
-                    const status = clean(item["開單狀態"]);
-                    const rawDate = clean(item["已開單日期"]);
-                    const wbs = clean(item["WBS"]);
-                    const epr = clean(item["ePR No."]);
-
-                if (
-                    status === "V" &&
-                    datePattern.test(rawDate) &&
-                    eprPattern.test(epr) &&
-                    !wbsPattern.test(wbs)
-                ) {
-                    set.add(rawDate.slice(0, 6));
-                }
-            }
-
-            return Array.from(set).sort();
+            return this.stats.issued_months;
         },
 
-
         monthlyTotalAmount() {
             const month = this.selectedIssuedMonth;
             if (!month) return 0;
-
-            const clean = (str) =>
-                String(str || "")
-                .replace(/\.0+$/, "")
-                .trim();
-            // const wbsPattern = /^\d{2}FT0A\d{4}$/;
-            const wbsPattern = /^[A-Z0-9]{10}$/;
-
-            return this.items.reduce((sum, item) => {
-                const status = clean(item["開單狀態"]);
-                const rawDate = clean(item["已開單日期"]);
-                const monthKey = rawDate.length === 8 ? rawDate.slice(0, 6) : "";
-
-                const wbs = clean(item["WBS"]);
-                const rawAmount = clean(item["總金額"]).replace(/,/g, "");
-                const amount = parseFloat(rawAmount);
-
-                // ⚠️ 必須檢查開單狀態為 'V' (已開單)
-                if (status === "V" && monthKey === month && !wbsPattern.test(wbs)) {
-                return sum + (isNaN(amount) ? 0 : amount);
-                }
-
-                return sum;
-            }, 0);
+            return this.stats.issued_totals[month] || 0;
         },
 
         allUnorderedCountMoney() {
-            return this.items.reduce((sum, item) => {
-            if (item['開單狀態'] !== 'V') {
-                const amount = parseFloat(String(item['總金額']).replace(/,/g, '').trim()) || 0;
-                return sum + amount;
-            }
-            return sum;
-            }, 0).toLocaleString();
+            return this.stats.unordered_amount.toLocaleString();
         },
 
         isStageFiltered() {
@@ -1157,6 +408,7 @@ const app = Vue.createApp({
         }
         // 在最後加入載入篩選狀態
         await this.loadFiltersFromJSON();
+        await this.fetchData(); // 套用載入的篩選狀態
         await this.getrestofmoney();
         
     },
@@ -1179,9 +431,11 @@ const app = Vue.createApp({
             clearTimeout(this.filterSaveTimer);
         }
         
-        // 設定新的計時器（防抖 500ms）
+        // 設定新的計時器（防抖 500ms）: 儲存篩選狀態並從第 1 頁重新取得資料
         this.filterSaveTimer = setTimeout(() => {
             this.saveFiltersToJSON();
+            this.page = 1;
+            this.fetchData();
         }, 500);
     },
 
@@ -1383,52 +637,56 @@ const app = Vue.createApp({
                 this.closeAllDropdowns();
             }
         },
-        async fetchData() {
-            fetch("http://127.0.0.1:5000/data")
-                .then(res => res.json())
-                .then(data => {
-                    console.log("取得資料：", data);
-                    this.items = data
-                    this.sortByAllConditions()
-            });
-            
-        },
-        sortByAllConditions() {
-            const clean = val => String(val || '').trim();
-            const parseDate = val => {
-                const s = clean(val);
-                return s.length === 8 ? new Date(`${s.slice(0,4)}-${s.slice(4,6)}-${s.slice(6,8)}`) : new Date('9999-12-31');
+        // 目前的篩選狀態 (與 save-filters-json 相同的欄位),由 /data 在伺服器端篩選
+        // 請購項目 / 需求原因 / ePR / 備註的搜尋文字只用來縮小下拉選單,不篩選資料列,所以不送出
+        filterSpec() {
+            return {
+                filterPurchaseStatus: this.filterPurchaseStatus,
+                checkedPeople: this.checkedPeople,
+                checkedReceivingResults: this.checkedReceivingResults,
+                checkedStates: this.checkedStates,
+                checkedWBS: this.checkedWBS,
+                checkedOrders: this.checkedOrders,
+                checkedNeedDates: this.checkedNeedDates,
+                checkedIssuedMonths: this.checkedIssuedMonths,
+                checkedEPRs: this.checkedEPRs,
+                checkedPONos: this.checkedPONos,
+                checkedItems: this.checkedItems,
+                checkedReasons: this.checkedReasons,
+                checkedAmounts: this.checkedAmounts,
+                checkedStages: this.checkedStages,
+                checkedStatuses: this.checkedStatuses,
+                checkedRemarks: this.checkedRemarks,
+                checkedDirectorApprovals: this.checkedDirectorApprovals,
+                checkedUncleApprovals: this.checkedUncleApprovals,
+                sortField: this.sortField,
+                sortOrder: this.sortOrder,
+                filterStartDate: this.filterStartDate,
+                filterEndDate: this.filterEndDate,
+                dateFilterActive: this.dateFilterActive,
             };
-
-            this.items.sort((a, b) => {
-
-                // 1. 開單狀態 X(未開單) → V(已開單)
-                const aStatus = clean(a['開單狀態']) === 'V' ? 1 : 0;
-                const bStatus = clean(b['開單狀態']) === 'V' ? 1 : 0;
-                if (aStatus !== bStatus) return aStatus - bStatus; 
-
-                // 2. 請購順序：小 → 大 first
-                const aOrder = parseInt(clean(a['請購順序']), 10) || 99;
-                const bOrder = parseInt(clean(b['請購順序']), 10) || 99;
-                if (aOrder !== bOrder) return aOrder - bOrder;
-
-                // 3. ePR No. 小 → 大 (數字排序)
-                const aEprNo = parseInt(clean(a['ePR No.']), 10) || 0;
-                const bEprNo = parseInt(clean(b['ePR No.']), 10) || 0;
-                if (aEprNo !== bEprNo) return aEprNo - bEprNo;
-
-                // 4. 需求日：近 → 遠
-                const aDate = parseDate(a['需求日']);
-                const bDate = parseDate(b['需求日']);
-                if (aDate.getTime() !== bDate.getTime()) {
-                    return aDate - bDate ;
-                }
-
-                // 5. 金額：大 → 小
-                const aAmount = parseFloat(clean(a['總金額']).replace(/,/g, '')) || 0;
-                const bAmount = parseFloat(clean(b['總金額']).replace(/,/g, '')) || 0;
-                return bAmount - aAmount;
+        },
+        // 只取得目前頁面;沒有指定排序欄位時伺服器依預設順序 (未開單 → 請購順序 → ePR → 需求日 → 金額)
+        async fetchData() {
+            const res = await fetch(`http://127.0.0.1:5000/data?page=${this.page}&limit=${this.pageLimit}&facets=1`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify(this.filterSpec()),
             });
+            const data = await res.json();
+            console.log("取得資料：", data.page, "/", data.pages, "頁，共", data.filtered, "筆");
+            this.items = data.rows;
+            this.facets = data.facets;
+            this.stats = data.stats;
+            this.page = data.page;
+            this.pageCount = data.pages;
+            this.filteredTotal = data.filtered;
+        },
+        async goToPage(page) {
+            const target = Math.min(Math.max(1, page), this.pageCount);
+            if (target === this.page) return;
+            this.page = target;
+            await this.fetchData();
         },
 
         async fetchNoneBuy() {
@@ -1688,8 +946,6 @@ const app = Vue.createApp({
                     String(str || "")
                     .replace(/\.0+$/, "")
                     .trim();
-                // const wbsPattern = /^\d{2}FT0A\d{4}$/;
-                const wbsPattern = /^[A-Za-z0-9]{10}$/;
 
                 // 取今天年月 (yyyyMM)
                 const today = new Date();
@@ -1718,34 +974,8 @@ const app = Vue.createApp({
 
                 // ⚠️ 只要修改前或修改後有一個是當月已開單，就需要重新計算
                 if (previousWasCurrentMonth || nowIsCurrentMonth) {
-                    // ✅ 重新計算當月累積金額（只看已開單日期）
-                    const totalCurrentMonth = this.items.reduce((sum, item) => {
-                    const status = clean(item["開單狀態"]);
-
-                    // 只檢查已開單日期
-                    const rawIssuedDate = clean(item["已開單日期"]);
-                    const issuedMonth =
-                        rawIssuedDate.length >= 6
-                        ? rawIssuedDate.slice(0, 6).replace(/[-/]/g, "")
-                        : "";
-
-                    const wbs = clean(item["WBS"]);
-                    const rawAmount = clean(item["總金額"]).replace(/,/g, "");
-                    const amount = parseFloat(rawAmount);
-
-                    // ⚠️ 條件：開單狀態='V' 且 已開單日期是當月 且 WBS不符合格式
-                    if (
-                        status === "V" &&
-                        issuedMonth === currentMonth &&
-                        !wbsPattern.test(wbs)
-                    ) {
-                        console.log(
-                        `✅ 計入: ${item["請購項目"]} | 金額: ${amount} | 已開單: ${rawIssuedDate} | WBS: ${wbs}`
-                        );
-                        return sum + (isNaN(amount) ? 0 : amount);
-                    }
-                    return sum;
-                    }, 0);
+                    // ✅ 當月累積金額（伺服器依全部資料計算，fetchData 後已更新）
+                    const totalCurrentMonth = this.stats.issued_totals[currentMonth] || 0;
 
                     console.log("更新後累積金額:", totalCurrentMonth);
 
@@ -1935,7 +1165,6 @@ const app = Vue.createApp({
                 String(str || "")
                     .replace(/\.0+$/, "")
                     .trim();
-                const wbsPattern = /^[A-Za-z0-9]{10}$/;
 
                 // 取今天年月 (yyyyMM)
                 const today = new Date();
@@ -1951,33 +1180,8 @@ const app = Vue.createApp({
                     : "";
 
                 if (issuedMonth === currentMonth) {
-                const totalCurrentMonth = this.items.reduce((sum, item) => {
-                    const status = clean(item["開單狀態"]);
-
-                    // 只檢查已開單日期
-                    const rawIssuedDate = clean(item["已開單日期"]);
-                    const itemIssuedMonth =
-                    rawIssuedDate.length >= 6
-                        ? rawIssuedDate.slice(0, 6).replace(/[-/]/g, "")
-                        : "";
-
-                    const wbs = clean(item["WBS"]);
-                    const rawAmount = clean(item["總金額"]).replace(/,/g, "");
-                    const amount = parseFloat(rawAmount);
-
-                    // ⚠️ 條件：開單狀態='V' 且 已開單日期是當月 且 WBS不符合格式
-                    if (
-                    status === "V" &&
-                    itemIssuedMonth === currentMonth &&
-                    !wbsPattern.test(wbs)
-                    ) {
-                    console.log(
-                        `✅ 計入: ${item["請購項目"]} | 金額: ${amount} | 已開單: ${rawIssuedDate} | WBS: ${wbs}`
-                    );
-                    return sum + (isNaN(amount) ? 0 : amount);
-                    }
-                    return sum;
-                }, 0);
+                // 當月累積金額（伺服器依全部資料計算，fetchData 後已更新）
+                const totalCurrentMonth = this.stats.issued_totals[currentMonth] || 0;
 
                 console.log("新增後累積金額:", totalCurrentMonth);
 
@@ -2180,16 +1384,10 @@ const app = Vue.createApp({
 
         applyDateRangeFilter() {
             if (this.filterStartDate && this.filterEndDate) {
-                const startStr = this.filterStartDate.replace(/-/g, '');
-                const endStr = this.filterEndDate.replace(/-/g, '');
-                this.dateFilteredItems = this.items.filter(item => {
-                    const issuedDateStr = String(item['已開單日期']).padStart(8, '0');
-                    return issuedDateStr >= startStr && issuedDateStr <= endStr;
-                });
+                // 已開單日期區間由伺服器篩選 (dateFilterActive 變更後重新取得資料)
                 this.dateFilterActive = true;
             } else {
                 this.dateFilterActive = false;
-                this.dateFilteredItems = [];
             }
             this.showFilterCard = false;
         },
@@ -2198,7 +1396,6 @@ const app = Vue.createApp({
             this.filterStartDate = '';
             this.filterEndDate = '';
             this.dateFilterActive = false;
-            this.dateFilteredItems = [];
             this.showFilterCard = false;
         },
 
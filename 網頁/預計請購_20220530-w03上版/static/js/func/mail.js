@@ -184,16 +184,6 @@ const app = Vue.createApp({
                 this.isLoading = false;
             }
         },
-        async fetchData() {
-            fetch("http://127.0.0.1:5000/data")
-                .then(res => res.json())
-                .then(data => {
-                    console.log("取得資料：", data);
-                    this.items = data
-                    this.sortByAllConditions()
-            });
-            
-        },
         async fetchNoneBuy() {
             const res = await fetch("http://127.0.0.1:5000/api/unordered-count");
             const data = await res.json();
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 在 預計請購 目錄或 repo 根目錄執行 pytest 都能匯入 utils.*
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+"""
+utils/attachment_store.py: blob 唯讀、報告資料夾的硬連結 / 複本與內容檢查
+
+    python -m pytest tests/test_attachment_store.py
+"""
+import io
+import os
+
+import pytest
+
+from utils import attachment_store as attachment_module
+from utils.attachment_store import AttachmentStore, file_sha256, is_read_only
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AttachmentStore(str(tmp_path / ".attachments"))
+
+
+def upload(store, content, target_dir, filename="報告.txt"):
+    return store.save(io.BytesIO(content), filename, target_dir=str(target_dir))
+
+
+def test_blob_is_read_only_and_linked(store, tmp_path):
+    result = upload(store, b"report v1", tmp_path / "folder")
+    blob = store.blob_path(result["sha256"])
+    assert is_read_only(blob)
+    assert result["placed"] == "linked"
+    assert os.path.samefile(blob, result["path"])
+    assert is_read_only(result["path"])
+
+
+def test_copy_when_blob_cannot_be_made_read_only(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(attachment_module.os, "chmod", lambda *args, **kwargs: None)
+    result = upload(store, b"report v1", tmp_path / "folder")
+    blob = store.blob_path(result["sha256"])
+    assert result["placed"] == "copied"
+    assert not os.path.samefile(blob, result["path"])
+
+    # 修改資料夾裡的複本不影響 blob
+    with open(result["path"], "ab") as f:
+        f.write(b" edited")
+    assert file_sha256(blob) == result["sha256"]
+    assert store.verified_blob(result["sha256"]) == blob
+
+
+def test_modified_blob_is_not_served_and_reupload_repairs_it(store, tmp_path):
+    result = upload(store, b"report v1", tmp_path / "folder")
+    sha256 = result["sha256"]
+    blob = store.blob_path(sha256)
+    assert store.verified_blob(sha256) == blob
+
+    # 例如舊版留下的可寫入硬連結被直接修改
+    os.chmod(blob, 0o644)
+    with open(blob, "wb") as f:
+        f.write(b"edited in place")
+    with pytest.raises(ValueError):
+        store.verified_blob(sha256)
+
+    again = upload(store, b"report v1", tmp_path / "other")
+    assert again["deduped"] is False
+    assert store.verified_blob(sha256) == blob
+    assert file_sha256(blob) == sha256
+    assert is_read_only(blob)
+
+
+def test_same_content_in_folder_is_not_rewritten(store, tmp_path):
+    first = upload(store, b"same", tmp_path / "folder")
+    second = upload(store, b"same", tmp_path / "folder")
+    assert second["deduped"] is True
+    assert second["placed"] == "exists"
+    assert first["path"] == second["path"]
+
+
+def test_missing_blob(store):
+    assert store.verified_blob("0" * 64) is None
@@ -0,0 +1,54 @@
+"""
+app.py: 啟動 (import app) 時不載入 utils.lazy_import.HEAVY_MODULES,也不開啟郵件佇列檔
+(啟動耗時與匯入結構的報表見 bench/bench_cold_start.py)
+
+    python -m pytest tests/test_cold_start.py
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from utils.lazy_import import HEAVY_MODULES
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = ["Planned_Purchase_Request_List.csv", "Buyer_detail.csv", "money.json", "vender.ini"]
+
+STARTUP_SCRIPT = """
+import json, sys
+import app
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    """在暫存資料夾啟動: 啟動時建立的資料夾 / log 不落在專案目錄"""
+    data_dir = tmp_path / "static" / "data"
+    (data_dir / "log").mkdir(parents=True)
+    for name in DATA_FILES:
+        src = os.path.join(APP_DIR, "static", "data", name)
+        if os.path.exists(src):
+            shutil.copy(src, data_dir)
+    return tmp_path
+
+
+def test_import_app_skips_heavy_modules(workdir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT.format(heavy=list(HEAVY_MODULES))],
+        cwd=workdir, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    assert loaded == [], f"啟動時不應載入: {', '.join(loaded)}"
+    # 郵件佇列在第一個請求 (或排入信件) 時才啟動
+    assert not (workdir / "static" / "data" / "log" / "mail_outbox.sqlite3").exists()
@@ -0,0 +1,72 @@
+"""
+utils/ehub_batch.py: 補匯較早月份時,不把較晚月份的承諾交期改回舊日期
+
+    python -m pytest tests/test_ehub_batch.py
+"""
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("xlrd")
+
+from utils import table_store as table_store_module
+from utils.ehub_batch import EhubBatchImporter, DELIVERY_COLUMN
+from utils.buyer_index import buyer_index
+from utils.table_store import read_table
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EHUB_ROOT = os.path.join(APP_DIR, "..", "..", "ERT驗收(更新RT金額與驗收Mail)", "01. E-HUB - 供應商承諾交期(Excel)")
+BUYER_FILE = os.path.join(APP_DIR, "static", "data", "Buyer_detail.csv")
+
+# 2025-08 (及更早) 為 2025/09/30,2025-10 為 2025/10/31
+PO_NO, ITEM = "6100800911", "0010"
+
+
+@pytest.fixture
+def ehub(tmp_path, monkeypatch):
+    if not all(os.path.isdir(os.path.join(EHUB_ROOT, month)) for month in ("2025-08", "2025-10")):
+        pytest.skip("找不到 E-HUB 範例資料夾")
+    monkeypatch.setattr(table_store_module, "JOURNAL_DIR", str(tmp_path / "journal"))
+    root = tmp_path / "ehub"
+    for month in ("2025-08", "2025-10"):
+        shutil.copytree(os.path.join(EHUB_ROOT, month), root / month)
+    buyer_file = tmp_path / "Buyer_detail.csv"
+    shutil.copy(BUYER_FILE, buyer_file)
+    importer = EhubBatchImporter(str(buyer_file), str(tmp_path / "ehub_manifest.json"))
+    return importer, root
+
+
+def deliveries(importer, keys):
+    """{(PO, Item): [Buyer_detail 中各筆的承諾交期]}"""
+    df = read_table(importer.buyer_file)
+    index = buyer_index(importer.buyer_file)
+    return {key: [str(df.at[label, DELIVERY_COLUMN]) for label in index.rows_for_po_item(*key)] for key in keys}
+
+
+def test_backfill_keeps_newer_month(ehub):
+    importer, root = ehub
+    october = importer.ingest(str(root / "2025-10"), workers=1)
+    assert october["updated"] and not october["later"]
+    keys = [(entry["po_no"], entry["item"]) for entry in october["updated"]]
+    after_october = deliveries(importer, keys)
+    assert after_october[(PO_NO, ITEM)] == ["2025/10/31"]
+
+    # 匯入 2025-10 時已一併匯入較早的 2025-08,這裡 force 重新解析,靠 manifest 的 applied 判斷
+    august = importer.ingest(str(root / "2025-08"), force=True, workers=1)
+    assert august["parsed"] and august["stale"] > 0
+    assert not august["later"]
+    assert deliveries(importer, keys) == after_october
+
+
+def test_backfill_skips_newer_month_not_ingested(ehub):
+    importer, root = ehub
+    result = importer.ingest(str(root / "2025-08"), dry_run=True, workers=1)
+
+    assert len(result["later"]) == len(os.listdir(root / "2025-10"))
+    updated = {(entry["po_no"], entry["item"]) for entry in result["updated"]}
+    assert (PO_NO, ITEM) not in updated
+    # 較晚月份的檔案只用來比對,不記入 manifest
+    importer.ingest(str(root / "2025-08"), workers=1)
+    manifest = importer.load_manifest()
+    assert {entry["folder"] for entry in manifest["files"].values()} == {"2025-08"}
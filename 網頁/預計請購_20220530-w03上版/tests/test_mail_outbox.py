@@ -0,0 +1,309 @@
+"""
+utils/mail_outbox.py: 以本機的假 SMTP 伺服器 (loopback thread) 驗證佇列寄送、退避重試與搶單
+
+    python -m pytest tests/test_mail_outbox.py
+"""
+import json
+import socketserver
+import threading
+import time
+from email.header import Header
+from email.mime.text import MIMEText
+
+import pytest
+
+from utils import mail_outbox as outbox_module
+from utils.mail_outbox import MailOutbox, backoff_seconds
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """只實作 smtplib.sendmail 用到的指令;reject=True 時 RCPT 一律拒收"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        self.reply("220 stub ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if server.reject:
+                    self.reply("550 rejected")
+                else:
+                    recipients.append(command.split(":", 1)[1].strip(" <>"))
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    body.append(data_line)
+                with server.lock:
+                    server.messages.append((sender, recipients, b"".join(body).decode("utf-8", "replace")))
+                self.reply("250 queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.messages = []
+        self.reject = False
+        self.lock = threading.Lock()
+
+    @property
+    def host(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "mail_outbox.sqlite3")
+
+
+def manual_outbox(db_path):
+    """enqueue 不啟動背景執行緒,由測試自己呼叫 drain / _claim"""
+    outbox = MailOutbox(db_path)
+    outbox.start = lambda: None
+    return outbox
+
+
+def make_mail(host, to="user@example.com", subject="測試"):
+    """與 MailFunction.render.build_message 相同格式的郵件"""
+    message = MIMEText(f"內容 {subject}", "html", "utf-8")
+    message["Subject"] = str(Header(subject, "utf-8"))
+    message["To"] = to
+    return {
+        "sender": "noreply@example.com",
+        "recipients": [to],
+        "message": message.as_string(),
+        "smtp_host": host,
+    }
+
+
+def row(outbox, mail_id):
+    with outbox._connect() as conn:
+        return dict(conn.execute("SELECT * FROM outbox WHERE id = ?", (mail_id,)).fetchone())
+
+
+def make_due(outbox):
+    with outbox._connect() as conn:
+        conn.execute("UPDATE outbox SET next_attempt = 0 WHERE status = 'queued'")
+
+
+def test_enqueue_then_drain_sends_through_smtp(smtp_server, db_path):
+    outbox = manual_outbox(db_path)
+    ids = [
+        outbox.enqueue(make_mail(smtp_server.host, f"user{i}@example.com", f"第{i}封"), kind="normal")
+        for i in range(3)
+    ]
+    assert all(outbox.status(mail_id)["status"] == "queued" for mail_id in ids)
+
+    assert outbox.drain() == 3
+    for i, mail_id in enumerate(ids):
+        status = outbox.status(mail_id)
+        assert status["status"] == "sent"
+        assert status["attempts"] == 1
+        assert status["recipients"] == [f"user{i}@example.com"]
+
+    received = sorted(smtp_server.messages, key=lambda message: message[1])
+    assert [message[1] for message in received] == [[f"user{i}@example.com"] for i in range(3)]
+    assert all(message[0] == "noreply@example.com" for message in received)
+    assert outbox.drain() == 0
+
+
+def test_background_worker_delivers_without_manual_drain(smtp_server, db_path):
+    outbox = MailOutbox(db_path)
+    try:
+        mail_id = outbox.enqueue(make_mail(smtp_server.host))
+        deadline = time.time() + 10
+        while outbox.status(mail_id)["status"] != "sent" and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        outbox.stop(timeout=5)
+    assert outbox.status(mail_id)["status"] == "sent"
+    assert len(smtp_server.messages) == 1
+
+
+def test_worker_started_later_sends_mail_queued_by_previous_run(smtp_server, db_path):
+    previous = MailOutbox(db_path)
+    previous._init_db()
+    with previous._connect() as conn:
+        mail = make_mail(smtp_server.host)
+        mail_id = conn.execute(
+            "INSERT INTO outbox (kind, sender, recipients, message, smtp_host, next_attempt, created_at) "
+            "VALUES ('normal', ?, ?, ?, ?, 0, '')",
+            (mail["sender"], json.dumps(mail["recipients"]), mail["message"], mail["smtp_host"]),
+        ).lastrowid
+
+    outbox = MailOutbox(db_path)
+    outbox.start()  # create_app() 啟動時呼叫
+    try:
+        deadline = time.time() + 10
+        while outbox.status(mail_id)["status"] != "sent" and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        outbox.stop(timeout=5)
+    assert outbox.status(mail_id)["status"] == "sent"
+
+
+def test_rejected_mail_backs_off_then_fails_after_max_attempts(smtp_server, db_path):
+    smtp_server.reject = True
+    outbox = manual_outbox(db_path)
+    mail_id = outbox.enqueue(make_mail(smtp_server.host))
+
+    before = time.time()
+    assert outbox.drain() == 0
+    first = row(outbox, mail_id)
+    assert first["status"] == "queued"
+    assert first["attempts"] == 1
+    assert first["claimed_at"] is None
+    assert first["next_attempt"] >= before + backoff_seconds(1)
+    assert "550" in first["last_error"]
+
+    # 尚未到重試時間: 不會再寄
+    assert outbox.drain() == 0
+    assert row(outbox, mail_id)["attempts"] == 1
+
+    for attempt in range(2, outbox_module.MAX_ATTEMPTS + 1):
+        make_due(outbox)
+        outbox.drain()
+        assert row(outbox, mail_id)["attempts"] == attempt
+
+    final = row(outbox, mail_id)
+    assert final["status"] == "failed"
+    assert final["attempts"] == outbox_module.MAX_ATTEMPTS
+    make_due(outbox)
+    assert outbox.drain() == 0
+    assert row(outbox, mail_id)["attempts"] == outbox_module.MAX_ATTEMPTS
+    assert smtp_server.messages == []
+
+
+def test_connection_failure_is_retried_and_later_succeeds(smtp_server, db_path):
+    outbox = manual_outbox(db_path)
+    closed_port = SMTPStub()
+    dead_host = closed_port.host
+    closed_port.server_close()  # 這個 port 沒有人在聽
+
+    mail_id = outbox.enqueue(make_mail(dead_host))
+    assert outbox.drain() == 0
+    assert row(outbox, mail_id)["status"] == "queued"
+
+    with outbox._connect() as conn:
+        conn.execute("UPDATE outbox SET smtp_host = ? WHERE id = ?", (smtp_server.host, mail_id))
+    make_due(outbox)
+    assert outbox.drain() == 1
+    assert row(outbox, mail_id)["attempts"] == 2
+    assert len(smtp_server.messages) == 1
+
+
+def test_backoff_grows_and_is_capped():
+    delays = [backoff_seconds(n) for n in range(1, 10)]
+    assert delays[:3] == [outbox_module.BACKOFF_BASE, outbox_module.BACKOFF_BASE * 2, outbox_module.BACKOFF_BASE * 4]
+    assert delays == sorted(delays)
+    assert max(delays) == outbox_module.BACKOFF_MAX
+
+
+def test_claim_is_exclusive_across_workers(smtp_server, db_path):
+    first = manual_outbox(db_path)
+    ids = [first.enqueue(make_mail(smtp_server.host, f"u{i}@example.com")) for i in range(30)]
+
+    workers = [MailOutbox(db_path) for _ in range(4)]
+    claimed = []
+    barrier = threading.Barrier(len(workers))
+
+    def claim(worker):
+        barrier.wait()
+        while True:
+            rows = worker._claim(3)
+            if not rows:
+                return
+            claimed.extend(r["id"] for r in rows)
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(ids)  # 每封只被一個 worker 取得
+
+
+def test_second_process_does_not_requeue_live_claim(smtp_server, db_path):
+    live = manual_outbox(db_path)
+    mail_id = live.enqueue(make_mail(smtp_server.host))
+    assert [r["id"] for r in live._claim(10)] == [mail_id]
+
+    # 另一個 process (CLI / bench / 第二個服務) 啟動並開始取件
+    other = MailOutbox(db_path)
+    other._init_db()
+    assert other._claim(10) == []
+    assert row(other, mail_id)["status"] == "sending"
+
+
+def test_stale_claim_is_requeued_after_timeout(smtp_server, db_path):
+    crashed = manual_outbox(db_path)
+    mail_id = crashed.enqueue(make_mail(smtp_server.host))
+    crashed._claim(10)
+    with crashed._connect() as conn:
+        conn.execute(
+            "UPDATE outbox SET claimed_at = ? WHERE id = ?",
+            (time.time() - outbox_module.CLAIM_TIMEOUT - 1, mail_id),
+        )
+
+    restarted = MailOutbox(db_path)
+    assert restarted.drain() == 1
+    assert row(restarted, mail_id)["status"] == "sent"
+    assert len(smtp_server.messages) == 1
+
+
+def test_old_queue_file_gets_claimed_at_column(db_path):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(outbox_module.SCHEMA.replace(",\n    claimed_at REAL", ""))
+    conn.execute(
+        "INSERT INTO outbox (kind, sender, recipients, message, smtp_host, status, next_attempt, created_at) "
+        "VALUES ('normal', 'a@example.com', '[]', 'x', 'h', 'sending', 0, '')"
+    )
+    conn.commit()
+    conn.close()
+
+    outbox = MailOutbox(db_path)
+    outbox._init_db()
+    assert row(outbox, 1)["claimed_at"] is None
+    # 舊版留下、沒有 claimed_at 的 sending 視為中斷,重新排入
+    outbox._claim(0)
+    assert row(outbox, 1)["status"] == "queued"
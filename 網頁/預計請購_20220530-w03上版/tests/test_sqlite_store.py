@@ -0,0 +1,99 @@
+"""
+utils/sqlite_store.py: 每次寫入後讀回資料表,確認與寫入的 DataFrame 相同
+(依 Id 逐列寫入、Id 重複 / 空白時依位置寫入、列數不同時整張表重建)
+
+    python -m pytest tests/test_sqlite_store.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import table_store as table_store_module
+from utils.sqlite_store import SQLiteTableStore
+from utils.table_store import _as_text
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_store_module, "JOURNAL_DIR", str(tmp_path / "journal"))
+    return SQLiteTableStore(str(tmp_path / "purchase.db"))
+
+
+@pytest.fixture
+def path(tmp_path):
+    # 只用檔名對應資料表,CSV 本身不需要存在
+    return str(tmp_path / "Planned_Purchase_Request_List.csv")
+
+
+def make_frame(ids, amounts=None):
+    amounts = amounts or [str(100 * (i + 1)) for i in range(len(ids))]
+    return pd.DataFrame({
+        "Id": ids,
+        "請購項目": [f"項目{i}" for i in range(len(ids))],
+        "總金額": amounts,
+        "備註": [np.nan] * len(ids),
+    })
+
+
+def write_and_check(store, path, df):
+    """寫入後讀回,內容 (空白與 NaN 視為相同) 與順序都要一致"""
+    store.write(df, path)
+    stored = store.read(path)
+    assert list(stored.columns) == list(df.columns)
+    expected = _as_text(df.reset_index(drop=True))
+    assert _as_text(stored).values.tolist() == expected.values.tolist()
+    return stored
+
+
+def version(store, path):
+    return store.signature(path)
+
+
+def test_keyed_insert_update_delete_and_reorder(store, path):
+    df = write_and_check(store, path, make_frame(["a", "b", "c"]))
+
+    df.loc[df["Id"] == "b", "總金額"] = "999"
+    df = pd.concat([df[df["Id"] != "a"], make_frame(["d"])], ignore_index=True)
+    df = write_and_check(store, path, df)
+
+    write_and_check(store, path, df.iloc[::-1])
+
+
+def test_update_row_with_nan_id_is_written(store, path):
+    df = write_and_check(store, path, make_frame(["a", np.nan, "c"]))
+    before = version(store, path)
+
+    df.loc[1, "總金額"] = "12345"
+    df.loc[1, "備註"] = "空白 Id 的列"
+    write_and_check(store, path, df)
+    assert version(store, path) != before
+
+
+def test_update_row_with_blank_id_is_written(store, path):
+    df = write_and_check(store, path, make_frame(["a", "", "c"]))
+    df.loc[1, "請購項目"] = "修改後"
+    write_and_check(store, path, df)
+
+
+def test_delete_with_nan_id_rebuilds_table(store, path):
+    df = write_and_check(store, path, make_frame(["a", np.nan, "c"]))
+    write_and_check(store, path, df.drop(index=0))
+
+
+def test_reorder_with_nan_id_is_written(store, path):
+    df = write_and_check(store, path, make_frame(["a", np.nan, "c"]))
+    write_and_check(store, path, df.iloc[[2, 0, 1]])
+
+
+def test_duplicate_ids_update_by_position(store, path):
+    df = write_and_check(store, path, make_frame(["a", "a", "b"]))
+    df.loc[1, "總金額"] = "1"
+    write_and_check(store, path, df)
+
+
+def test_nan_id_filled_in_later(store, path):
+    df = write_and_check(store, path, make_frame(["a", np.nan, np.nan]))
+    df["Id"] = ["a", "x", "y"]
+    df = write_and_check(store, path, df)
+    df.loc[df["Id"] == "y", "總金額"] = "7"
+    write_and_check(store, path, df)
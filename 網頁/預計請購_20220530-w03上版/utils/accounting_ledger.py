@@ -0,0 +1,325 @@
+"""
+入帳快照 (accounting ledger)
+- 每筆 Buyer_detail 解析後的承諾交期月份 / 發票月份 / 需求日月份 / 金額
+- 每月未入帳 (accounting_summary) 與實際入帳 (monthly_actual_accounting) 彙總
+
+解析結果以資料列內容 hash 為 key 保存,Buyer_detail 變動時只重新解析有變動的列;
+彙總結果連同來源檔案版本寫入 static/data/log/,重啟後檔案未變動即可直接使用。
+"""
+import os
+import json
+import threading
+import logging
+from datetime import datetime
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = "static/data/log"
+LEDGER_FILE = os.path.join(LOG_DIR, "accounting_ledger.csv")
+SNAPSHOT_FILE = os.path.join(LOG_DIR, "accounting_snapshot.json")
+
+# 影響解析結果的欄位,內容 hash 以這些欄位計算
+SOURCE_COLUMNS = [
+    "ePR No.", "PO No.", "品項", "總價", "RT總金額",
+    "Delivery Date 廠商承諾交期", "需求日", "發票月份", "WBS",
+]
+PARSED_COLUMNS = ["承諾月", "發票月", "需求月", "最終金額", "RT總金額_數值"]
+
+SUMMARY_DETAIL_COLUMNS = [
+    ("ePR No.", "ePR No."), ("PO No.", "PO No."), ("品項", "品項"), ("總價", "總價"),
+    ("RT總金額", "RT總金額"), ("承諾交期", "Delivery Date 廠商承諾交期"),
+    ("需求日", "需求日"), ("發票月份", "發票月份"), ("WBS", "WBS"),
+]
+ACTUAL_DETAIL_COLUMNS = [
+    "ePR No.", "PO No.", "品項", "總價", "RT總金額",
+    "Delivery Date 廠商承諾交期", "需求日", "發票月份", "WBS",
+]
+
+
+def _to_number(series):
+    return pd.to_numeric(
+        series.astype(str).str.replace(",", "", regex=False).str.replace("$", "", regex=False),
+        errors="coerce",
+    )
+
+
+def _to_year_month(series):
+    """日期字串 -> yyyymm 整數,無法解析為 0"""
+    dates = pd.to_datetime(series, errors="coerce", format="mixed")
+    return (dates.dt.year * 100 + dates.dt.month).fillna(0).astype(int)
+
+
+def row_hashes(df):
+    return pd.util.hash_pandas_object(df[SOURCE_COLUMNS], index=False).astype(str)
+
+
+def parse_rows(df):
+    """解析日期與金額欄位 (只對傳入的列)"""
+    rt_total = df["RT總金額"]
+    has_rt = rt_total.notna() & (rt_total.astype(str).str.strip() != "")
+    final_amount = pd.Series(np.where(has_rt, rt_total, df["總價"]), index=df.index)
+
+    return pd.DataFrame({
+        "承諾月": _to_year_month(df["Delivery Date 廠商承諾交期"]),
+        "發票月": _to_year_month(df["發票月份"]),
+        "需求月": _to_year_month(df["需求日"]),
+        "最終金額": _to_number(final_amount),
+        "RT總金額_數值": _to_number(rt_total),
+    }, index=df.index)
+
+
+def _month_key(year_month):
+    return f"{year_month // 100}年{year_month % 100}月"
+
+
+def _month_bounds(year_month):
+    year, month = year_month // 100, year_month % 100
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def _text(value):
+    return "" if pd.isna(value) else str(value)
+
+
+def _non_empty(series):
+    return series.notna() & (series != "")
+
+
+class AccountingLedger:
+    def __init__(self, buyer_path):
+        self.buyer_path = buyer_path
+        self._lock = threading.Lock()
+        self._parsed = None     # row_hash -> 解析欄位
+        self._snapshot = None
+
+    # ---------- 解析快取 ----------
+    def _load_parsed(self):
+        if self._parsed is not None:
+            return self._parsed
+        if os.path.exists(LEDGER_FILE):
+            try:
+                parsed = pd.read_csv(LEDGER_FILE, dtype={"row_hash": str})
+                self._parsed = parsed.set_index("row_hash")[PARSED_COLUMNS]
+                return self._parsed
+            except Exception as e:
+                logger.warning(f"⚠️ 入帳明細快取讀取失敗,重新解析: {e}")
+        self._parsed = pd.DataFrame(columns=PARSED_COLUMNS)
+        return self._parsed
+
+    def build_ledger(self, df):
+        """回傳 Buyer_detail 每列的原始欄位 + 解析欄位,只解析快取中沒有的列"""
+        df = df.copy()
+        for col in SOURCE_COLUMNS:
+            if col not in df.columns:
+                df[col] = np.nan
+
+        hashes = row_hashes(df)
+        parsed = self._load_parsed()
+
+        missing = ~hashes.isin(parsed.index)
+        if missing.any():
+            new_rows = df[missing]
+            new_parsed = parse_rows(new_rows)
+            new_parsed.index = hashes[missing].values
+            new_parsed = new_parsed[~new_parsed.index.duplicated()]
+            logger.info(f"📒 入帳明細: 重新解析 {len(new_parsed)} 筆 / 共 {len(df)} 筆")
+        else:
+            new_parsed = parsed.iloc[0:0]
+
+        # 只保留目前檔案仍存在的列,避免快取無限成長
+        still_used = parsed.index.isin(hashes)
+        if missing.any() or not still_used.all():
+            parsed = pd.concat([parsed[still_used], new_parsed])
+            self._parsed = parsed
+            self._save_parsed(parsed)
+
+        ledger = df[SOURCE_COLUMNS].copy()
+        ledger[PARSED_COLUMNS] = parsed.loc[hashes.values, PARSED_COLUMNS].to_numpy()
+        for col in ("承諾月", "發票月", "需求月"):
+            ledger[col] = ledger[col].astype(int)
+        for col in ("最終金額", "RT總金額_數值"):
+            ledger[col] = ledger[col].astype(float)
+
+        ledger["有單號"] = _non_empty(ledger["ePR No."]) & _non_empty(ledger["PO No."])
+        ledger["無WBS"] = ledger["WBS"].isna() | (ledger["WBS"] == "")
+        ledger["有需求日"] = _non_empty(ledger["需求日"])
+        return ledger
+
+    def _save_parsed(self, parsed):
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            parsed.rename_axis("row_hash").reset_index().to_csv(LEDGER_FILE, index=False)
+        except Exception as e:
+            logger.warning(f"⚠️ 入帳明細快取寫入失敗: {e}")
+
+    # ---------- 彙總 ----------
+    @staticmethod
+    def summarize_month(ledger, year_month):
+        """指定月份未入帳金額 (與 /api/accounting_summary 原本的 filter_for_accounting 相同規則)"""
+        start, end = _month_bounds(year_month)
+
+        already_paid = (ledger["發票月"] > 0) & (ledger["發票月"] <= year_month)
+        active = ledger[~already_paid]
+
+        condition1 = active["有單號"]
+        condition2 = active["無WBS"]
+        condition3 = active["承諾月"] == year_month
+        final_condition = condition1 & condition2 & condition3
+        result = active[final_condition]
+
+        total = result["最終金額"].sum()
+        detailed_rows = []
+        for row in result.to_dict("records"):
+            amount = row["最終金額"]
+            detail = {key: _text(row[col]) for key, col in SUMMARY_DETAIL_COLUMNS}
+            detail["計算金額"] = 0 if pd.isna(amount) else float(amount)
+            detailed_rows.append(detail)
+
+        return {
+            "total_amount": int(total) if not pd.isna(total) else 0,
+            "detailed_rows": detailed_rows,
+            "conditions": {
+                "condition1_count": int(condition1.sum()),
+                "condition2_count": int(condition2.sum()),
+                "condition3_count": int(condition3.sum()),
+                "already_paid_count": int(already_paid.sum()),
+                "final_condition_count": int(final_condition.sum()),
+            },
+            "date_ranges": {
+                "target_date_start": start.isoformat(),
+                "target_date_end": end.isoformat(),
+                "target_year": year_month // 100,
+                "target_month": year_month % 100,
+            },
+        }
+
+    @staticmethod
+    def summarize_actual(ledger):
+        """依發票月份彙總實際入帳金額 {'2025-07': {'amount': ..., 'details': [...]}}"""
+        mask = ledger["有單號"] & ledger["有需求日"] & ledger["無WBS"] & (ledger["發票月"] > 0)
+        result = ledger[mask]
+
+        monthly = {}
+        for year_month, group in result.groupby("發票月"):
+            details = []
+            for row in group.to_dict("records"):
+                rt_amount = row["RT總金額_數值"]
+                detail = {col: _text(row[col]) for col in ACTUAL_DETAIL_COLUMNS}
+                detail["計算金額"] = str(int(rt_amount) if pd.notna(rt_amount) else 0)
+                details.append(detail)
+            period = f"{year_month // 100}-{year_month % 100:02d}"
+            monthly[period] = {
+                "amount": int(group["RT總金額_數值"].sum()),
+                "details": details,
+            }
+        return monthly
+
+    def build_snapshot(self, df):
+        ledger = self.build_ledger(df)
+        filtered = ledger[ledger["有單號"] & ledger["有需求日"]]
+
+        # 所有出現過的年月 (承諾交期 / 需求日 / 發票月份)
+        candidates = pd.concat([filtered["承諾月"], filtered["需求月"], filtered["發票月"]])
+        year_months = sorted(int(m) for m in candidates.unique() if m > 0)
+
+        return {
+            "version": list(table_store.signature(self.buyer_path) or []),
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "original_df_count": int(len(ledger)),
+            "filtered_df_count": int(len(filtered)),
+            "unaccounted": {str(m): self.summarize_month(ledger, m) for m in year_months},
+            "actual": self.summarize_actual(ledger),
+        }
+
+    # ---------- 快照存取 ----------
+    def _load_snapshot_file(self):
+        if not os.path.exists(SNAPSHOT_FILE):
+            return None
+        try:
+            with open(SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 入帳快照讀取失敗: {e}")
+            return None
+
+    def _save_snapshot_file(self, snapshot):
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            tmp_path = SNAPSHOT_FILE + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, SNAPSHOT_FILE)
+        except Exception as e:
+            logger.warning(f"⚠️ 入帳快照寫入失敗: {e}")
+
+    def snapshot(self):
+        """取得最新快照,Buyer_detail 版本不同時才重新計算"""
+        version = list(table_store.signature(self.buyer_path) or [])
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._load_snapshot_file()
+            if self._snapshot is None or self._snapshot.get("version") != version:
+                df = table_store.read(self.buyer_path, copy=False)
+                self._snapshot = self.build_snapshot(df)
+                self._save_snapshot_file(self._snapshot)
+                logger.info(f"📒 入帳快照已更新 ({len(self._snapshot['unaccounted'])} 個月份)")
+            return self._snapshot
+
+    def refresh(self):
+        self.snapshot()
+
+    # ---------- API 回應 ----------
+    def accounting_summary(self, now=None):
+        """/api/accounting_summary 回應內容 (只列到當月)"""
+        now = now or datetime.now()
+        current = now.year * 100 + now.month
+        snapshot = self.snapshot()
+
+        months = sorted(int(m) for m in snapshot["unaccounted"] if int(m) <= current)
+
+        summary, detailed, conditions, date_ranges = {}, {}, {}, {}
+        for m in months:
+            data = snapshot["unaccounted"][str(m)]
+            key = _month_key(m)
+            summary[key] = data["total_amount"]
+            detailed[key] = data["detailed_rows"]
+            conditions[key] = data["conditions"]
+            date_ranges[key] = data["date_ranges"]
+
+        return {
+            "summary": summary,
+            "detailed_data": detailed,
+            "conditions": conditions,
+            "date_ranges": date_ranges,
+            "meta": {
+                "total_months": len(months),
+                "all_year_months": [(m // 100, m % 100) for m in months],
+                "original_df_count": snapshot["original_df_count"],
+                "filtered_df_count": snapshot["filtered_df_count"],
+                "csv_path": str(self.buyer_path),
+                "snapshot_built_at": snapshot["built_at"],
+            },
+        }
+
+    def monthly_actual(self, now=None):
+        """/api/monthly_actual_accounting 回應內容 (本月 / 上月)"""
+        now = now or datetime.now()
+        this_month = f"{now.year}-{now.month:02d}"
+        last_month = now.month - 1 if now.month > 1 else 12
+        last_year = now.year if now.month > 1 else now.year - 1
+        last_month = f"{last_year}-{last_month:02d}"
+
+        actual = self.snapshot()["actual"]
+        empty = {"amount": 0, "details": []}
+        return {
+            "本月": actual.get(this_month, empty),
+            "上月": actual.get(last_month, empty),
+        }
@@ -0,0 +1,267 @@
+"""
+長官簽核流程 (主任簽核 / 叔叔簽核)
+
+狀態: X = 待簽核, V = 已確認, R = 退回
+- 待審核: 兩個簽核都不是 R,且不是兩個都 V (向量化計算)
+- 確認 / 退回 / 重新提交 / 處理退回: N 筆 ID 在同一把鎖內一次套用、寫檔一次
+- 待審核清單在記憶體中維護,本程式寫入後只更新有異動的列;
+  檔案被其他程式改寫 (版本不同) 時才整份重建
+- 每次狀態轉換寫入 static/data/log/approval_history.jsonl
+"""
+import os
+import json
+import threading
+import logging
+from datetime import datetime
+
+from utils.table_store import table_store, read_table, write_table
+
+logger = logging.getLogger(__name__)
+
+DIRECTOR_COLUMN = "主任簽核"
+UNCLE_COLUMN = "叔叔簽核"
+REMARK_COLUMN = "備註"
+LEGACY_COLUMN = "長官確認"
+
+HISTORY_FILE = os.path.join("static/data/log", "approval_history.jsonl")
+
+STAGE_COLUMNS = {"director": DIRECTOR_COLUMN, "uncle": UNCLE_COLUMN}
+STAGE_LABELS = {"director": "主任", "uncle": "叔叔"}
+
+REJECT_REMARK_PATTERNS = [r"；*【主任退回】[^；]*", r"；*【叔叔退回】[^；]*"]
+
+
+def ensure_columns(df, remark=False):
+    """補上簽核欄位 (預設 X),回傳是否有新增欄位"""
+    added = False
+    for col in (DIRECTOR_COLUMN, UNCLE_COLUMN):
+        if col not in df.columns:
+            df[col] = "X"
+            added = True
+    if remark and REMARK_COLUMN not in df.columns:
+        df[REMARK_COLUMN] = ""
+        added = True
+    return added
+
+
+def pending_mask(df):
+    """待審核: 沒有被退回,且主任 / 叔叔不是都已確認"""
+    director = df[DIRECTOR_COLUMN].fillna("X").astype(str).str.strip()
+    uncle = df[UNCLE_COLUMN].fillna("X").astype(str).str.strip()
+    rejected = (director == "R") | (uncle == "R")
+    approved = (director == "V") & (uncle == "V")
+    return ~rejected & ~approved
+
+
+def strip_reject_remarks(remarks):
+    """移除【主任退回】/【叔叔退回】的部分,保留原本備註"""
+    result = remarks.fillna("").astype(str)
+    for pattern in REJECT_REMARK_PATTERNS:
+        result = result.str.replace(pattern, "", regex=True)
+    return result.str.strip("；").str.strip()
+
+
+def _blank_remarks(remarks):
+    remarks = remarks.fillna("").astype(str)
+    return remarks.where((remarks.str.strip() != "") & (remarks != "nan"), "")
+
+
+def _records(df):
+    """DataFrame -> list of dict,全部轉成字串"""
+    return df.astype(object).where(df.notna(), "").astype(str).to_dict("records")
+
+
+class ApprovalService:
+    def __init__(self, csv_path, history_file=HISTORY_FILE):
+        self.csv_path = csv_path
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+        self._signature = None
+        self._pending = {}  # Id -> (列位置, record)
+
+    # ---------- 待審核清單 ----------
+    def _rebuild(self, df):
+        pending = df[pending_mask(df)]
+        positions = df.index.get_indexer(pending.index)
+        ids = pending["Id"].astype(str).str.strip().tolist()
+        self._pending = {
+            item_id: (position, record)
+            for item_id, position, record in zip(ids, positions, _records(pending))
+        }
+        self._signature = table_store.signature(self.csv_path)
+        logger.info(f"📋 待審核清單重建: {len(self._pending)} 筆")
+
+    def _update(self, df, changed):
+        """只重新判斷有異動的列"""
+        rows = df[changed]
+        still_pending = pending_mask(rows).to_numpy()
+        positions = df.index.get_indexer(rows.index)
+        ids = rows["Id"].astype(str).str.strip().tolist()
+        for item_id, position, record, pending in zip(ids, positions, _records(rows), still_pending):
+            if pending:
+                self._pending[item_id] = (position, record)
+            else:
+                self._pending.pop(item_id, None)
+
+    def _is_fresh(self):
+        return self._signature is not None and self._signature == table_store.signature(self.csv_path)
+
+    def _pending_list(self):
+        return [record for _, record in sorted(self._pending.values(), key=lambda x: x[0])]
+
+    def pending_items(self):
+        """待長官確認的資料 (依檔案順序)"""
+        with self._lock:
+            if self._is_fresh():
+                return self._pending_list()
+
+        # 需要重建: 與狀態轉換相同,先取檔案鎖再取記憶體鎖
+        with table_store.lock(self.csv_path), self._lock:
+            if not self._is_fresh():
+                df = read_table(self.csv_path).fillna("")
+                if ensure_columns(df):
+                    write_table(df, self.csv_path)
+                self._rebuild(df)
+            return self._pending_list()
+
+    # ---------- 狀態轉換 ----------
+    def _transaction(self, item_ids, action, apply, extra=None, prepare=None):
+        """
+        讀檔 → 套用 → 寫檔 → 更新待審核清單 → 寫入歷程,全部在主表的檔案鎖內完成
+        apply(df, mask) 直接修改 df;prepare(df) 可在套用前調整欄位 (會整份重建待審核清單)
+        回傳 (符合的 ID 數, 異動後的 df, mask)
+        """
+        wanted = [str(item_id).strip() for item_id in item_ids]
+
+        with table_store.lock(self.csv_path), self._lock:
+            df = read_table(self.csv_path).fillna("")
+            if prepare is not None:
+                df = prepare(df)
+            ensure_columns(df, remark=True)
+
+            ids = df["Id"].astype(str).str.strip()
+            mask = ids.isin(wanted)
+            found = set(ids[mask])
+            matched = sum(1 for item_id in wanted if item_id in found)
+            if not mask.any():
+                return 0, df, mask
+
+            in_sync = self._is_fresh() and prepare is None
+            before = df.loc[mask, [DIRECTOR_COLUMN, UNCLE_COLUMN]].to_dict("records")
+            apply(df, mask)
+            df = df.fillna("")  # 寫入前確保沒有 nan
+            write_table(df, self.csv_path)
+
+            if in_sync:
+                self._update(df, mask)
+                self._signature = table_store.signature(self.csv_path)
+            else:
+                self._rebuild(df)
+
+        after = df.loc[mask, [DIRECTOR_COLUMN, UNCLE_COLUMN]].to_dict("records")
+        self._record_history(action, ids[mask].tolist(), before, after, extra)
+        return matched, df, mask
+
+    def approve(self, item_ids, director=True, uncle=True, clear_remarks=False):
+        def apply(df, mask):
+            if director:
+                df.loc[mask, DIRECTOR_COLUMN] = "V"
+            if uncle:
+                df.loc[mask, UNCLE_COLUMN] = "V"
+            if clear_remarks:
+                df.loc[mask, REMARK_COLUMN] = strip_reject_remarks(df.loc[mask, REMARK_COLUMN])
+
+        matched, _, _ = self._transaction(item_ids, "approve", apply)
+        return matched
+
+    def reject(self, item_ids, reason, stage="director"):
+        stage = stage if stage == "director" else "uncle"
+        label = STAGE_LABELS[stage]
+        note = f"【{label}退回】{reason}"
+
+        def apply(df, mask):
+            current = _blank_remarks(df.loc[mask, REMARK_COLUMN])
+            df.loc[mask, REMARK_COLUMN] = (current + "；" + note).where(current != "", note)
+            df.loc[mask, STAGE_COLUMNS[stage]] = "R"
+
+        matched, _, _ = self._transaction(item_ids, "reject", apply, extra={"stage": stage, "reason": reason})
+        return matched, label
+
+    def resubmit(self, item_ids):
+        def apply(df, mask):
+            df.loc[mask, DIRECTOR_COLUMN] = "X"
+            df.loc[mask, UNCLE_COLUMN] = "X"
+
+        matched, _, _ = self._transaction(item_ids, "resubmit", apply)
+        return matched
+
+    def clear_remark(self, item_id, stage):
+        """
+        清空退回原因並依退回階段設定簽核狀態
+        找不到 ID 回傳 None,否則回傳保留下來的備註
+        """
+        def prepare(df):
+            # 移除舊的「長官確認」欄位
+            if LEGACY_COLUMN in df.columns:
+                logger.info("✅ 已移除舊的「長官確認」欄位")
+                return df.drop(columns=[LEGACY_COLUMN])
+            return df
+
+        def apply(df, mask):
+            df.loc[mask, REMARK_COLUMN] = strip_reject_remarks(df.loc[mask, REMARK_COLUMN])
+            if stage == "director":
+                # 主任退回 → 主任 V,叔叔 X (等待叔叔簽核)
+                df.loc[mask, DIRECTOR_COLUMN] = "V"
+                df.loc[mask, UNCLE_COLUMN] = "X"
+            elif stage == "uncle":
+                # 叔叔退回 → 主任 V,叔叔 V (簽核完成)
+                df.loc[mask, DIRECTOR_COLUMN] = "V"
+                df.loc[mask, UNCLE_COLUMN] = "V"
+
+        matched, df, mask = self._transaction(
+            [item_id], "clear_remark", apply, extra={"stage": stage}, prepare=prepare
+        )
+        if not matched:
+            return None
+        return df.loc[mask, REMARK_COLUMN].iloc[0]
+
+    # ---------- 歷程 ----------
+    def _record_history(self, action, ids, before, after, extra=None):
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lines = []
+        for item_id, old, new in zip(ids, before, after):
+            entry = {
+                "ts": ts,
+                "action": action,
+                "id": item_id,
+                "from": [old[DIRECTOR_COLUMN], old[UNCLE_COLUMN]],
+                "to": [new[DIRECTOR_COLUMN], new[UNCLE_COLUMN]],
+            }
+            if extra:
+                entry.update(extra)
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        try:
+            with self._history_lock:
+                os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+                with open(self.history_file, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+        except OSError as e:
+            logger.warning(f"⚠️ 簽核歷程寫入失敗: {e}")
+
+    def history(self, item_id=None, limit=200):
+        """簽核歷程 (新到舊),可指定 Id"""
+        if not os.path.exists(self.history_file):
+            return []
+        item_id = None if item_id is None else str(item_id).strip()
+        entries = []
+        with self._history_lock, open(self.history_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if item_id is None or entry.get("id") == item_id:
+                    entries.append(entry)
+        return entries[::-1][:limit]
@@ -0,0 +1,221 @@
+"""
+報告 / 驗收附件存放 (以內容 sha256 命名)
+
+- 上傳檔案分段 (CHUNK_SIZE) 寫入暫存檔並同時計算 sha256,不會整份讀進記憶體
+- 實體檔存在 {root}/blobs/ab/abcdef…,相同內容只存一份;index.json 記錄檔名、大小與每次上傳的位置
+- blob 寫入後設為唯讀;報告路徑 / 驗收路徑 資料夾裡仍會出現原本的檔名:
+  blob 確定是唯讀時才建立硬連結 (不佔額外空間,資料夾裡的檔案也是唯讀,
+  直接修改會被擋下,不會改到 blob),否則 (無法設唯讀 / 不支援硬連結) 複製一份;
+  資料夾裡已經有相同內容的檔案就不再寫入
+- 重複上傳時檢查既有 blob 的 sha256,內容不符 (舊版可寫入的硬連結被修改過) 就以新上傳的內容取代
+- /api/attachments/<sha256> 回傳前確認 blob 內容仍符合 sha256 (依 mtime / 大小快取檢查結果),
+  以 send_file(conditional=True) 回傳,支援 Range / ETag
+"""
+import os
+import json
+import stat
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+from datetime import datetime
+
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+INDEX_FILE = "index.json"
+READ_ONLY = stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH
+WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_read_only(path):
+    """Windows 為唯讀屬性 (st_mode 沒有寫入位元)"""
+    return not (os.stat(path).st_mode & WRITE_BITS)
+
+
+def make_read_only(path):
+    """設為唯讀,回傳是否成功 (部分網路磁碟不支援)"""
+    try:
+        os.chmod(path, READ_ONLY)
+    except OSError as e:
+        logger.warning(f"⚠️ 無法設為唯讀 {path}: {e}")
+    return is_read_only(path)
+
+
+def remove_file(path):
+    """刪除檔案 (Windows 唯讀檔需先取消唯讀)"""
+    if is_read_only(path):
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    os.remove(path)
+
+
+class AttachmentStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_mtime = None
+        self._verified = {}  # sha256 -> (mtime_ns, size),內容已確認符合
+
+    # ---------- 路徑 ----------
+    def blob_path(self, sha256):
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def _file_lock(self):
+        return FileLock(f"{self._index_path()}.lock", timeout=10)
+
+    # ---------- index ----------
+    def _load_index(self):
+        """index.json 有變動 (其他 process 寫入) 才重新讀取;呼叫端需持有 _lock"""
+        path = self._index_path()
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if self._index is None or mtime != self._index_mtime:
+            if mtime is None:
+                self._index = {}
+            else:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ 附件 index 讀取失敗 {path}: {e}")
+                    self._index = {}
+            self._index_mtime = mtime
+        return self._index
+
+    def _save_index(self, index):
+        path = self._index_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        self._index = index
+        self._index_mtime = os.path.getmtime(path)
+
+    def info(self, sha256):
+        with self._lock:
+            return self._load_index().get(sha256)
+
+    # ---------- 寫入 ----------
+    def _receive(self, stream):
+        """分段寫入暫存檔,回傳 (暫存檔路徑, sha256, 大小)"""
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def _place(self, blob, target):
+        """
+        在報告資料夾放一份檔案: 相同內容已存在就略過;blob 為唯讀時硬連結,否則 (或連結失敗) 複製
+        回傳 'exists' / 'linked' / 'copied'
+        """
+        if os.path.exists(target):
+            if os.path.getsize(target) == os.path.getsize(blob) and file_sha256(target) == os.path.basename(blob):
+                return "exists"
+            remove_file(target)
+        if is_read_only(blob):
+            try:
+                os.link(blob, target)
+                return "linked"
+            except OSError:
+                pass
+        shutil.copyfile(blob, target)
+        return "copied"
+
+    def _blob_intact(self, sha256, blob):
+        """blob 內容仍符合 sha256;mtime / 大小沒變就沿用上次的檢查結果"""
+        st = os.stat(blob)
+        signature = (st.st_mtime_ns, st.st_size)
+        if self._verified.get(sha256) == signature:
+            return True
+        if file_sha256(blob) != sha256:
+            self._verified.pop(sha256, None)
+            return False
+        self._verified[sha256] = signature
+        return True
+
+    def verified_blob(self, sha256):
+        """
+        下載用: 回傳 blob 路徑;不存在回傳 None,內容與 sha256 不符時丟出 ValueError
+        """
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob):
+            return None
+        if not self._blob_intact(sha256, blob):
+            logger.error(f"❌ 附件內容與 sha256 不符,可能被直接修改過: {blob}")
+            raise ValueError(f"附件內容已變動: {sha256}")
+        return blob
+
+    def save(self, stream, filename, target_dir=None, uploaded_by="", content_type=""):
+        """
+        保存上傳檔案,回傳 {'sha256', 'size', 'deduped', 'placed', 'path'}
+        target_dir: 報告 / 驗收資料夾 (以原檔名放一份)
+        """
+        tmp_path, sha256, size = self._receive(stream)
+        blob = self.blob_path(sha256)
+        with self._file_lock():
+            deduped = os.path.exists(blob)
+            if deduped and not self._blob_intact(sha256, blob):
+                logger.warning(f"⚠️ 既有附件內容與 sha256 不符,以新上傳的檔案取代: {blob}")
+                remove_file(blob)
+                deduped = False
+            if deduped:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp_path, blob)
+            make_read_only(blob)
+
+            placed, path = None, None
+            if target_dir:
+                os.makedirs(target_dir, exist_ok=True)
+                path = os.path.join(target_dir, filename)
+                placed = self._place(blob, path)
+
+            with self._lock:
+                index = dict(self._load_index())
+                entry = dict(index.get(sha256) or {
+                    "size": size,
+                    "filename": filename,
+                    "content_type": content_type,
+                    "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "uploads": [],
+                })
+                entry["uploads"] = entry["uploads"] + [{
+                    "filename": filename,
+                    "path": path or "",
+                    "by": uploaded_by,
+                    "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }]
+                index[sha256] = entry
+                self._save_index(index)
+
+        logger.info(
+            f"📎 附件 {filename} ({size} bytes) {'重複上傳,沿用既有檔案' if deduped else '已保存'}"
+            + (f",資料夾: {placed}" if placed else "")
+        )
+        return {"sha256": sha256, "size": size, "deduped": deduped, "placed": placed, "path": path}
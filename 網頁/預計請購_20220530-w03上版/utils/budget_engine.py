@@ -0,0 +1,139 @@
+"""
+預算 / 月度花費彙總
+將主表的 已開單日期、總金額、WBS 規則一次轉成型別化欄位,
+並建立 月份 × {正常, WBS} 的彙總表,供 getrestofmoney / budget_months /
+monthly_expense_analysis 共用。主表檔案沒有變動時直接使用快取的彙總表。
+"""
+import threading
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+
+pd = lazy_module("pandas")
+
+# 專案 WBS (不佔用當月請購預算)
+WBS_BUDGET_EXEMPT_PATTERN = r"^\d{2}FT0A\d{4}$"
+
+CUBE_KEYS = ["年月", "已開單", "有WBS", "WBS免預算"]
+
+
+def normalize_purchase_frame(df):
+    """
+    主表 -> 型別化欄位
+
+    年月: 已開單日期取數字前 8 碼,長度不足 8 碼視為無日期 ("")
+    金額: 總金額去除千分位後轉 float,無法轉換為 NaN
+    已開單: 開單狀態 == 'V'
+    有WBS: WBS 欄位非空白
+    WBS免預算: WBS 符合 ^\\d{2}FT0A\\d{4}$
+    """
+    def column(name):
+        if name in df.columns:
+            return df[name].fillna("").astype(str).str.strip()
+        return pd.Series("", index=df.index)
+
+    date_digits = column("已開單日期").str.replace(r"\D", "", regex=True).str[:8]
+    month = date_digits.str[:6].where(date_digits.str.len() == 8, "")
+
+    amount = pd.to_numeric(column("總金額").str.replace(",", "", regex=False), errors="coerce")
+
+    wbs = column("WBS")
+
+    return pd.DataFrame({
+        "年月": month,
+        "金額": amount,
+        "已開單": column("開單狀態") == "V",
+        "有WBS": wbs != "",
+        "WBS免預算": wbs.str.match(WBS_BUDGET_EXEMPT_PATTERN),
+    }, index=df.index)
+
+
+def build_cube(df):
+    """彙總為 (年月, 已開單, 有WBS, WBS免預算) -> 總額 / 筆數 / 有效金額筆數"""
+    typed = normalize_purchase_frame(df)
+    typed = typed[typed["年月"] != ""]
+    if typed.empty:
+        return pd.DataFrame(columns=CUBE_KEYS + ["總額", "筆數", "金額筆數"])
+
+    cube = typed.groupby(CUBE_KEYS).agg(
+        總額=("金額", "sum"),
+        筆數=("金額", "size"),
+        金額筆數=("金額", "count"),
+    )
+    return cube.reset_index()
+
+
+def month_range(start_month, end_month):
+    """'202502', '202504' -> ['2025-02', '2025-03', '2025-04']"""
+    months = []
+    current = start_month
+    while current <= end_month:
+        months.append(f"{current[:4]}-{current[4:]}")
+        year, month = int(current[:4]), int(current[4:])
+        month = month + 1 if month < 12 else 1
+        year = year + 1 if month == 1 else year
+        current = f"{year}{month:02d}"
+    return months
+
+
+class BudgetEngine:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self._signature = None
+        self._cube = None
+        self._lock = threading.Lock()
+
+    def cube(self):
+        """取得彙總表,主表變動時才重新計算"""
+        signature = table_store.signature(self.csv_path)
+        with self._lock:
+            if self._cube is None or signature != self._signature:
+                df = table_store.read(self.csv_path, copy=False)
+                self._cube = build_cube(df)
+                self._signature = signature
+            return self._cube
+
+    def ordered_total(self, year_month):
+        """指定月份已開單且佔用預算 (非免預算 WBS) 的總額"""
+        cube = self.cube()
+        mask = (cube["年月"] == year_month) & cube["已開單"] & ~cube["WBS免預算"]
+        return float(cube.loc[mask, "總額"].sum())
+
+    def ordered_totals_by_month(self):
+        """各月份已開單且佔用預算的總額 {'202505': 123.0, ...}"""
+        cube = self.cube()
+        mask = cube["已開單"] & ~cube["WBS免預算"]
+        return cube[mask].groupby("年月")["總額"].sum().to_dict()
+
+    def has_data(self):
+        return not self.cube().empty
+
+    def expense_summary(self, start_month, end_month):
+        """
+        月份區間內 正常 / WBS 花費彙總
+
+        回傳 None 表示區間內沒有資料,否則回傳
+        {'normal': {...}, 'wbs': {...}},各含 total / average / count / trend
+        """
+        cube = self.cube()
+        in_range = cube[(cube["年月"] >= start_month) & (cube["年月"] <= end_month)]
+        if int(in_range["筆數"].sum()) == 0:
+            return None
+
+        months = month_range(start_month, end_month)
+        summary = {}
+        for name, has_wbs in (("normal", False), ("wbs", True)):
+            part = in_range[in_range["有WBS"] == has_wbs]
+            monthly = part.groupby("年月")["總額"].sum()
+            total = float(part["總額"].sum())
+            valid = int(part["金額筆數"].sum())
+            summary[name] = {
+                "total": int(total),
+                "average": int(total / valid) if valid else 0,
+                "count": int(part["筆數"].sum()),
+                "trend": [
+                    {"month": m, "amount": int(monthly.get(m.replace("-", ""), 0))}
+                    for m in months
+                ],
+            }
+        return summary
@@ -0,0 +1,125 @@
+"""
+Buyer_detail 索引
+PO → 資料列、(PO, Item) → 資料列、ePR → PO,取代逐筆 str.contains / is_po_in_record 掃描
+
+- PO No. 欄位可能以 <br /> 串接多張 PO,建立索引時只拆解一次
+- Item 統一補成 4 碼 (10 → 0010,10.0 → 0010)
+- 索引值為 DataFrame 的 index label,可直接對同一份資料 (或其子集) 做 .loc 查詢
+"""
+import re
+import threading
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+
+pd = lazy_module("pandas")
+
+PO_SPLIT_PATTERN = r"<br\s*/?>"
+
+
+def split_po_numbers(value):
+    """'6100793959<br />6100793960' -> ['6100793959', '6100793960']"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    return [po.strip() for po in re.split(PO_SPLIT_PATTERN, str(value)) if po.strip()]
+
+
+def normalize_item(value):
+    """Item 補成 4 碼,非數字則原樣回傳"""
+    item = re.sub(r"\.0$", "", str(value).strip())
+    return item.zfill(4) if item.isdigit() else item
+
+
+def normalize_item_series(series):
+    item = series.fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return item.where(~item.str.isdigit(), item.str.zfill(4))
+
+
+class BuyerIndex:
+    def __init__(self, df):
+        self._build(df)
+
+    def _build(self, df):
+        if "PO No." not in df.columns or df.empty:
+            self.by_po, self.by_po_item, self.by_epr, self.epr_of_row = {}, {}, {}, {}
+            return
+
+        # 拆解多 PO 欄位: 每個 (row, PO) 一列,以位置對應回原本的 index label
+        po = (
+            df["PO No."].fillna("").astype(str).reset_index(drop=True)
+            .str.split(PO_SPLIT_PATTERN, regex=True)
+            .explode()
+            .str.strip()
+        )
+        po = po[po != ""]
+        positions = po.index.to_numpy()
+        pairs = pd.DataFrame({"label": df.index.to_numpy()[positions], "po": po.values})
+
+        if "Item" in df.columns:
+            pairs["item"] = normalize_item_series(df["Item"]).to_numpy()[positions]
+        else:
+            pairs["item"] = ""
+
+        if "ePR No." in df.columns:
+            epr = df["ePR No."].fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+            self.epr_of_row = epr[epr != ""].to_dict()
+            pairs["epr"] = epr.to_numpy()[positions]
+        else:
+            self.epr_of_row = {}
+            pairs["epr"] = ""
+
+        pairs = pairs.drop_duplicates(["label", "po"])
+        self.by_po = {k: list(v) for k, v in pairs.groupby("po", sort=False)["label"]}
+        self.by_po_item = {k: list(v) for k, v in pairs.groupby(["po", "item"], sort=False)["label"]}
+
+        epr_pairs = pairs[pairs["epr"] != ""].drop_duplicates(["epr", "po"])
+        self.by_epr = {k: list(v) for k, v in epr_pairs.groupby("epr", sort=False)["po"]}
+
+    # ---------- 查詢 ----------
+    def rows_for_po(self, po_no):
+        return self.by_po.get(str(po_no).strip(), [])
+
+    def rows_for_po_item(self, po_no, item):
+        return self.by_po_item.get((str(po_no).strip(), normalize_item(item)), [])
+
+    def pos_for_epr(self, epr_no):
+        return self.by_epr.get(str(epr_no).strip(), [])
+
+    def epr_for_po(self, po_no):
+        """PO 對應的第一個非空白 ePR No.,找不到回傳 None"""
+        for label in self.rows_for_po(po_no):
+            epr = self.epr_of_row.get(label)
+            if epr:
+                return epr
+        return None
+
+    def has_po(self, po_no):
+        return str(po_no).strip() in self.by_po
+
+    def select(self, frame, po_no, item=None):
+        """
+        從 frame (建立索引的資料或其子集) 取出指定 PO / (PO, Item) 的資料列
+        保留原本的列順序
+        """
+        labels = self.rows_for_po(po_no) if item is None else self.rows_for_po_item(po_no, item)
+        labels = [label for label in labels if label in frame.index]
+        return frame.loc[labels]
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def buyer_index(path):
+    """
+    取得檔案目前版本的索引 (與 table_store.read(path) 的 index label 一致)
+    檔案被寫入後下一次呼叫會重新建立
+    """
+    signature = table_store.signature(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != signature:
+            df = table_store.read(path, copy=False)
+            cached = (signature, BuyerIndex(df))
+            _cache[path] = cached
+        return cached[1]
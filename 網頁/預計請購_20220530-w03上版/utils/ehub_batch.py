@@ -0,0 +1,428 @@
+"""
+E-HUB 供應商承諾交期 (.xls) 批次匯入
+
+ERT驗收/01. E-HUB - 供應商承諾交期(Excel)/YYYY-MM/ 每天收到一份
+    sendMailforBadgeMailNoticeApproveESD_YYYYMMDDhhmmss_(Security C).xls
+原本要逐份貼到 E-HUB 頁面比對,這裡一次處理整個月份資料夾:
+
+- 只掃描月份資料夾本身 (不含子資料夾),檔名不符的檔案列在 ignored
+- 同一層較早月份資料夾中還沒匯入的檔案一起匯入;較晚月份還沒匯入的檔案也會解析,
+  只用來判斷承諾交期是否已過時 (補匯舊月份時不會把較新的承諾交期改回去),不套用也不記入 manifest
+- 新檔案以 ProcessPoolExecutor 平行解析 (只有一份時直接在目前 process 解析)
+- 每個 (PO, Item) 只保留最新的承諾交期: 依檔名時間戳排序 (檔名時間戳無效時改用表內 TimeStamp 列),
+  同一份檔案內以後面的列為準
+- 套用到 Buyer_detail.csv 的 Delivery Date 廠商承諾交期: 在檔案鎖內讀取一次、write_table 寫入一次
+- 同一 (PO, Item) 在 Buyer_detail 有多筆 (分批) 或找不到 (含已取消) 的資料不自動更新,
+  列在結果中,由 E-HUB 頁面的比對流程處理;這些承諾交期記在 manifest 的 pending,
+  之後每次執行都會再試一次 (例如 PO 之後才加進 Buyer_detail),
+  套用成功、已有較新的承諾交期或列入 pending 超過 PENDING_MAX_DAYS 天才移除
+- manifest 以 檔名 + sha256 記錄已匯入的檔案,內容沒變就略過;
+  另記錄每個 (PO, Item) 已套用的時間戳,之後才補進來的舊檔不會蓋掉較新的承諾交期
+
+用法 (在 預計請購 目錄下):
+    python -m utils.ehub_batch "../../ERT驗收(更新RT金額與驗收Mail)/01. E-HUB - 供應商承諾交期(Excel)/2025-08"
+    python -m utils.ehub_batch <月份資料夾> --dry-run      # 只比對,不寫入
+    python -m utils.ehub_batch <月份資料夾> --force        # 重新解析已匯入的檔案 (仍不會蓋掉較新的承諾交期)
+"""
+import os
+import re
+import json
+import argparse
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from filelock import FileLock
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store, read_table, write_table
+from utils.buyer_index import buyer_index
+from utils.attachment_store import file_sha256
+from utils.ehub_ingest import PO_COLUMN, ITEM_COLUMN, normalize_po_items
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUYER_FILE = "static/data/Buyer_detail.csv"
+MANIFEST_FILE = "static/data/log/ehub_manifest.json"
+MAX_WORKERS = 8
+PENDING_MAX_DAYS = 180
+
+FILE_PATTERN = re.compile(r"^sendMailforBadgeMailNoticeApproveESD_(\d{14})_.*\.xls$", re.IGNORECASE)
+SHEET_TIME_PATTERN = re.compile(r"TimeStamp\s*:\s*(\d{4}/\d{2}/\d{2} \d{2}:\d{2})")
+TIME_FORMAT = "%Y%m%d%H%M%S"
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+DELIVERY_COLUMN = "Delivery Date 廠商承諾交期"
+QTY_COLUMN = "SOD Qty 廠商承諾數量"
+DESC_COLUMN = "Description 品名"
+# .xls 表頭為「英文\n中文」,部分英文拼錯,統一成 E-HUB 頁面上傳時的欄名
+COLUMN_FIXES = {
+    "SOD Qtyr 廠商承諾數量": QTY_COLUMN,
+    "Delievery Date 廠商承諾交期": DELIVERY_COLUMN,
+}
+
+
+# ---------- 解析 (在子 process 執行,只回傳可 pickle 的基本型別) ----------
+def _column_name(value):
+    return " ".join(str(value).split())
+
+
+def parse_file(path):
+    """
+    解析一份 E-HUB .xls
+    回傳 {"sheet_time": 表內 TimeStamp (YYYYmmddHHMMSS 或 None),
+          "rows": [(PO, Item, 承諾交期, 承諾數量, 品名), ...] (依表內順序)}
+    """
+    raw = pd.read_excel(path, dtype=str, header=None).fillna("")
+
+    sheet_time = None
+    first_column = raw.iloc[:, 0].astype(str)
+    for value in first_column:
+        match = SHEET_TIME_PATTERN.search(value)
+        if match:
+            sheet_time = datetime.strptime(match.group(1), "%Y/%m/%d %H:%M").strftime(TIME_FORMAT)
+            break
+
+    header_rows = raw.index[first_column.str.strip().str.startswith("PO NO")]
+    if len(header_rows) == 0:
+        raise ValueError("找不到 PO NO 表頭")
+    header = header_rows[0]
+
+    df = raw.loc[header + 1:].copy()
+    df.columns = [COLUMN_FIXES.get(name, name) for name in map(_column_name, raw.loc[header])]
+    missing = [col for col in (PO_COLUMN, ITEM_COLUMN, DELIVERY_COLUMN) if col not in df.columns]
+    if missing:
+        raise ValueError(f"缺少欄位: {', '.join(missing)}")
+
+    df[PO_COLUMN] = df[PO_COLUMN].str.strip()
+    df = df[df[PO_COLUMN] != ""]
+    df[ITEM_COLUMN] = normalize_po_items(df[ITEM_COLUMN])
+    for col in (QTY_COLUMN, DESC_COLUMN):
+        if col not in df.columns:
+            df[col] = ""
+
+    rows = list(zip(
+        df[PO_COLUMN],
+        df[ITEM_COLUMN],
+        df[DELIVERY_COLUMN].str.strip(),
+        df[QTY_COLUMN].str.strip(),
+        df[DESC_COLUMN].str.strip(),
+    ))
+    return {"sheet_time": sheet_time, "rows": rows}
+
+
+def file_time(name, now=None):
+    """檔名中的時間戳 (YYYYmmddHHMMSS);格式錯誤或晚於現在 (例如 9025…) 時回傳 None"""
+    match = FILE_PATTERN.match(name)
+    if not match:
+        return None
+    try:
+        stamp = datetime.strptime(match.group(1), TIME_FORMAT)
+    except ValueError:
+        return None
+    if stamp > (now or datetime.now()) + timedelta(days=1):
+        return None
+    return match.group(1)
+
+
+def month_folders(folder):
+    """
+    folder 為 YYYY-MM 月份資料夾時,回傳同一層的 (不晚於 folder 的月份資料夾, 較晚的月份資料夾),依月份排序;
+    其他資料夾回傳 ([folder], [])
+    """
+    folder = os.path.normpath(folder)
+    root, month = os.path.split(folder)
+    if not MONTH_PATTERN.match(month):
+        return [folder], []
+    months = sorted(name for name in os.listdir(root or ".")
+                    if MONTH_PATTERN.match(name) and os.path.isdir(os.path.join(root, name)))
+    earlier = [os.path.join(root, name) for name in months if name <= month]
+    later = [os.path.join(root, name) for name in months if name > month]
+    return earlier, later
+
+
+def scan_folder(folder):
+    """回傳 (符合檔名的 .xls 路徑, 略過的項目名稱),依檔名排序"""
+    files, ignored = [], []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path) and FILE_PATTERN.match(name):
+            files.append(path)
+        else:
+            ignored.append(name)
+    return files, ignored
+
+
+class EhubBatchImporter:
+    def __init__(self, buyer_file=DEFAULT_BUYER_FILE, manifest_file=MANIFEST_FILE):
+        self.buyer_file = buyer_file
+        self.manifest_file = manifest_file
+
+    # ---------- manifest ----------
+    def _manifest_lock(self):
+        return FileLock(f"{self.manifest_file}.lock", timeout=10)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ E-HUB manifest 讀取失敗 {self.manifest_file}: {e}")
+            manifest = {}
+        manifest.setdefault("files", {})
+        manifest.setdefault("applied", {})
+        manifest.setdefault("pending", {})
+        return manifest
+
+    def _save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_file) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_file)
+
+    # ---------- 解析 ----------
+    @staticmethod
+    def _parse_all(paths, workers=None):
+        """平行解析,回傳 {path: 結果或 Exception}"""
+        results = {}
+        workers = min(len(paths), workers or os.cpu_count() or 1, MAX_WORKERS)
+        if workers <= 1:
+            for path in paths:
+                try:
+                    results[path] = parse_file(path)
+                except Exception as e:
+                    results[path] = e
+            return results
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(parse_file, path) for path in paths}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    results[path] = e
+        return results
+
+    @staticmethod
+    def latest_commitments(parsed):
+        """
+        parsed: [(時間戳, 檔名, rows)]
+        回傳 {(PO, Item): {"time", "file", "delivery", "qty", "desc"}},每個 key 只留最新的一筆
+        """
+        latest = {}
+        for stamp, name, rows in sorted(parsed, key=lambda entry: (entry[0], entry[1])):
+            for po_no, item, delivery, qty, desc in rows:
+                latest[(po_no, item)] = {"time": stamp, "file": name, "delivery": delivery, "qty": qty, "desc": desc}
+        return latest
+
+    @staticmethod
+    def merge_pending(latest, pending, now=None):
+        """
+        把上次沒套用 (分批 / 找不到) 的承諾交期加回 latest (新解析的檔案較新時以新檔為準)
+        回傳 (重新嘗試的筆數, 列入 pending 超過 PENDING_MAX_DAYS 而放棄的 key)
+        """
+        oldest = ((now or datetime.now()) - timedelta(days=PENDING_MAX_DAYS)).strftime(TIME_FORMAT)
+        retried, expired = 0, []
+        for joined, entry in pending.items():
+            if entry["since"] < oldest:
+                expired.append(joined)
+                continue
+            key = tuple(joined.split("|", 1))
+            commitment = {name: entry[name] for name in ("time", "file", "delivery", "qty", "desc")}
+            current = latest.get(key)
+            if current is None or (commitment["time"], commitment["file"]) > (current["time"], current["file"]):
+                latest[key] = commitment
+                retried += 1
+        return retried, expired
+
+    # ---------- 套用 ----------
+    def _apply(self, latest, dry_run):
+        """在檔案鎖內讀取一次 Buyer_detail,比對後一次寫入;回傳 (updated, unchanged, split, missing)"""
+        updated, unchanged, split, missing = [], [], [], []
+
+        with table_store.lock(self.buyer_file):
+            df_buyer = read_table(self.buyer_file)
+            index = buyer_index(self.buyer_file)
+            status = df_buyer["開單狀態"].fillna("").astype(str).str.strip() if "開單狀態" in df_buyer.columns else None
+            if DELIVERY_COLUMN not in df_buyer.columns:
+                df_buyer[DELIVERY_COLUMN] = ""
+
+            for (po_no, item), commitment in latest.items():
+                entry = {"po_no": po_no, "item": item, "delivery_date": commitment["delivery"],
+                         "sod_qty": commitment["qty"], "po_description": commitment["desc"], "file": commitment["file"]}
+                labels = [label for label in index.rows_for_po_item(po_no, item)
+                          if status is None or status.at[label] != "X"]
+                if not labels:
+                    missing.append(entry)
+                    continue
+                if len(labels) > 1:
+                    split.append({**entry, "ids": [str(df_buyer.at[label, "Id"]) for label in labels]})
+                    continue
+
+                label = labels[0]
+                current = df_buyer.at[label, DELIVERY_COLUMN]
+                current = "" if pd.isna(current) else str(current).strip()
+                entry["id"] = str(df_buyer.at[label, "Id"])
+                if current == commitment["delivery"]:
+                    unchanged.append(entry)
+                    continue
+                df_buyer.at[label, DELIVERY_COLUMN] = commitment["delivery"]
+                updated.append({**entry, "old_delivery_date": current})
+
+            if updated and not dry_run:
+                write_table(df_buyer, self.buyer_file)
+                logger.info(f"💾 E-HUB 批次匯入: 更新 {len(updated)} 筆承諾交期")
+
+        return updated, unchanged, split, missing
+
+    # ---------- 主流程 ----------
+    def ingest(self, folder, dry_run=False, force=False, workers=None):
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"找不到資料夾: {folder}")
+
+        with self._manifest_lock():
+            manifest = self.load_manifest()
+            files, ignored = scan_folder(folder)
+            earlier, later = month_folders(folder)
+
+            # 不晚於本月的月份資料夾中尚未匯入的檔案一起解析、套用;
+            # 較晚月份尚未匯入的檔案只用來判斷承諾交期是否已過時,不套用也不記入 manifest
+            pending, guards, skipped = {}, {}, []
+            for month_folder in earlier + later:
+                is_current = month_folder == os.path.normpath(folder)
+                is_later = month_folder in later
+                for path in files if is_current else scan_folder(month_folder)[0]:
+                    name = os.path.basename(path)
+                    sha256 = file_sha256(path)
+                    if manifest["files"].get(name, {}).get("sha256") == sha256 and not (force and is_current):
+                        if is_current:
+                            skipped.append(name)
+                    elif is_later:
+                        guards[path] = sha256
+                    else:
+                        pending[path] = sha256
+            logger.info(
+                f"📂 E-HUB {folder}: {len(files)} 份, 新檔案 {len(pending)} 份 (含較早月份), "
+                f"已匯入略過 {len(skipped)} 份, 較晚月份未匯入 {len(guards)} 份"
+            )
+
+            parsed, guard_parsed, errors, file_entries = [], [], [], {}
+            for path, result in self._parse_all(list(pending) + list(guards), workers).items():
+                name = os.path.basename(path)
+                if isinstance(result, Exception):
+                    errors.append({"file": name, "msg": str(result)})
+                    logger.warning(f"⚠️ E-HUB 解析失敗 {name}: {result}")
+                    continue
+                stamp = file_time(name) or result["sheet_time"]
+                if stamp is None:
+                    errors.append({"file": name, "msg": "無法判斷檔案時間"})
+                    continue
+                if path in guards:
+                    guard_parsed.append((stamp, name, result["rows"]))
+                    continue
+                parsed.append((stamp, name, result["rows"]))
+                file_entries[name] = {
+                    "sha256": pending[path],
+                    "time": stamp,
+                    "rows": len(result["rows"]),
+                    "folder": os.path.basename(os.path.dirname(path)),
+                }
+
+            candidates = self.latest_commitments(parsed)
+            retried, expired = self.merge_pending(candidates, manifest["pending"])
+            newer = self.latest_commitments(guard_parsed)
+
+            # 已套用過、或較晚月份有較新 (或同一份) 承諾交期的 (PO, Item) 不再處理
+            latest, stale, stale_keys = {}, 0, []
+            for key, commitment in candidates.items():
+                applied = manifest["applied"].get("|".join(key))
+                if (applied and applied > commitment["time"]) or (key in newer and newer[key]["time"] > commitment["time"]):
+                    stale += 1
+                    stale_keys.append("|".join(key))
+                else:
+                    latest[key] = commitment
+
+            updated, unchanged, split, missing = self._apply(latest, dry_run) if latest else ([], [], [], [])
+
+            if not dry_run:
+                now = datetime.now()
+                ingested_at = now.strftime("%Y-%m-%d %H:%M:%S")
+                pending = manifest["pending"]
+                pending_before = dict(pending)
+                for name, entry in file_entries.items():
+                    manifest["files"][name] = {**entry, "ingested_at": ingested_at}
+                for entry in updated + unchanged:
+                    key = (entry["po_no"], entry["item"])
+                    manifest["applied"]["|".join(key)] = latest[key]["time"]
+                    pending.pop("|".join(key), None)
+                # 已有較新承諾交期或太久的不再保留;分批 / 找不到的下次再試
+                for joined in stale_keys + expired:
+                    pending.pop(joined, None)
+                for entry in split + missing:
+                    joined = "|".join((entry["po_no"], entry["item"]))
+                    since = pending.get(joined, {}).get("since") or now.strftime(TIME_FORMAT)
+                    pending[joined] = {**latest[(entry["po_no"], entry["item"])], "since": since}
+                if file_entries or pending != pending_before:
+                    self._save_manifest(manifest)
+
+        logger.info(
+            f"✅ E-HUB 批次匯入{' (試算)' if dry_run else ''}: 解析 {len(parsed)} 份, {len(latest)} 組 (PO, Item), "
+            f"更新 {len(updated)}, 相同 {len(unchanged)}, 分批 {len(split)}, 找不到 {len(missing)}, 舊資料 {stale}, "
+            f"重試先前未套用 {retried}"
+        )
+        return {
+            "status": "ok",
+            "dry_run": dry_run,
+            "folder": folder,
+            "files": len(files),
+            "parsed": sorted(file_entries),
+            "later": sorted(name for _, name, _ in guard_parsed),
+            "skipped": skipped,
+            "ignored": ignored,
+            "errors": errors,
+            "commitments": len(latest),
+            "stale": stale,
+            "updated": updated,
+            "unchanged": len(unchanged),
+            "split": split,
+            "missing": missing,
+            "retried": retried,
+        }
+
+
+# 建立全域實例
+ehub_batch_importer = EhubBatchImporter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="E-HUB 供應商承諾交期 .xls 批次匯入 Buyer_detail.csv")
+    parser.add_argument("folder", help="月份資料夾 (例如 .../01. E-HUB - 供應商承諾交期(Excel)/2025-08)")
+    parser.add_argument("--dry-run", action="store_true", help="只比對,不寫入 Buyer_detail.csv 與 manifest")
+    parser.add_argument("--force", action="store_true", help="重新解析已匯入的檔案")
+    parser.add_argument("--workers", type=int, help=f"解析用的 process 數 (預設 CPU 數,最多 {MAX_WORKERS})")
+    parser.add_argument("--buyer-file", default=DEFAULT_BUYER_FILE)
+    parser.add_argument("--manifest", default=MANIFEST_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    importer = EhubBatchImporter(args.buyer_file, args.manifest)
+    result = importer.ingest(args.folder, dry_run=args.dry_run, force=args.force, workers=args.workers)
+
+    print(f"檔案 {result['files']} 份: 解析 {len(result['parsed'])}, 略過 {len(result['skipped'])}, 失敗 {len(result['errors'])}, "
+          f"較晚月份未匯入 {len(result['later'])}")
+    print(f"(PO, Item) {result['commitments']} 組: 更新 {len(result['updated'])}, 相同 {result['unchanged']}, "
+          f"分批 {len(result['split'])}, 找不到 {len(result['missing'])}, 舊資料 {result['stale']}, "
+          f"重試先前未套用 {result['retried']}")
+    for entry in result["updated"]:
+        print(f"  {entry['id']}  {entry['po_no']}-{entry['item']}: {entry['old_delivery_date'] or '(空白)'} → {entry['delivery_date']}")
+    for entry in result["errors"]:
+        print(f"  ❌ {entry['file']}: {entry['msg']}")
+
+
+if __name__ == "__main__":
+    main()
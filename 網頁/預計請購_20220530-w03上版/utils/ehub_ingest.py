@@ -0,0 +1,77 @@
+"""
+E-HUB 供應商承諾交期資料匯入
+上傳內容只解析一次,在記憶體中依 PO 分組後直接交給比對流程;
+需要留存稽核時才把各 PO 分組寫到 uploads/audit/{上傳時間}/{po_no}.csv
+
+留存稽核檔 (兩種方式擇一):
+- 伺服器啟動前設定環境變數 EHUB_KEEP_UPLOADS=1,之後每次 /api/save_csv 都會留存
+- 單次上傳在 /api/save_csv 的 JSON 加上 "keep_temp_files": true
+稽核檔與後續步驟 (confirm_quantity_update / confirm_merge / save_override_all)
+清理的 uploads/{po_no}.csv 分開存放,不會被刪除
+"""
+import os
+import logging
+from datetime import datetime
+from io import StringIO
+
+from utils.lazy_import import lazy_module
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+PO_COLUMN = "PO NO 採購單號碼"
+ITEM_COLUMN = "PO Item 採購單項次"
+AUDIT_DIR = "uploads/audit"
+KEEP_UPLOADS_ENV = "EHUB_KEEP_UPLOADS"
+
+
+def normalize_po_items(series):
+    """
+    PO Item 一律補成 4 碼
+    '10' / '10.0' -> '0010',其他內容只做 strip 後補齊長度 (與原本 str.zfill(4) 相同)
+    """
+    item = series.fillna("").astype(str).str.strip()
+    numeric = item.str.replace(".", "", n=1, regex=False).str.isdigit()
+    as_number = pd.to_numeric(item.where(numeric), errors="coerce").dropna()
+    item.loc[as_number.index] = as_number.astype("int64").astype(str)
+    return item.str.zfill(4)
+
+
+def parse_ehub_content(content):
+    """解析上傳的 CSV 內容 (全部欄位為字串,空值為 '')"""
+    df = pd.read_csv(StringIO(content), dtype=str).fillna("")
+    if ITEM_COLUMN in df.columns:
+        df[ITEM_COLUMN] = normalize_po_items(df[ITEM_COLUMN])
+    return df
+
+
+def group_by_po(df):
+    """依 PO 分組 (保留第一次出現的順序),略過空白 PO"""
+    po_key = df[PO_COLUMN].astype(str).str.strip()
+    return [
+        (po_no, group)
+        for po_no, group in df.groupby(po_key, sort=False)
+        if po_no
+    ]
+
+
+def keep_uploads_enabled():
+    """環境變數 EHUB_KEEP_UPLOADS=1 時,每次上傳都留存稽核檔"""
+    return os.environ.get(KEEP_UPLOADS_ENV, "") in ("1", "true", "yes")
+
+
+def save_group_files(po_groups, folder=AUDIT_DIR):
+    """
+    將各 PO 分組寫入 uploads/audit/{上傳時間}/{po_no}.csv (稽核用),回傳寫入的檔案清單
+    每次上傳一個資料夾,同一張 PO 之後再上傳也不會覆蓋先前的稽核檔
+    """
+    folder = os.path.join(folder, datetime.now().strftime("%Y%m%d_%H%M%S_%f"))
+    os.makedirs(folder, exist_ok=True)
+    saved = []
+    for po_no, group in po_groups:
+        path = f"{folder}/{po_no}.csv"
+        group.to_csv(path, index=False, encoding="utf-8-sig")
+        saved.append(path)
+        logger.info(f"✅ 已儲存 {path} ({len(group)} 筆資料)")
+    return saved
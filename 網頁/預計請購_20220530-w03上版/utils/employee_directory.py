@@ -0,0 +1,148 @@
+"""
+員工名冊快取 (Backend_data.json)
+
+以 工號 / 姓名 / Notes_ID 建立索引,只在檔案 mtime 變動時重新讀取;
+姓名標準化 (例如 郭任? → 郭任群) 也集中在這裡處理
+"""
+import os
+import re
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DATA_FILE = "Backend_data.json"
+
+# 已知的亂碼姓名: (開頭, 長度, 正確姓名)
+NAME_FIXES = [
+    ("郭任", 3, "郭任群"),
+]
+GARBLED_CHARS = "?？�"
+
+
+def _clean(value):
+    return str(value or "").strip()
+
+
+class EmployeeDirectory:
+    def __init__(self, path=BACKEND_DATA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_notes = {}
+
+    # ---------- 載入 ----------
+    def _load(self):
+        """檔案有變動才重新建立索引"""
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r", encoding="utf-8-sig") as f:
+                entries = json.load(f)
+
+            by_id, by_name, by_notes = {}, {}, {}
+            for entry in entries:
+                # 重複時保留第一筆 (與原本逐筆搜尋的結果相同)
+                by_id.setdefault(_clean(entry.get("工號")), entry)
+                by_name.setdefault(_clean(entry.get("姓名")), entry)
+                notes_id = _clean(entry.get("Notes_ID")).lower()
+                if notes_id:
+                    by_notes.setdefault(notes_id, entry)
+
+            self._entries, self._by_id, self._by_name, self._by_notes = entries, by_id, by_name, by_notes
+            self._mtime = mtime
+            logger.info(f"📇 載入員工名冊 {self.path}: {len(entries)} 筆")
+
+    def entries(self):
+        self._load()
+        return self._entries
+
+    # ---------- 查詢 ----------
+    def find_by_id(self, emp_id):
+        emp_id = _clean(emp_id)
+        if not emp_id:
+            return None
+        self._load()
+        return self._by_id.get(emp_id)
+
+    def find_by_name(self, name):
+        name = _clean(name)
+        if not name:
+            return None
+        self._load()
+        return self._by_name.get(name) or self._by_name.get(self.normalize_name(name))
+
+    def find_by_notes(self, notes_id):
+        notes_id = _clean(notes_id).lower()
+        if not notes_id:
+            return None
+        self._load()
+        return self._by_notes.get(notes_id)
+
+    def notes_id(self, name):
+        """姓名 → Notes_ID,找不到回傳空字串"""
+        entry = self.find_by_name(name)
+        return entry.get("Notes_ID", "") if entry else ""
+
+    def admin_ids(self, column="請購網頁後台"):
+        """指定後台權限為 O 的工號 (依名冊順序、不重複)"""
+        return list(dict.fromkeys(
+            _clean(entry.get("工號")) for entry in self.entries() if entry.get(column) == "O"
+        ))
+
+    # ---------- 姓名標準化 ----------
+    def normalize_name(self, name):
+        """標準化姓名，處理特殊字符問題"""
+        if name is None or (isinstance(name, float) and name != name):
+            return name
+        name_str = str(name).strip()
+        if not name_str:
+            return name_str
+
+        for prefix, length, fixed in NAME_FIXES:
+            if name_str.startswith(prefix) and len(name_str) == length and name_str != fixed:
+                logger.info(f"姓名修正: '{name_str}' -> '{fixed}'")
+                return fixed
+
+        # 含亂碼字元時,比對名冊中唯一符合的姓名
+        if any(ch in GARBLED_CHARS for ch in name_str):
+            try:
+                self._load()
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 無法讀取員工名冊 {self.path}: {e}")
+                return name_str
+            pattern = re.compile("".join(
+                "." if ch in GARBLED_CHARS else re.escape(ch) for ch in name_str
+            ) + "$")
+            candidates = [known for known in self._by_name if pattern.match(known)]
+            if len(candidates) == 1:
+                logger.info(f"姓名修正: '{name_str}' -> '{candidates[0]}'")
+                return candidates[0]
+
+        return name_str
+
+
+_directories = {}
+_directories_lock = threading.Lock()
+
+
+def employee_directory(path=BACKEND_DATA_FILE):
+    """同一個檔案共用一份快取"""
+    key = os.path.normcase(os.path.abspath(path))
+    with _directories_lock:
+        directory = _directories.get(key)
+        if directory is None:
+            directory = EmployeeDirectory(path)
+            _directories[key] = directory
+        return directory
+
+
+def normalize_name(name):
+    return employee_directory().normalize_name(name)
@@ -0,0 +1,146 @@
+"""
+未入帳 / 下月承諾交期金額預估 (Buyer_detail)
+
+- 計算金額: RT總金額 → 總價 → 數量 × 單價,整欄向量化計算一次
+- 承諾交期統一轉成 yyyymmdd 整數 (無法解析為 0)
+- 依檔案版本快取整理後的資料,任意區間 (到今天為止 / 下個月 / 自訂起訖) 都只做篩選
+- 網頁 API 與 static/data 底下的離線腳本共用這裡的規則
+"""
+import threading
+import logging
+from datetime import date, timedelta
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_COLUMN = "Delivery Date 廠商承諾交期"
+AMOUNT_COLUMN = "計算金額"
+DATE_COLUMN = "交期"
+# 合理的承諾交期年份;沒有年份 ('9/4' 會被解析成西元 1 年) 或打錯的年份一律視為無法解析
+MIN_YEAR = 2000
+MAX_YEAR = 2100
+
+
+def _text(df, col):
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str).str.strip()
+
+
+def _number(text, noise=r"[,$]"):
+    """'1,234' / '$1,234' → 1234.0,無法轉換為 NaN"""
+    return pd.to_numeric(text.str.replace(noise, "", regex=True).str.strip(), errors="coerce")
+
+
+def effective_amount(df):
+    """
+    計算金額 (與原本逐列 calc_amount 相同規則):
+    - RT總金額 有值 → RT總金額
+    - 否則 總價 有值 → 總價
+    - 否則 數量 × 單價 (空白視為 0)
+    選到的欄位無法轉換成數字時為 0
+    """
+    rt_text = _text(df, "RT總金額")
+    total_text = _text(df, "總價")
+    qty_text = _text(df, "數量").mask(lambda s: s == "", "0")
+    price_text = _text(df, "單價").mask(lambda s: s == "", "0")
+
+    qty_price = (_number(qty_text, ",") * _number(price_text, ",")).fillna(0.0)
+    amount = np.where(
+        rt_text != "",
+        _number(rt_text).fillna(0.0),
+        np.where(total_text != "", _number(total_text).fillna(0.0), qty_price),
+    )
+    return pd.Series(amount, index=df.index, dtype=float)
+
+
+def delivery_dates(series):
+    """
+    承諾交期 → yyyymmdd 整數,'2025/09/04'、'2025-9-4'、'20250904' 皆可
+    無法解析、沒有年份 ('9/4') 或年份不在 MIN_YEAR ~ MAX_YEAR 之間為 0
+    """
+    text = series.fillna("").astype(str).str.strip()
+    compact = text.str.replace(r"[/-]", "", regex=True)
+    result = pd.to_numeric(compact.where(compact.str.fullmatch(r"\d{8}")), errors="coerce")
+
+    # 月 / 日只有一位數等其他格式
+    other = result.isna() & (text != "")
+    if other.any():
+        dates = pd.to_datetime(text[other], errors="coerce", format="mixed")
+        result.loc[other] = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+
+    in_range = result.between(MIN_YEAR * 10000 + 101, MAX_YEAR * 10000 + 1231)
+    return result.where(in_range).fillna(0).astype(int)
+
+
+def date_int(value):
+    """date / 'YYYYMMDD' / 'YYYY-MM-DD' → yyyymmdd 整數"""
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    return int(str(value).strip().replace("-", "").replace("/", ""))
+
+
+def next_month_range(today=None):
+    """下個月的 (第一天, 最後一天),yyyymmdd 整數"""
+    today = today or date.today()
+    first = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return date_int(first), date_int(last)
+
+
+def prepare(df):
+    """原始欄位 (字串) + 計算金額 + 交期 + 篩選用旗標"""
+    frame = df.fillna("").copy()
+    frame[AMOUNT_COLUMN] = effective_amount(frame)
+    frame[DATE_COLUMN] = delivery_dates(_text(frame, DELIVERY_COLUMN))
+    frame["未開發票"] = _text(frame, "發票月份") == ""
+    frame["無WBS"] = _text(frame, "WBS") == ""
+    return frame
+
+
+class AmountForecast:
+    def __init__(self, buyer_path):
+        self.buyer_path = buyer_path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._frame = None
+
+    def frame(self):
+        """整理後的 Buyer_detail,檔案沒有變動時直接使用快取 (不可修改)"""
+        signature = table_store.signature(self.buyer_path)
+        with self._lock:
+            if self._frame is None or signature != self._signature:
+                self._frame = prepare(table_store.read(self.buyer_path, copy=False))
+                self._signature = signature
+                logger.info(f"📈 預估金額資料重建: {len(self._frame)} 筆")
+            return self._frame
+
+    def window(self, start=None, end=None, exclude_wbs=True):
+        """
+        承諾交期落在 [start, end] (yyyymmdd,可省略一端)、尚未開發票的資料
+        回傳 (篩選後的資料, 合計金額)
+        """
+        frame = self.frame()
+        mask = (frame[DATE_COLUMN] > 0) & frame["未開發票"]
+        if start is not None:
+            mask &= frame[DATE_COLUMN] >= date_int(start)
+        if end is not None:
+            mask &= frame[DATE_COLUMN] <= date_int(end)
+        if exclude_wbs:
+            mask &= frame["無WBS"]
+        rows = frame[mask]
+        return rows, float(rows[AMOUNT_COLUMN].sum())
+
+    def unaccounted(self, today=None, exclude_wbs=True):
+        """承諾交期已到 (<= 今天) 但尚未開發票"""
+        return self.window(end=today or date.today(), exclude_wbs=exclude_wbs)
+
+    def next_month(self, today=None, exclude_wbs=True):
+        """承諾交期落在下個月、尚未開發票"""
+        start, end = next_month_range(today)
+        return self.window(start, end, exclude_wbs=exclude_wbs)
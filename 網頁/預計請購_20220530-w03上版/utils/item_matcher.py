@@ -0,0 +1,139 @@
+"""
+品名相似度比對 (save_override_all Version 31 使用)
+
+分數與原本的 SequenceMatcher(None, 新品名, 舊品名).ratio() * 100 完全相同,差別在於:
+- 清理後的文字、字元組成與比對結果都有快取,同一批上傳重複出現的品名不再重算
+- 以字元組成計算相似度上限 (等同 SequenceMatcher.quick_ratio),
+  上限不可能進入前幾名的候選直接略過,不做完整比對
+- 同一個舊品名的 SequenceMatcher 會重複使用 (seq2 的索引只建立一次)
+"""
+import threading
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+
+
+def clean_text(x):
+    """清理文字：移除換行和空白"""
+    return str(x).replace("\n", "").replace("\r", "").strip()
+
+
+class _LRU(OrderedDict):
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get_or_set(self, key, factory):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = factory()
+        self[key] = value
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+
+class ItemMatcher:
+    def __init__(self, cache_size=4096):
+        self._lock = threading.Lock()
+        self._normalized = _LRU(cache_size)
+        self._counters = _LRU(cache_size)
+        self._matchers = _LRU(cache_size)
+        self._scores = _LRU(cache_size * 4)
+
+    # ---------- 快取 ----------
+    def normalize(self, text):
+        return self._normalized.get_or_set(text, lambda: clean_text(text).lower())
+
+    def _counter(self, normalized):
+        return self._counters.get_or_set(normalized, lambda: Counter(normalized))
+
+    def _matcher(self, normalized):
+        def build():
+            matcher = SequenceMatcher(None)
+            matcher.set_seq2(normalized)
+            return matcher
+        return self._matchers.get_or_set(normalized, build)
+
+    # ---------- 分數 ----------
+    def _upper_bound(self, a, b):
+        """SequenceMatcher.ratio() 的上限 (0-100),只看字元組成"""
+        total = len(a) + len(b)
+        if not total:
+            return 100.0
+        ca, cb = self._counter(a), self._counter(b)
+        if len(ca) > len(cb):
+            ca, cb = cb, ca
+        matches = sum(min(n, cb[ch]) for ch, n in ca.items())
+        return 200.0 * matches / total
+
+    def _exact(self, a, b):
+        def compute():
+            if a == b:
+                return 100.0
+            matcher = self._matcher(b)
+            matcher.set_seq1(a)
+            return matcher.ratio() * 100
+        return self._scores.get_or_set((a, b), compute)
+
+    def similarity(self, text1, text2):
+        """計算兩個字串的相似度 (0-100)"""
+        with self._lock:
+            return self._exact(self.normalize(text1), self.normalize(text2))
+
+    def score_candidates(self, new_desc, item_new, candidates, keep=5):
+        """
+        對同 PO 的候選資料計算品名相似度
+
+        candidates: 可迭代的 (index, item, desc, delivery_date)
+        回傳與原本 similarity_scores 相同格式的 list (依候選原順序):
+            {'index', 'item', 'desc', 'similarity', 'item_match', 'delivery_date'}
+
+        Item 相同的候選一定完整計算;其他候選只保留可能進入前 keep 名的。
+        相同 Item 有多筆時 (原流程不再排序其餘候選) 全部完整計算。
+        """
+        candidates = [
+            {
+                'index': index,
+                'item': item,
+                'desc': desc,
+                'item_match': (item == item_new),
+                'delivery_date': delivery_date,
+            }
+            for index, item, desc, delivery_date in candidates
+        ]
+        prune = sum(1 for c in candidates if c['item_match']) <= 1
+
+        with self._lock:
+            new_norm = self.normalize(new_desc)
+
+            # 候選不超過 keep 筆時不需要上限篩選
+            if not prune or len(candidates) <= keep:
+                for c in candidates:
+                    c['similarity'] = self._exact(new_norm, self.normalize(c['desc']))
+                return candidates
+
+            others = []
+            for position, c in enumerate(candidates):
+                desc_norm = self.normalize(c['desc'])
+                if c['item_match']:
+                    c['similarity'] = self._exact(new_norm, desc_norm)
+                else:
+                    others.append((self._upper_bound(new_norm, desc_norm), position, desc_norm))
+
+            # 依上限由高到低完整計算,直到剩下的候選上限都低於目前第 keep 名
+            others.sort(key=lambda x: x[0], reverse=True)
+            top = []
+            for bound, position, desc_norm in others:
+                if len(top) >= keep and bound < top[keep - 1]:
+                    break
+                score = self._exact(new_norm, desc_norm)
+                candidates[position]['similarity'] = score
+                top.append(score)
+                top.sort(reverse=True)
+
+        return [c for c in candidates if 'similarity' in c]
+
+
+# 建立全域實例
+item_matcher = ItemMatcher()
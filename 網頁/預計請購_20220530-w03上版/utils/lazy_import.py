@@ -0,0 +1,59 @@
+"""
+延遲匯入: 第一次用到模組的屬性時才真正 import
+
+pandas / numpy / bs4 / ldap3 載入就要數百 ms,服務啟動時不需要它們;
+改成 lazy_module 後,啟動只註冊路由,第一個用到的請求才載入。
+    pd = lazy_module("pandas")
+    pd.read_csv(...)          # 這時才 import pandas
+
+tests/test_cold_start.py 會檢查啟動時沒有載入這些模組。
+"""
+import sys
+import importlib
+import threading
+
+# 啟動時不應載入的模組 (tests/test_cold_start.py、bench/bench_cold_start.py 使用)
+HEAVY_MODULES = ("pandas", "numpy", "bs4", "ldap3")
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr):
+        # 每次都向真正的模組取屬性,其他地方替換的函式 (例如 pd.read_csv 計時) 也會生效
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    """已經載入過就直接回傳模組本身,否則回傳第一次使用時才載入的代理物件"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
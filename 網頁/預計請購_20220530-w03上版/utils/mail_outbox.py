@@ -0,0 +1,286 @@
+"""
+郵件寄送佇列 (outbox)
+
+API 只負責組信並寫入 SQLite 佇列後立即回應,由背景執行緒寄送:
+- 同一批次、同一台 SMTP 主機共用一條連線
+- 寄送失敗依次數退避重試 (30s, 60s, 120s ... 最多 30 分鐘),超過次數標記 failed
+- 佇列存在 static/data/log/mail_outbox.sqlite3,重啟後未寄出的信會繼續寄送
+- 以 UPDATE ... WHERE status='queued' 搶單並記錄 claimed_at,多個 process 同時跑也不會重複寄送;
+  停在 sending 超過 CLAIM_TIMEOUT (寄送途中關閉的 process) 才重新排入佇列
+- 服務啟動 (create_app) 時即啟動背景寄送,上次未寄完的信件不必等到下一封新信
+"""
+import os
+import json
+import time
+import sqlite3
+import smtplib
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_FILE = os.path.join("static/data/log", "mail_outbox.sqlite3")
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 30  # 秒
+BACKOFF_MAX = 30 * 60
+POLL_INTERVAL = 5
+SMTP_TIMEOUT = 30
+# 一批最多 BATCH_SIZE 封、每個 SMTP 指令最多 SMTP_TIMEOUT 秒,遠超過這個時間仍是 sending 才視為中斷
+CLAIM_TIMEOUT = 10 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipients TEXT NOT NULL,
+    message TEXT NOT NULL,
+    smtp_host TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    sent_at TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt);
+"""
+
+STATUS_COLUMNS = "id, kind, recipients, status, attempts, last_error, created_at, sent_at"
+
+
+def _now_text():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def backoff_seconds(attempts):
+    """第 n 次失敗後的等待秒數"""
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+
+class MailOutbox:
+    def __init__(self, db_path=OUTBOX_FILE, smtp_factory=None):
+        self.db_path = db_path
+        self.smtp_factory = smtp_factory or (lambda host: smtplib.SMTP(host, timeout=SMTP_TIMEOUT))
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._initialized = False
+
+    # ---------- 資料庫 ----------
+    @contextmanager
+    def _connect(self):
+        """取得連線,區塊結束時 commit (例外時 rollback) 並關閉"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        if self._initialized:
+            return
+        folder = os.path.dirname(self.db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "claimed_at" not in columns:  # 舊版佇列檔
+                conn.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+        self._initialized = True
+
+    # ---------- 排入佇列 ----------
+    def enqueue(self, mail, kind="mail"):
+        """
+        mail: MailFunction.render 組出的郵件 (build_message 的回傳值)
+        回傳佇列編號,背景執行緒會在數秒內寄出
+        """
+        self._init_db()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (kind, sender, recipients, message, smtp_host, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    mail["sender"],
+                    json.dumps(mail["recipients"], ensure_ascii=False),
+                    mail["message"],
+                    mail["smtp_host"],
+                    time.time(),
+                    _now_text(),
+                ),
+            )
+            mail_id = cursor.lastrowid
+
+        logger.info(f"📨 郵件已排入佇列 #{mail_id} ({kind}) → {', '.join(mail['recipients'])}")
+        self.start()
+        self._wakeup.set()
+        return mail_id
+
+    # ---------- 背景寄送 ----------
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._init_db()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mail-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain()
+            except Exception as e:
+                logger.error(f"❌ 郵件佇列處理失敗: {e}")
+                sent = 0
+            if not sent:
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+
+    @staticmethod
+    def _requeue_stale(conn, now):
+        """
+        寄送途中 process 被關閉的信件 (sending 超過 CLAIM_TIMEOUT) 重新排入佇列
+        其他 process 剛取得、仍在寄送的信件不受影響
+        """
+        cursor = conn.execute(
+            "UPDATE outbox SET status = 'queued', claimed_at = NULL "
+            "WHERE status = 'sending' AND (claimed_at IS NULL OR claimed_at < ?)",
+            (now - CLAIM_TIMEOUT,),
+        )
+        if cursor.rowcount:
+            logger.warning(f"⚠️ {cursor.rowcount} 封寄送中斷的郵件重新排入佇列")
+
+    def _claim(self, limit):
+        """取出到期的信件並標記為 sending (只會被一個 worker 取得)"""
+        now = time.time()
+        with self._connect() as conn:
+            self._requeue_stale(conn, now)
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE status = 'queued' AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                cursor = conn.execute(
+                    "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ? AND status = 'queued'",
+                    (now, row["id"]),
+                )
+                if cursor.rowcount:
+                    claimed.append(row)
+        return claimed
+
+    def _mark_sent(self, conn, mail_id):
+        conn.execute(
+            "UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL, "
+            "claimed_at = NULL WHERE id = ?",
+            (_now_text(), mail_id),
+        )
+
+    def _mark_failed(self, conn, row, error):
+        attempts = row["attempts"] + 1
+        if attempts >= MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ?, claimed_at = NULL WHERE id = ?",
+                (attempts, str(error), row["id"]),
+            )
+            logger.error(f"❌ 郵件 #{row['id']} 重試 {attempts} 次仍失敗,停止寄送: {error}")
+        else:
+            delay = backoff_seconds(attempts)
+            conn.execute(
+                "UPDATE outbox SET status = 'queued', attempts = ?, last_error = ?, next_attempt = ?, claimed_at = NULL "
+                "WHERE id = ?",
+                (attempts, str(error), time.time() + delay, row["id"]),
+            )
+            logger.warning(f"⚠️ 郵件 #{row['id']} 寄送失敗,{delay} 秒後重試: {error}")
+
+    def drain(self, limit=BATCH_SIZE):
+        """寄出一批到期的信件,回傳成功寄出的數量"""
+        self._init_db()
+        rows = self._claim(limit)
+        if not rows:
+            return 0
+
+        by_host = {}
+        for row in rows:
+            by_host.setdefault(row["smtp_host"], []).append(row)
+
+        sent = 0
+        for host, host_rows in by_host.items():
+            results = []
+            try:
+                with self.smtp_factory(host) as smtp:
+                    for row in host_rows:
+                        try:
+                            smtp.sendmail(row["sender"], json.loads(row["recipients"]), row["message"])
+                            results.append((row, None))
+                        except smtplib.SMTPServerDisconnected:
+                            raise
+                        except Exception as e:
+                            results.append((row, e))
+            except Exception as e:
+                # 連線失敗或中途斷線: 尚未處理的信件全部稍後重試
+                done = {row["id"] for row, _ in results}
+                results += [(row, e) for row in host_rows if row["id"] not in done]
+
+            with self._connect() as conn:
+                for row, error in results:
+                    if error is None:
+                        self._mark_sent(conn, row["id"])
+                        sent += 1
+                    else:
+                        self._mark_failed(conn, row, error)
+
+        if sent:
+            logger.info(f"✅ 郵件佇列寄出 {sent} 封")
+        return sent
+
+    # ---------- 查詢 ----------
+    @staticmethod
+    def _status_dict(row):
+        result = dict(row)
+        result["recipients"] = json.loads(result["recipients"])
+        return result
+
+    def status(self, mail_id):
+        self._init_db()
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {STATUS_COLUMNS} FROM outbox WHERE id = ?", (mail_id,)).fetchone()
+        return self._status_dict(row) if row else None
+
+    def summary(self, limit=20):
+        """各狀態數量與最近的信件"""
+        self._init_db()
+        with self._connect() as conn:
+            counts = {
+                row["status"]: row["count"]
+                for row in conn.execute("SELECT status, COUNT(*) AS count FROM outbox GROUP BY status")
+            }
+            recent = conn.execute(
+                f"SELECT {STATUS_COLUMNS} FROM outbox ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return {
+            "counts": counts,
+            "worker_alive": self._thread is not None and self._thread.is_alive(),
+            "recent": [self._status_dict(row) for row in recent],
+        }
+
+
+# 建立全域實例
+mail_outbox = MailOutbox()
@@ -0,0 +1,228 @@
+"""
+MHTML 解析快取與 GridView 定位
+
+- 解析結果以 解析方式 + BeautifulSoup 解析器 + PARSER_VERSION + 檔案內容的 sha256 為 key,記憶體 (LRU) + static/data/log/mhtml_cache/ 各存一份;
+  同一份 E-RT 報表重複上傳時直接回傳上次的結果,重啟後仍有效
+- html_from_mhtml(): 只取出第一個 text/html 部分並解碼,不解析圖片 / CSS 等資源
+- extract_element(): 依 id 從 HTML 字串切出單一元素 (含巢狀同名標籤),
+  只把 GridView 這一段交給 BeautifulSoup,不必整份文件建樹
+- make_soup(): 有安裝 lxml 時使用 lxml,否則使用內建 html.parser
+"""
+import os
+import re
+import copy
+import json
+import base64
+import hashlib
+import binascii
+import threading
+import logging
+from collections import OrderedDict
+
+from utils.lazy_import import lazy_module
+
+bs4 = lazy_module("bs4")
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("static/data/log", "mhtml_cache")
+
+# 解析邏輯有變動時調高版本號,舊的快取檔自動失效
+PARSER_VERSION = 1
+MEMORY_ENTRIES = 64
+DISK_ENTRIES = 500
+
+try:
+    import lxml  # noqa: F401
+    SOUP_FEATURES = "lxml"
+except ImportError:
+    SOUP_FEATURES = "html.parser"
+
+
+def make_soup(markup):
+    return bs4.BeautifulSoup(markup, SOUP_FEATURES)
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="ignore")
+    return hashlib.sha256(data).hexdigest()
+
+
+# ---------- MHTML 拆解 ----------
+_BOUNDARY_RE = re.compile(rb'boundary\s*=\s*"?([^";\r\n]+)"?', re.I)
+_HEADER_END_RE = re.compile(rb"\r?\n\r?\n")
+_CHARSET_RE = re.compile(rb'charset\s*=\s*"?([\w.:-]+)', re.I)
+
+
+def _part_header(headers, name):
+    """取出單一 MIME 標頭 (小寫比對,不處理折行以外的格式)"""
+    match = re.search(rb"^" + name + rb"\s*:\s*(.+(?:\r?\n[ \t].+)*)", headers, re.I | re.M)
+    return match.group(1).strip() if match else b""
+
+
+def html_from_mhtml(raw):
+    """
+    取出 MHTML 中第一個 text/html 部分並解碼 (quoted-printable / base64)
+    不是 multipart 格式時回傳 None,由呼叫端改用原本的解析方式
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8", errors="ignore")
+
+    head_end = _HEADER_END_RE.search(raw)
+    if not head_end:
+        return None
+    boundary = _BOUNDARY_RE.search(raw, 0, head_end.start())
+    if not boundary:
+        return None
+    delimiter = b"--" + boundary.group(1)
+
+    pos = raw.find(delimiter, head_end.end())
+    while pos != -1:
+        start = pos + len(delimiter)
+        if raw.startswith(b"--", start):
+            break  # 結尾邊界
+        next_pos = raw.find(delimiter, start)
+        part = raw[start:next_pos if next_pos != -1 else len(raw)]
+
+        split = _HEADER_END_RE.search(part)
+        if split:
+            headers, body = part[:split.start()], part[split.end():]
+            content_type = _part_header(headers, rb"Content-Type").lower()
+            if content_type.startswith(b"text/html"):
+                encoding = _part_header(headers, rb"Content-Transfer-Encoding").lower()
+                if encoding == b"quoted-printable":
+                    body = binascii.a2b_qp(body)
+                elif encoding == b"base64":
+                    body = base64.b64decode(body)
+                charset = _CHARSET_RE.search(content_type)
+                charset = charset.group(1).decode("ascii") if charset else "utf-8"
+                try:
+                    return body.decode(charset, errors="ignore")
+                except LookupError:
+                    return body.decode("utf-8", errors="ignore")
+        pos = next_pos
+    return None
+
+
+# ---------- 元素定位 ----------
+def extract_element(html, tag, id_part):
+    """
+    回傳第一個 id 含有 id_part 的 <tag> 元素原始 HTML (含結束標籤),找不到回傳 None
+    以同名標籤的開關計數找出對應的結束標籤
+    """
+    open_re = re.compile(
+        rf"<{tag}\b[^>]*\bid\s*=\s*[\"']?[^\"'\s>]*{re.escape(id_part)}", re.I
+    )
+    match = open_re.search(html)
+    if not match:
+        return None
+
+    depth = 0
+    for tag_match in re.finditer(rf"<(/?){tag}\b[^>]*>", html[match.start():], re.I):
+        depth += -1 if tag_match.group(1) else 1
+        if depth == 0:
+            return html[match.start():match.start() + tag_match.end()]
+    return html[match.start():]
+
+
+# ---------- 快取 ----------
+class MHTMLCache:
+    def __init__(self, folder=CACHE_DIR, memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.folder = folder
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def _load_disk(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ MHTML 快取檔讀取失敗 {path}: {e}")
+            return None
+
+    def _save_disk(self, key, result):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ MHTML 快取檔寫入失敗: {e}")
+
+    def _prune_disk(self):
+        """超過上限時刪除最舊的快取檔"""
+        files = [
+            os.path.join(self.folder, name)
+            for name in os.listdir(self.folder)
+            if name.endswith(".json")
+        ]
+        if len(files) <= self.disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_parse(self, kind, content, parse, cacheable=None):
+        """
+        kind: 解析方式 (不同解析器的結果分開存)
+        content: 檔案原始內容 (bytes / str)
+        parse(): 快取沒有時呼叫,回傳可轉成 JSON 的結果
+        cacheable(result): 回傳 False 的結果不寫入快取 (例如解析錯誤)
+        回傳結果的複本,呼叫端可以直接修改
+        """
+        # lxml 與 html.parser 對不合法的 HTML 可能建出不同的樹,解析器不同的結果分開存
+        key = f"{kind}_{SOUP_FEATURES}_v{PARSER_VERSION}_{content_hash(content)}"
+
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+        if result is None:
+            result = self._load_disk(key)
+            if result is not None:
+                self._remember(key, result)
+
+        if result is not None:
+            self.hits += 1
+            logger.info(f"⚡ MHTML 快取命中 ({kind}) {key[-12:]}")
+            return copy.deepcopy(result)
+
+        self.misses += 1
+        result = parse()
+        if cacheable is None or cacheable(result):
+            # 先轉成 JSON 相容格式,確保記憶體與檔案中的內容一致
+            result = json.loads(json.dumps(result, ensure_ascii=False, default=str))
+            self._remember(key, result)
+            self._save_disk(key, result)
+        return copy.deepcopy(result)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+
+# 建立全域實例
+mhtml_cache = MHTMLCache()
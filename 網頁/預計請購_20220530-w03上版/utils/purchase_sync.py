@@ -0,0 +1,92 @@
+"""
+主表 / Buyer_detail 衍生欄位計算
+- Buyer_detail 開單狀態: ePR No. 為 10 碼數字則 V,否則 X
+- 主表 驗收狀態: 同 Id 的 Buyer 明細 (非空白) 驗收狀態全部為 V 才設 V
+- 主表 PO No.: 同 Id 的 PO No. 依出現順序去重後以 <br /> 串接
+"""
+from utils.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+PO_SEPARATOR = "<br />"
+
+
+def _clean(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def derive_order_status(detail_df):
+    """依 ePR No. 計算 Buyer_detail 的開單狀態"""
+    if "ePR No." not in detail_df.columns:
+        return pd.Series("X", index=detail_df.index)
+    epr = _clean(detail_df["ePR No."])
+    return pd.Series(np.where(epr.str.fullmatch(r"\d{10}"), "V", "X"), index=detail_df.index)
+
+
+def summarize_by_id(detail_df):
+    """
+    以 Id 彙總 Buyer_detail
+
+    回傳 (accepted, po_numbers):
+        accepted: Id -> bool,該 Id 所有非空白驗收狀態是否皆為 V
+        po_numbers: Id -> 以 <br /> 串接的 PO No.
+    """
+    ids = _clean(detail_df["Id"])
+
+    if "驗收狀態" in detail_df.columns:
+        status = detail_df["驗收狀態"].fillna("X").astype(str).str.strip()
+    else:
+        status = pd.Series("X", index=detail_df.index)
+    not_accepted = (status != "") & (status != "V")
+    accepted = ~not_accepted.groupby(ids, sort=False).any()
+
+    if "PO No." in detail_df.columns:
+        pairs = pd.DataFrame({"Id": ids, "PO": _clean(detail_df["PO No."])})
+        pairs = pairs[pairs["PO"] != ""].drop_duplicates()
+        po_numbers = pairs.groupby("Id", sort=False)["PO"].agg(PO_SEPARATOR.join)
+    else:
+        po_numbers = pd.Series(dtype=str)
+
+    return accepted, po_numbers
+
+
+def _assign_if_changed(df, column, values, mask=None):
+    """將新值寫入欄位,回傳是否有任何值改變"""
+    if mask is None:
+        mask = pd.Series(True, index=df.index)
+
+    if column not in df.columns:
+        df[column] = ""
+        changed = bool(mask.any())
+    else:
+        old = df.loc[mask, column].fillna("").astype(str)
+        changed = bool((old != values[mask]).any())
+
+    if changed:
+        df.loc[mask, column] = values[mask]
+    return changed
+
+
+def apply_derived_columns(main_df, detail_df):
+    """
+    就地更新主表與 Buyer_detail 的衍生欄位
+
+    回傳 (main_changed, detail_changed),呼叫端只需寫回有變動的檔案
+    """
+    detail_changed = _assign_if_changed(detail_df, "開單狀態", derive_order_status(detail_df))
+
+    accepted, po_numbers = summarize_by_id(detail_df)
+
+    main_ids = _clean(main_df["Id"])
+    has_id = main_ids != ""
+    has_detail = main_ids.isin(accepted.index)
+
+    status = main_ids.map(accepted).map({True: "V", False: "X"})
+    status = status.where(has_detail, "X").fillna("X")
+    po = main_ids.map(po_numbers).fillna("")
+
+    main_changed = _assign_if_changed(main_df, "驗收狀態", status, has_id)
+    main_changed = _assign_if_changed(main_df, "PO No.", po, has_id) or main_changed
+
+    return main_changed, detail_changed
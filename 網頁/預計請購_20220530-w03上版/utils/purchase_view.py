@@ -0,0 +1,424 @@
+"""
+請購清單 (/data) 伺服器端篩選 / 排序 / 分頁
+
+- 依檔案版本快取整理好的資料 (與原本 /data 回傳的格式相同) 以及篩選用的欄位
+  (需求者、開單狀態、WBS、已開單日期、PO 清單、搜尋用文字…),檔案沒有變動時只做篩選
+- 篩選條件沿用前端儲存的篩選狀態 (save-filters-json 的 checkedPeople / checkedStates /
+  checkedWBS / checkedIssuedMonths / filterStartDate ~ filterEndDate / itemSearchText …),
+  比對規則與前端 filteredData / sortedItems 相同
+- 只回傳目前頁面的資料與總筆數,回應大小不隨資料表成長
+- facets=1 時另外回傳各篩選下拉選單的選項 (套用其他篩選條件後剩下的值,與前端 uniqueXXX 相同)
+  與統計 (篩選後已 / 未請購件數、未請購總金額、已開單月份與每月金額),前端不必再取得全部資料
+- 沒有指定排序欄位時依前端 sortByAllConditions 的預設順序 (未開單 → 請購順序 → ePR → 需求日 → 金額)
+"""
+import uuid
+import threading
+import logging
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+from utils.buyer_index import split_po_numbers
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+EXPECTED_COLUMNS = [
+    "Id", "開單狀態", "WBS", "請購順序", "需求者", "請購項目", "需求原因",
+    "總金額", "需求日", "已開單日期", "ePR No.", "進度追蹤超連結", "備註",
+    "Status", "簽核中關卡", "報告路徑", "驗收路徑", "合作類別", "合作廠商",
+    "前購單單號", "驗收狀態", "PO No."
+]
+NUMERIC_TEXT_COLUMNS = ["請購順序", "需求日", "已開單日期", "前購單單號", "驗收狀態"]
+
+# 篩選狀態中的勾選清單 → 欄位 (完全相符)
+CHECKED_COLUMNS = {
+    "checkedPeople": "需求者",
+    "checkedStates": "開單狀態",
+    "checkedWBS": "WBS",
+    "checkedReceivingResults": "驗收狀態",
+    "checkedOrders": "請購順序",
+    "checkedEPRs": "ePR No.",
+    "checkedItems": "請購項目",
+    "checkedReasons": "需求原因",
+    "checkedAmounts": "總金額",
+    "checkedStages": "簽核中關卡",
+    "checkedStatuses": "Status",
+    "checkedRemarks": "備註",
+    "checkedDirectorApprovals": "主任簽核",
+    "checkedUncleApprovals": "叔叔簽核",
+}
+STRIPPED_KEYS = ("checkedReceivingResults", "checkedOrders", "checkedAmounts")
+# 下拉選單 (facets) 的篩選欄位 / 空白也是選項的欄位 (以數字排序的欄位見 FACET_SORT_KEYS)
+FACET_KEYS = list(CHECKED_COLUMNS) + ["checkedIssuedMonths", "checkedNeedDates", "checkedPONos"]
+FACET_KEEP_EMPTY = {"checkedDirectorApprovals", "checkedUncleApprovals", "checkedEPRs", "checkedOrders"}
+# 關鍵字搜尋 (q) 比對的欄位
+SEARCH_COLUMNS = ["請購項目", "需求原因", "需求者", "ePR No.", "PO No.", "WBS", "備註"]
+NUMERIC_SORT_COLUMNS = {"總金額", "請購順序"}
+# 每月花費不計入的 WBS (專案 WBS,例如 25FT0A0050)
+PROJECT_WBS_PATTERN = r"^[A-Z0-9]{10}$"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _format_number_text(x):
+    return "" if pd.isna(x) or x == 0 else str(int(float(x))) if str(x).replace('.', '').isdigit() else str(x)
+
+
+def format_table(df):
+    """原本 /data 的欄位整理 (ePR / 總金額 / 日期等數字欄位去掉小數點)"""
+    df["ePR No."] = df["ePR No."].apply(lambda x: "" if pd.isna(x) or x == 0 else str(int(float(x))))
+    df["總金額"] = pd.to_numeric(df["總金額"], errors="coerce").fillna(0)
+    df["總金額"] = df["總金額"].apply(lambda x: "" if x == 0 else int(x))
+
+    for col in NUMERIC_TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(_format_number_text)
+    return df.fillna("")
+
+
+def _text(df, col):
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].astype(str)
+
+
+def _facet_text(df, key, col):
+    """勾選清單比對用的欄位文字 (驗收狀態 / 請購順序 / 總金額 去頭尾空白)"""
+    text = _text(df, col)
+    return text.str.strip() if key in STRIPPED_KEYS else text
+
+
+def _need_dates(df):
+    """需求日 YYYYMMDD → YYYY/MM/DD (前端下拉選單的顯示格式)"""
+    need = _text(df, "需求日")
+    return need.where(need.str.len() != 8, need.str[:4] + "/" + need.str[4:6] + "/" + need.str[6:8])
+
+
+def _number_key(value):
+    try:
+        return (0, float(value or 0), value)
+    except ValueError:
+        return (1, 0.0, value)
+
+
+FACET_SORT_KEYS = {"checkedOrders": _number_key, "checkedAmounts": _number_key}
+
+
+# 查詢參數簡寫 → 篩選狀態欄位
+SPEC_ALIASES = {
+    "people": "checkedPeople",
+    "state": "checkedStates",
+    "wbs": "checkedWBS",
+    "month": "checkedIssuedMonths",
+    "status": "filterPurchaseStatus",
+    "start": "filterStartDate",
+    "end": "filterEndDate",
+    "item": "itemSearchText",
+    "reason": "reasonSearchText",
+    "sort": "sortField",
+    "order": "sortOrder",
+}
+PAGING_ARGS = ("page", "limit", "user", "facets")
+
+
+def spec_from_args(args):
+    """
+    URL 查詢參數 → 篩選狀態
+    勾選清單可重複給 (people=A&people=B) 或以逗號分隔,其餘取單一值
+    """
+    spec = {}
+    for key in args.keys():
+        if key in PAGING_ARGS:
+            continue
+        name = SPEC_ALIASES.get(key, key)
+        if name.startswith("checked"):
+            spec[name] = [v for value in args.getlist(key) for v in _as_list(value)]
+        else:
+            spec[name] = args.get(key)
+    return spec
+
+
+def _as_list(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [v for v in str(value).split(",") if v != ""]
+
+
+class PurchaseView:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._frame = None
+        self._records = []
+        self._columns = None
+
+    # ---------- 載入 ----------
+    def _ensure_ids(self):
+        """補齊缺少的欄位與 Id,有補 Id 時寫回檔案 (與原本 /data 相同)"""
+        df = table_store.read(self.csv_path, copy=False)
+        ids = df["Id"].fillna("").astype(str).str.strip() if "Id" in df.columns else None
+        if ids is not None and not (ids == "").any():
+            return
+
+        with table_store.lock(self.csv_path):
+            df = table_store.read(self.csv_path)
+            for col in EXPECTED_COLUMNS:
+                if col not in df.columns:
+                    df[col] = ""
+            df["Id"] = df["Id"].fillna("").astype(str).str.strip()
+            missing_ids = df["Id"] == ""
+            df.loc[missing_ids, "Id"] = [str(uuid.uuid4()) for _ in range(missing_ids.sum())]
+            table_store.write(df, self.csv_path)
+            logger.info(f"🆔 補上 {int(missing_ids.sum())} 筆缺少的 Id")
+
+    def _build(self):
+        df = table_store.read(self.csv_path)
+        for col in EXPECTED_COLUMNS:
+            if col not in df.columns:
+                df[col] = ""
+        df["Id"] = df["Id"].fillna("").astype(str).str.strip()
+        df = format_table(df)
+
+        issued = _text(df, "已開單日期").str.strip()
+        columns = {
+            "issued_raw": issued,
+            "issued": issued.str.zfill(8),
+            "issued_month": issued.where(issued.str.len() != 8, issued.str[:6]),
+            "positions": {row_id: i for i, row_id in enumerate(df["Id"])},
+            "po_list": df["PO No."].map(split_po_numbers),
+            "search": df[[c for c in SEARCH_COLUMNS if c in df.columns]].astype(str)
+                      .agg(" ".join, axis=1).str.lower(),
+            "sort_number": {
+                col: pd.to_numeric(df[col], errors="coerce").fillna(0) for col in NUMERIC_SORT_COLUMNS
+            },
+        }
+        columns["default_order"] = self._default_order(df, columns)
+        return df, df.to_dict(orient="records"), columns
+
+    @staticmethod
+    def _default_order(df, columns):
+        """前端 sortByAllConditions: 未開單在前、請購順序小 → 大 (空白 / 0 視為 99)、ePR 小 → 大、需求日近 → 遠、金額大 → 小"""
+        order = columns["sort_number"]["請購順序"]
+        need = _text(df, "需求日").str.strip()
+        keys = pd.DataFrame({
+            "ordered": (_text(df, "開單狀態").str.strip() == "V").to_numpy(dtype=int),
+            "order": order.where(order != 0, 99).to_numpy(),
+            "epr": pd.to_numeric(_text(df, "ePR No.").str.strip(), errors="coerce").fillna(0).to_numpy(),
+            "need": need.where(need.str.len() == 8, "99991231").to_numpy(),
+            "amount": (-columns["sort_number"]["總金額"]).to_numpy(),
+        })
+        return keys.sort_values(list(keys.columns), kind="stable").index.to_numpy()
+
+    def snapshot(self):
+        """(整理後的 DataFrame, records, 篩選用欄位),檔案沒有變動時直接使用快取 (不可修改)"""
+        self._ensure_ids()
+        signature = table_store.signature(self.csv_path)
+        with self._lock:
+            if self._columns is None or signature != self._signature:
+                self._frame, self._records, self._columns = self._build()
+                self._signature = signature
+                logger.info(f"📋 請購清單資料重建: {len(self._records)} 筆")
+            return self._frame, self._records, self._columns
+
+    def records(self):
+        """全部資料 (原本 /data 的回應內容)"""
+        return self.snapshot()[1]
+
+    def rows_by_id(self, ids):
+        """依 Id 取出目前的資料列,回傳 (找到的 records, 已不存在的 Id)"""
+        _, records, columns = self.snapshot()
+        positions = columns["positions"]
+        found, missing = [], []
+        for row_id in ids:
+            if row_id in positions:
+                found.append(records[positions[row_id]])
+            else:
+                missing.append(row_id)
+        return found, missing
+
+    # ---------- 篩選 ----------
+    @staticmethod
+    def _masks(df, columns, spec):
+        """各篩選條件各自的 bool 陣列 (只包含有設定的條件),key 為篩選狀態的欄位名稱"""
+        masks = {}
+
+        status = spec.get("filterPurchaseStatus") or "ALL"
+        if status == "ORDERED":
+            masks["filterPurchaseStatus"] = (df["開單狀態"] == "V").to_numpy()
+        elif status == "UNORDERED":
+            masks["filterPurchaseStatus"] = (df["開單狀態"] != "V").to_numpy()
+
+        for key, col in CHECKED_COLUMNS.items():
+            values = _as_list(spec.get(key))
+            if values:
+                masks[key] = _facet_text(df, key, col).isin(values).to_numpy()
+
+        months = _as_list(spec.get("checkedIssuedMonths"))
+        if months:
+            masks["checkedIssuedMonths"] = columns["issued_month"].isin(months).to_numpy()
+
+        need_dates = _as_list(spec.get("checkedNeedDates"))
+        if need_dates:
+            masks["checkedNeedDates"] = _need_dates(df).isin(need_dates).to_numpy()
+
+        po_numbers = set(_as_list(spec.get("checkedPONos")))
+        if po_numbers:
+            masks["checkedPONos"] = columns["po_list"].map(
+                lambda pos: not po_numbers.isdisjoint(pos)
+            ).to_numpy(dtype=bool)
+
+        # 已開單日期區間 (YYYY-MM-DD 或 YYYYMMDD);month_from / month_to 為 YYYYMM
+        start = str(spec.get("filterStartDate") or "").replace("-", "")
+        end = str(spec.get("filterEndDate") or "").replace("-", "")
+        if str(spec.get("dateFilterActive", True)).lower() not in ("false", "0", "") and start and end:
+            masks["dateRange"] = ((columns["issued"] >= start) & (columns["issued"] <= end)).to_numpy()
+        month_from = str(spec.get("month_from") or "").replace("-", "")
+        month_to = str(spec.get("month_to") or "").replace("-", "")
+        if month_from:
+            masks["month_from"] = (columns["issued"] >= month_from.ljust(8, "0")).to_numpy()
+        if month_to:
+            masks["month_to"] = (columns["issued"] <= month_to.ljust(8, "9")).to_numpy()
+
+        item_text = str(spec.get("itemSearchText") or "").strip()
+        if item_text:
+            masks["itemSearchText"] = _text(df, "請購項目").str.contains(item_text, regex=False).to_numpy()
+        reason_text = str(spec.get("reasonSearchText") or "").strip()
+        if reason_text:
+            masks["reasonSearchText"] = _text(df, "需求原因").str.contains(reason_text, regex=False).to_numpy()
+
+        words = str(spec.get("q") or "").lower().split()
+        if words:
+            search = np.ones(len(df), dtype=bool)
+            for word in words:
+                search &= columns["search"].str.contains(word, regex=False).to_numpy()
+            masks["q"] = search
+
+        return masks
+
+    @staticmethod
+    def _combine(df, masks, skip=None):
+        mask = np.ones(len(df), dtype=bool)
+        for key, value in masks.items():
+            if key != skip:
+                mask &= value
+        return mask
+
+    @classmethod
+    def _mask(cls, df, columns, spec):
+        return cls._combine(df, cls._masks(df, columns, spec))
+
+    @staticmethod
+    def _order(df, columns, positions, sort_field, sort_order):
+        """與前端 sortedItems 相同: 空值排最後,總金額 / 請購順序以數字比較,已開單日期補滿 8 碼"""
+        if not sort_field or sort_field not in df.columns:
+            return positions
+
+        values = df[sort_field].iloc[positions]
+        empty = (values.astype(str) == "").to_numpy()
+        if sort_field in NUMERIC_SORT_COLUMNS:
+            keys = columns["sort_number"][sort_field].iloc[positions]
+        elif sort_field == "已開單日期":
+            keys = columns["issued"].iloc[positions]
+        else:
+            keys = values.astype(str)
+
+        order = pd.Series(keys.to_numpy(), index=positions).sort_values(
+            ascending=sort_order != "desc", kind="stable"
+        ).index.to_numpy()
+        empty_positions = set(positions[empty].tolist())
+        return np.array(
+            [p for p in order if p not in empty_positions] + [p for p in positions if p in empty_positions],
+            dtype=int,
+        )
+
+    def select(self, spec):
+        """符合篩選條件的 (records, 排序後的列位置);records 為快取內容,不可修改"""
+        df, records, columns = self.snapshot()
+        return records, self._positions(df, columns, self._mask(df, columns, spec), spec)
+
+    def _positions(self, df, columns, mask, spec):
+        default_order = columns["default_order"]
+        positions = default_order[mask[default_order]]
+        return self._order(df, columns, positions, spec.get("sortField"), spec.get("sortOrder") or "asc")
+
+    def column_names(self):
+        """整理後的欄位順序 (匯出用)"""
+        return list(self.snapshot()[0].columns)
+
+    @staticmethod
+    def _facets(df, columns, masks):
+        """各篩選下拉選單的選項: 套用除了自己以外的篩選條件後剩下的值"""
+        facets = {}
+        for key in FACET_KEYS:
+            rows = PurchaseView._combine(df, masks, skip=key)
+            if key == "checkedPONos":
+                values = sorted({po for pos in columns["po_list"][rows] for po in pos})
+            elif key == "checkedIssuedMonths":
+                issued = columns["issued_raw"][rows]
+                values = sorted(set(issued[issued.str.len() == 8].str[:6]), reverse=True)
+            elif key == "checkedNeedDates":
+                values = sorted({v for v in _need_dates(df)[rows] if v}, reverse=True)
+            else:
+                values = set(_facet_text(df, key, CHECKED_COLUMNS[key])[rows])
+                if key == "checkedReceivingResults":
+                    values &= {"V", "X", ""}
+                elif key not in FACET_KEEP_EMPTY:
+                    values.discard("")
+                values = sorted(values, key=FACET_SORT_KEYS.get(key))
+            facets[key] = values
+        return facets
+
+    @staticmethod
+    def _stats(df, columns, mask):
+        """頁面上方的件數 / 金額 (篩選後的已 / 未請購件數;未請購總金額與每月花費為全部資料)"""
+        ordered = (_text(df, "開單狀態") == "V").to_numpy()
+        amount = columns["sort_number"]["總金額"]
+        issued = columns["issued_raw"]
+        spent = (
+            ordered
+            & (issued.str.len() == 8).to_numpy()
+            & ~_text(df, "WBS").str.strip().str.match(PROJECT_WBS_PATTERN).to_numpy()
+        )
+        issued_totals = amount[spent].groupby(issued[spent].str[:6].to_numpy()).sum()
+        issued_months = spent & _text(df, "ePR No.").str.strip().str.fullmatch(r"\d{10}").to_numpy()
+        return {
+            "ordered": int((mask & ordered).sum()),
+            "unordered": int((mask & ~ordered).sum()),
+            "unordered_amount": float(amount[~ordered].sum()),
+            "issued_months": sorted(set(issued[issued_months].str[:6])),
+            "issued_totals": {month: float(total) for month, total in issued_totals.items()},
+        }
+
+    def query(self, spec, page=1, limit=DEFAULT_LIMIT, facets=False):
+        """
+        spec: 篩選狀態 (與 save-filters-json 相同的欄位,另可加 q / month_from / month_to)
+        回傳目前頁面的資料與筆數;facets=True 時另外回傳下拉選單選項 (facets) 與統計 (stats)
+        """
+        df, records, columns = self.snapshot()
+        masks = self._masks(df, columns, spec)
+        mask = self._combine(df, masks)
+        positions = self._positions(df, columns, mask, spec)
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        page = max(1, int(page or 1))
+
+        filtered = len(positions)
+        pages = max(1, -(-filtered // limit))
+        visible = positions[(page - 1) * limit:page * limit]
+        result = {
+            "rows": [records[p] for p in visible],
+            "total": len(records),
+            "filtered": filtered,
+            "page": page,
+            "limit": limit,
+            "pages": pages,
+        }
+        if facets:
+            result["facets"] = self._facets(df, columns, masks)
+            result["stats"] = self._stats(df, columns, mask)
+        return result
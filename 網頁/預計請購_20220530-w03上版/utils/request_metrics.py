@@ -0,0 +1,190 @@
+"""
+請購網頁的請求效能統計
+
+- 每個路由記錄: 總耗時、pd.read_csv / DataFrame.to_csv 耗時、讀寫的資料列數、回應大小
+  (pandas 在第一次用到時才載入,讀寫計時從 pandas 載入後的下一個請求開始)
+- 每個路由保留最近 WINDOW 筆,/api/_metrics 回傳 p50 / p95 / p99 (依 p95 由慢到快排序)
+- 單次 cProfile: 設定 PURCHASE_PROFILING=1 後,請求加上 ?_profile=1 (或標頭 X-Profile: 1),
+  結果存到 static/data/log/profiles/,回應標頭 X-Profile-File 為檔名
+"""
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import logging
+from collections import deque, defaultdict
+from datetime import datetime
+from functools import wraps
+
+from flask import g, has_request_context, jsonify, request
+
+from utils.lazy_import import lazy_module
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 1000
+PROFILE_DIR = "static/data/log/profiles"
+PROFILE_ENV = "PURCHASE_PROFILING"
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _add_io(seconds, rows):
+    if has_request_context() and "metrics_io" in g:
+        g.metrics_io[0] += seconds
+        g.metrics_io[1] += rows
+
+
+def _track_read_csv(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        _add_io(time.perf_counter() - start, len(result) if isinstance(result, pd.DataFrame) else 0)
+        return result
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+def _track_to_csv(func):
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(self, *args, **kwargs)
+        _add_io(time.perf_counter() - start, len(self))
+        return result
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+class RequestMetrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self.started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.add_url_rule("/api/_metrics", "request_metrics", self.report, methods=["GET"])
+
+    @staticmethod
+    def _install_io_hooks():
+        """pandas 的讀寫計時 (只在請求中累計);pandas 還沒載入時不觸發載入"""
+        if "pandas" not in sys.modules:
+            return
+        if not getattr(pd.read_csv, "_metrics_wrapped", False):
+            pd.read_csv = _track_read_csv(pd.read_csv)
+        if not getattr(pd.DataFrame.to_csv, "_metrics_wrapped", False):
+            pd.DataFrame.to_csv = _track_to_csv(pd.DataFrame.to_csv)
+
+    # ---------- 請求前後 ----------
+    @staticmethod
+    def _profiling_requested():
+        if os.environ.get(PROFILE_ENV, "") not in ("1", "true", "yes"):
+            return False
+        return request.args.get("_profile") == "1" or request.headers.get("X-Profile") == "1"
+
+    def _before(self):
+        self._install_io_hooks()
+        g.metrics_start = time.perf_counter()
+        g.metrics_io = [0.0, 0]
+        if self._profiling_requested():
+            g.metrics_profiler = cProfile.Profile()
+            g.metrics_profiler.enable()
+
+    def _after(self, response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        io_time, rows = g.pop("metrics_io", (0.0, 0))
+
+        profiler = g.pop("metrics_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            response.headers["X-Profile-File"] = self._save_profile(profiler)
+
+        route = request.url_rule.rule if request.url_rule else "(404)"
+        key = f"{request.method} {route}"
+        size = response.content_length
+        # 串流回應 (例如匯出檔案) 不讀取內容,避免整份載入記憶體
+        if size is None and not response.direct_passthrough and not response.is_streamed:
+            size = len(response.get_data())
+
+        with self._lock:
+            self._samples[key].append((elapsed * 1000, io_time * 1000, rows, size or 0))
+            self._counts[key] += 1
+            if response.status_code >= 500:
+                self._errors[key] += 1
+        return response
+
+    def _save_profile(self, profiler):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{request.endpoint or 'unknown'}"
+        path = os.path.join(PROFILE_DIR, f"{name}.prof")
+        profiler.dump_stats(path)
+
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(PROFILE_DIR, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        logger.info(f"🔬 已儲存 cProfile: {path}")
+        return os.path.basename(path)
+
+    # ---------- 報表 ----------
+    def snapshot(self):
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+
+        routes = []
+        for key, values in samples.items():
+            wall = sorted(v[0] for v in values)
+            n = len(values)
+            routes.append({
+                "route": key,
+                "count": counts.get(key, 0),
+                "errors": errors.get(key, 0),
+                "p50_ms": round(_percentile(wall, 50), 2),
+                "p95_ms": round(_percentile(wall, 95), 2),
+                "p99_ms": round(_percentile(wall, 99), 2),
+                "max_ms": round(wall[-1], 2),
+                "avg_io_ms": round(sum(v[1] for v in values) / n, 2),
+                "avg_rows": round(sum(v[2] for v in values) / n, 1),
+                "avg_bytes": int(sum(v[3] for v in values) / n),
+            })
+        routes.sort(key=lambda r: r["p95_ms"], reverse=True)
+        return {"since": self.started, "window": self.window, "routes": routes}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._errors.clear()
+            self.started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def report(self):
+        """/api/_metrics (?reset=1 取得後清除)"""
+        result = self.snapshot()
+        if request.args.get("reset") == "1":
+            self.reset()
+        return jsonify(result)
+
+
+# 建立全域實例
+request_metrics = RequestMetrics()
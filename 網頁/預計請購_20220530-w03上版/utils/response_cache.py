@@ -0,0 +1,108 @@
+"""
+讀取型 API 的 ETag / 條件式 GET
+
+- ETag 由來源檔案的版本 (mtime_ns, size) 與請求網址組成,不必產生回應就能算出
+- 瀏覽器帶 If-None-Match 且相符時直接回 304,不讀檔也不轉 JSON
+- 不相符時,同一個版本已經編碼過的 JSON bytes 直接重用;來源檔案變動後自動失效
+- 只處理 GET 且狀態碼 200 的回應,錯誤回應不會被快取
+"""
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+
+from utils.table_store import table_store
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 128
+
+
+class ResponseCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (endpoint, 網址) -> (etag, body, mimetype)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_etag(key, paths):
+        versions = [f"{path}:{table_store.signature(path)}" for path in paths]
+        return hashlib.sha1("|".join([*key, *versions]).encode("utf-8")).hexdigest()
+
+    def _get(self, key, etag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _respond(self, etag, body, mimetype):
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        # 每次都向伺服器確認 (資料沒變時只會拿到 304)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def etag(self, paths):
+        """
+        路由裝飾器,paths 為來源檔案清單或回傳清單的函式 (可依查詢參數決定)
+            @app.route('/api/venders', methods=['GET'])
+            @response_cache.etag([VENDER_FILE_PATH])
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = (request.endpoint or view.__name__, request.full_path)
+                etag = self.make_etag(key, paths() if callable(paths) else paths)
+
+                if request.if_none_match.contains(etag):
+                    self.not_modified += 1
+                    response = current_app.response_class(status=304)
+                    response.set_etag(etag)
+                    response.headers["Cache-Control"] = "no-cache"
+                    return response
+
+                entry = self._get(key, etag)
+                if entry is not None:
+                    self.hits += 1
+                    return self._respond(*entry)
+
+                self.misses += 1
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                entry = (etag, response.get_data(), response.mimetype)
+                self._put(key, entry)
+                return self._respond(*entry)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+# 建立全域實例
+response_cache = ResponseCache()
@@ -0,0 +1,251 @@
+"""
+E-RT 收貨單 (GridView) 與 Buyer_detail 對帳
+
+- GridView 欄位先依英文表頭對應 (PO No / Description / QTY / Accept QTY / Amount),
+  表頭格式不同時才退回原本的關鍵字判斷
+- GridView 整理成 DataFrame 後,金額 / 數量一次向量化換算 RT 金額
+- 以 (PO, 品名) merge Buyer_detail: 一次得到 PO 是否存在、品名是否相符、數量是否不同
+- Buyer_detail 的比對用資料依檔案版本快取,檔案沒有變動不會重建
+"""
+import re
+import threading
+import logging
+
+from utils.lazy_import import lazy_module
+from utils.table_store import table_store
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+# GridView 英文表頭 (小寫) → 欄位
+COLUMN_ROLES = {
+    "po no": "po_no",
+    "description": "description",
+    "qty": "qty",
+    "accept qty": "accept_qty",
+    "amount": "amount",
+}
+ROLES = ["po_no", "description", "qty", "accept_qty", "amount"]
+
+BUYER_PO_COLUMN = "PO No."
+BUYER_DESC_COLUMN = "品項"
+BUYER_QTY_COLUMN = "數量"
+
+
+def normalize_description(series):
+    """品名比對用: 去除頭尾空白、連續空白視為一個、不分大小寫"""
+    return (
+        series.fillna("").astype(str)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def normalize_po_series(series):
+    """PO No. 去除空白與數字轉存造成的 .0 結尾"""
+    return series.fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+
+
+def _header_text(header):
+    return (header.get("en", "") or header.get("zh", "") or header.get("full", "")).lower()
+
+
+def _sniff_indexes(headers):
+    """原本的關鍵字判斷 (表頭不是標準 GridView 格式時使用)"""
+    indexes = dict.fromkeys(ROLES, -1)
+    for i, header in enumerate(headers):
+        text = _header_text(header)
+        if ("po" in text and "no" in text) or "po號碼" in text:
+            if "demo" not in text:  # 排除 Demo PO號
+                indexes["po_no"] = i
+        elif "description" in text or "品名" in text:
+            indexes["description"] = i
+        elif "accept" in text and "qty" in text or "驗收數量" in text:
+            indexes["accept_qty"] = i
+        elif "qty" in text or "數量" in text or "收貨數量" in text:
+            if indexes["accept_qty"] == -1:
+                indexes["qty"] = i
+        elif "amount" in text or "總金額" in text:
+            indexes["amount"] = i
+    return indexes
+
+
+def column_indexes(headers):
+    """各欄位在 GridView 中的位置,找不到為 -1"""
+    indexes = dict.fromkeys(ROLES, -1)
+    for i, header in enumerate(headers):
+        role = COLUMN_ROLES.get(re.sub(r"\s+", " ", str(header.get("en", ""))).strip().lower())
+        if role and indexes[role] == -1:
+            indexes[role] = i
+    if indexes["po_no"] == -1 or indexes["description"] == -1:
+        return _sniff_indexes(headers)
+    return indexes
+
+
+def gridview_frame(gridview_data):
+    """
+    GridView → DataFrame (每列一筆,順序與 GridView 相同)
+    欄位不存在或該列儲存格不足時為 None
+    """
+    headers = gridview_data.get("headers", [])
+    rows = gridview_data.get("rows", [])
+    indexes = column_indexes(headers)
+
+    def cell(raw_data, role):
+        index = indexes[role]
+        return raw_data[index].get("value", "") if 0 <= index < len(raw_data) else None
+
+    records = []
+    for row in rows:
+        raw_data = row.get("raw_data", [])
+        record = {role: cell(raw_data, role) for role in ROLES}
+        for role in ("po_no", "description"):
+            if record[role] is not None:
+                record[role] = str(record[role]).strip()
+        # 沒有允收數量 (欄位不存在或該列儲存格不足) 時以收貨數量代替
+        if record["accept_qty"] is None and indexes["qty"] >= 0:
+            record["accept_qty"] = record["qty"] if record["qty"] is not None else "0"
+        records.append(record)
+
+    frame = pd.DataFrame.from_records(records, columns=ROLES, index=pd.RangeIndex(len(records)))
+    return frame.astype(object), indexes
+
+
+NUMBER_NOISE = r"[,$]|TWD"
+
+
+def _to_number(series, default):
+    """'75,000' / 'TWD 1,000' → float;空白與 '-' 為 default,無法轉換為 NaN"""
+    text = series.fillna("").astype(str).str.replace(NUMBER_NOISE, "", regex=True).str.strip()
+    blank = text.isin(["", "-"])
+    number = pd.to_numeric(text.mask(blank), errors="coerce")
+    return number.mask(blank, default), text
+
+
+def rt_amounts(frame):
+    """
+    RT 金額 = 總金額 / 允收數量,RT 總金額 = 總金額
+    允收數量空白、'0' 或 '-' 時視為 1;任一數字無法轉換時兩者皆為 0 且不計入合計
+    """
+    amount, _ = _to_number(frame["amount"], 0.0)
+    accept, accept_text = _to_number(frame["accept_qty"].fillna("0"), 1.0)
+    accept = accept.mask(accept_text == "0", 1.0)
+
+    valid = amount.notna() & accept.notna()
+    rt_amount = (amount / accept).where(valid & (accept > 0), 0.0)
+    rt_total = amount.where(valid, 0.0)
+    return rt_amount.astype(float), rt_total.astype(float), valid
+
+
+# ---------- Buyer_detail ----------
+_buyer_cache = {}
+_buyer_cache_lock = threading.Lock()
+
+
+def buyer_keys(path):
+    """
+    (buyer_df, first_by_po, first_by_desc)
+    first_by_po: PO → 第一筆相同 PO 的列位置
+    first_by_desc: 每個 (po, desc) 第一筆的 po / desc / buyer_qty
+    依檔案版本快取,回傳的 buyer_df 為快取本體,不可修改
+    """
+    signature = table_store.signature(path)
+    with _buyer_cache_lock:
+        cached = _buyer_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    buyer_df = table_store.read(path, copy=False)
+    keys = pd.DataFrame({
+        "po": normalize_po_series(buyer_df[BUYER_PO_COLUMN]),
+        "desc": normalize_description(
+            buyer_df[BUYER_DESC_COLUMN] if BUYER_DESC_COLUMN in buyer_df.columns else pd.Series("", index=buyer_df.index)
+        ),
+        "buyer_qty": (
+            buyer_df[BUYER_QTY_COLUMN] if BUYER_QTY_COLUMN in buyer_df.columns else pd.Series("", index=buyer_df.index)
+        ).fillna("").astype(str).str.strip(),
+        "row": range(len(buyer_df)),
+    })
+    keys = keys[keys["po"] != ""]
+    first_by_po = keys.drop_duplicates("po").set_index("po")["row"]
+    first_by_desc = keys.drop_duplicates(["po", "desc"])[["po", "desc", "buyer_qty"]]
+
+    result = (buyer_df, first_by_po, first_by_desc)
+    with _buyer_cache_lock:
+        _buyer_cache[path] = (signature, result)
+    return result
+
+
+# ---------- 對帳 ----------
+def reconcile(gridview_data, buyer_path):
+    """
+    GridView 與 Buyer_detail 對帳
+    回傳 {'items', 'summary', 'matched', 'unmatched', 'quantity_diff'},
+    後三者為 items 的位置 (與前端原本使用的 items / summary 格式相容)
+    """
+    buyer_df, first_by_po, first_by_desc = buyer_keys(buyer_path)
+    frame, indexes = gridview_frame(gridview_data)
+    rt_amount, rt_total, valid = rt_amounts(frame)
+
+    po = frame["po_no"].where(frame["po_no"].notna(), "")
+    desc = normalize_description(frame["description"])
+
+    # PO 存在: 對應到 Buyer_detail 第一筆相同 PO 的列
+    buyer_row = po.map(first_by_po)
+    matched = buyer_row.notna() & (po != "")
+
+    # (PO, 品名) 相符: 取第一筆相同 PO + 品名的列
+    joined = pd.DataFrame({"po": po, "desc": desc}).merge(first_by_desc, on=["po", "desc"], how="left")
+    joined.index = frame.index
+    desc_matched = matched & joined["buyer_qty"].notna()
+
+    accept_qty, _ = _to_number(frame["accept_qty"], float("nan"))
+    buyer_qty, _ = _to_number(joined["buyer_qty"], float("nan"))
+    qty_diff = desc_matched & accept_qty.notna() & buyer_qty.notna() & (accept_qty != buyer_qty)
+
+    items = []
+    for i, record in enumerate(frame.to_dict("records")):
+        item = {role: value for role, value in record.items() if pd.notna(value)}
+        item["rt_amount"] = float(rt_amount.iat[i])
+        item["rt_total_amount"] = float(rt_total.iat[i])
+        item["matched_in_buyer"] = bool(matched.iat[i])
+        item["buyer_row_index"] = int(buyer_row.iat[i]) if matched.iat[i] else -1
+        item["description_matched"] = bool(desc_matched.iat[i])
+        if desc_matched.iat[i]:
+            item["buyer_qty"] = joined["buyer_qty"].iat[i]
+            item["quantity_diff"] = bool(qty_diff.iat[i])
+        items.append(item)
+
+    matched_rows = [int(i) for i in frame.index[matched.to_numpy()]]
+    unmatched_rows = [int(i) for i in frame.index[~matched.to_numpy()]]
+    qty_diff_rows = [int(i) for i in frame.index[qty_diff.to_numpy()]]
+    desc_mismatch = int((matched & ~desc_matched).sum())
+
+    missing_pos = sorted(set(po[~matched & (po != "")]))
+    if missing_pos:
+        logger.warning(f"❌ Buyer_detail 中找不到的 PO: {missing_pos}")
+    if desc_mismatch:
+        logger.warning(f"⚠️ {desc_mismatch} 筆 PO 相符但品名不同")
+    logger.info(
+        f"📊 RT 對帳: 總項目={len(items)}, 匹配={len(matched_rows)}, 未匹配={len(unmatched_rows)}, "
+        f"數量不同={len(qty_diff_rows)}"
+    )
+
+    return {
+        "items": items,
+        "summary": {
+            "total_items": len(items),
+            "matched_count": len(matched_rows),
+            "unmatched_count": len(unmatched_rows),
+            "description_mismatch_count": desc_mismatch,
+            "quantity_diff_count": len(qty_diff_rows),
+            "total_amount": float(rt_total[valid].sum()),
+            "buyer_csv_rows": len(buyer_df),
+            "buyer_csv_columns": list(buyer_df.columns),
+        },
+        "matched": matched_rows,
+        "unmatched": unmatched_rows,
+        "quantity_diff": qty_diff_rows,
+    }
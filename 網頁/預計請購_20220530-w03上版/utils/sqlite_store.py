@@ -0,0 +1,298 @@
+"""
+SQLite 儲存引擎 (PURCHASE_STORAGE=sqlite 時取代 CSV)
+
+- Planned_Purchase_Request_List.csv / Buyer_detail.csv 改存在同一個 SQLite 檔 (WAL 模式),
+  路由照樣呼叫 read_table / write_table / table_store.lock,路徑仍用原本的 CSV 路徑
+- 欄位一律以 TEXT 保存 (含中文欄名),_pos 記錄列順序;Id / PO No. / ePR No. 建索引
+- write() 與寫入前版本比對,只對有異動的列下 INSERT / UPDATE / DELETE,
+  不再整份重寫;Id 重複或有空白 (NULL) 時改依 _pos 位置對齊,
+  欄位有增減或無法對齊 (列數也不同) 時才整張表重建
+- 檔案版本 (signature) 改用資料表的版本號,其他模組的快取判斷不需修改
+- 其他非資料表的路徑 (設定檔等) 仍交給 CSV 引擎處理
+
+匯入 / 匯出 (在 預計請購 目錄下):
+    python -m utils.sqlite_store import            # CSV → SQLite
+    python -m utils.sqlite_store export            # SQLite → CSV (覆寫原本的 CSV)
+    python -m utils.sqlite_store export --out backup/
+"""
+import os
+import json
+import sqlite3
+import argparse
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.table_store import TableStore, DEFAULT_KEY, LOCK_TIMEOUT, diff_tables, keyable, _as_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = "static/data/purchase.db"
+
+# CSV 檔名 → SQLite 資料表
+MANAGED_TABLES = {
+    "Planned_Purchase_Request_List.csv": "purchase_request",
+    "Buyer_detail.csv": "buyer_detail",
+}
+DEFAULT_CSV_PATHS = [
+    "static/data/Planned_Purchase_Request_List.csv",
+    "static/data/Buyer_detail.csv",
+]
+INDEXED_COLUMNS = ["Id", "PO No.", "ePR No."]
+POSITION = "_pos"
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_value(text):
+    """空字串存成 NULL (與 CSV 空白欄位讀回來是 NaN 一致)"""
+    return None if text == "" else text
+
+
+def _order_changed(old_df, new_df, key):
+    """只有列順序改變 (例如排序後寫回) 時 diff_tables 不會產生項目,另外比對 Id 順序"""
+    if not (keyable(old_df, key) and keyable(new_df, key)):
+        return False
+    return old_df[key].astype(str).tolist() != new_df[key].astype(str).tolist()
+
+
+class SQLiteTableStore(TableStore):
+    def __init__(self, db_path=DEFAULT_DB, tables=None):
+        super().__init__()
+        self.db_path = db_path
+        self.managed = dict(tables or MANAGED_TABLES)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _table_meta "
+            "(name TEXT PRIMARY KEY, columns TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def _connect(self):
+        """每個執行緒各自一條連線"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def table_name(self, path):
+        """CSV 路徑對應的資料表,不是 SQLite 管理的檔案回傳 None"""
+        return self.managed.get(os.path.basename(path))
+
+    def _meta(self, table):
+        row = self._connect().execute(
+            "SELECT columns, version FROM _table_meta WHERE name = ?", (table,)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, None)
+
+    # ---------- 讀取 ----------
+    def _signature(self, path):
+        table = self.table_name(path)
+        if table is None:
+            return TableStore._signature(path)
+        _, version = self._meta(table)
+        if version is None:
+            raise FileNotFoundError(path)
+        return ("sqlite", version)
+
+    def _load(self, table):
+        columns, _ = self._meta(table)
+        select = ", ".join(_quote(col) for col in columns)
+        rows = self._connect().execute(
+            f"SELECT {select} FROM {_quote(table)} ORDER BY {POSITION}"
+        ).fetchall()
+        df = pd.DataFrame(rows, columns=columns, dtype=object)
+        # 與 read_csv(dtype=str) 相同: 文字欄位,空白為 NaN
+        return df.astype(str).where(df.notna(), np.nan)
+
+    def read(self, path, copy=True):
+        table = self.table_name(path)
+        if table is None:
+            return super().read(path, copy=copy)
+
+        key = self._key(path)
+        signature = self._signature(path)
+        with self._lock:
+            cached = self._tables.get(key)
+            if cached is None or cached[0] != signature:
+                df = self._load(table)
+                self._tables[key] = (signature, df)
+                logger.info(f"📥 載入資料表 {table}: {len(df)} 筆")
+            else:
+                df = cached[1]
+        return df.copy() if copy else df
+
+    # ---------- 寫入 ----------
+    def _current(self, path):
+        """寫入前的版本取自資料表 (CSV 檔案不一定還在)"""
+        table = self.table_name(path)
+        if table is None:
+            return super()._current(path)
+        if self._meta(table)[1] is None:
+            return None
+        return self.read(path, copy=False)
+
+    def _replace_table(self, conn, table, df):
+        """整張表重建 (欄位變動 / 初次匯入)"""
+        columns = [str(col) for col in df.columns]
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        conn.execute(
+            f"CREATE TABLE {_quote(table)} ({POSITION} INTEGER NOT NULL, "
+            + ", ".join(f"{_quote(col)} TEXT" for col in columns) + ")"
+        )
+        conn.execute(f"CREATE INDEX {_quote(f'ix_{table}_{POSITION}')} ON {_quote(table)} ({POSITION})")
+        for col in INDEXED_COLUMNS:
+            if col in columns:
+                conn.execute(f"CREATE INDEX {_quote(f'ix_{table}_{col}')} ON {_quote(table)} ({_quote(col)})")
+
+        placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+        text = _as_text(df)
+        conn.executemany(
+            f"INSERT INTO {_quote(table)} VALUES ({placeholders})",
+            ([position, *map(_sql_value, row)] for position, row in enumerate(text.itertuples(index=False)))
+        )
+        conn.execute(
+            "INSERT INTO _table_meta (name, columns, version) VALUES (?, ?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET columns = excluded.columns, version = version + 1",
+            (table, json.dumps(columns, ensure_ascii=False))
+        )
+
+    def _apply_entries(self, conn, table, old_df, new_df, key, entries):
+        """只寫入有異動的列,並修正順序有變動的列的 _pos"""
+        name = _quote(table)
+        key_col = _quote(key)
+        new_text = _as_text(new_df)
+        # key 有空白 / 重複時 diff_tables 依位置比對 (項目帶 row),以 _pos 對齊
+        keyed = keyable(old_df, key) and keyable(new_df, key)
+        new_ids = new_df[key].astype(str).tolist() if keyed else []
+        new_positions = {row_id: i for i, row_id in enumerate(new_ids)}
+
+        for entry in entries:
+            op = entry["op"]
+            if op == "delete":
+                conn.execute(f"DELETE FROM {name} WHERE {key_col} = ?", (entry["id"],))
+            elif op == "insert":
+                position = new_positions[entry["id"]]
+                columns = [POSITION, *map(str, new_df.columns)]
+                conn.execute(
+                    f"INSERT INTO {name} ({', '.join(map(_quote, columns))}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    (position, *map(_sql_value, new_text.iloc[position]))
+                )
+            elif op == "update":
+                changes = entry["changes"]
+                assignments = ", ".join(f"{_quote(col)} = ?" for col in changes)
+                values = [_sql_value(new) for _, new in changes.values()]
+                if "row" in entry:  # Id 不唯一或有空白時依位置對齊
+                    conn.execute(f"UPDATE {name} SET {assignments} WHERE {POSITION} = ?", (*values, entry["row"]))
+                else:
+                    conn.execute(f"UPDATE {name} SET {assignments} WHERE {key_col} = ?", (*values, entry["id"]))
+
+        # 刪除 / 新增 / 重新排序後,只更新位置有變的列 (依位置對齊時列順序不變)
+        if keyed:
+            old_positions = {row_id: i for i, row_id in enumerate(old_df[key].astype(str))}
+            moved = [
+                (position, row_id) for position, row_id in enumerate(new_ids)
+                if old_positions.get(row_id, position) != position
+            ]
+            conn.executemany(f"UPDATE {name} SET {POSITION} = ? WHERE {key_col} = ?", moved)
+
+        conn.execute("UPDATE _table_meta SET version = version + 1 WHERE name = ?", (table,))
+
+    def write(self, df, path, key=DEFAULT_KEY, **kwargs):
+        """
+        寫入資料表 (to_csv 的參數如 na_rep / index 會被忽略)
+        比對寫入前版本,只寫入有異動的列
+        """
+        table = self.table_name(path)
+        if table is None:
+            return super().write(df, path, key=key, **kwargs)
+
+        with self.lock(path):
+            old_df = self._current(path)
+            columns, _ = self._meta(table)
+            entries = diff_tables(old_df, df, key)
+
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                full_rewrite = (
+                    old_df is None
+                    or columns != [str(col) for col in df.columns]
+                    or any(entry["op"] in ("create", "rewrite") for entry in entries)
+                )
+                if full_rewrite:
+                    self._replace_table(conn, table, df)
+                elif entries or _order_changed(old_df, df, key):
+                    self._apply_entries(conn, table, old_df, df, key, entries)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                self.invalidate(path)
+
+            try:
+                self._write_journal(path, entries)
+            except Exception as e:
+                logger.warning(f"⚠️ journal 記錄失敗 {path}: {e}")
+
+    # ---------- 匯入 / 匯出 ----------
+    def import_csv(self, csv_path):
+        """CSV → SQLite (整張表取代)"""
+        table = self.table_name(csv_path)
+        if table is None:
+            raise ValueError(f"{csv_path} 不是 SQLite 管理的資料表")
+        df = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str)
+        with self.lock(csv_path):
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._replace_table(conn, table, df)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                self.invalidate(csv_path)
+        logger.info(f"📥 匯入 {csv_path} → {table}: {len(df)} 筆")
+        return len(df)
+
+    def export_csv(self, csv_path, out_path=None):
+        """SQLite → CSV (與原本 CSV 相同的欄位與編碼)"""
+        out_path = out_path or csv_path
+        df = self.read(csv_path, copy=False)
+        TableStore._atomic_write(df, out_path, index=False, encoding="utf-8-sig")
+        logger.info(f"📤 匯出 {self.table_name(csv_path)} → {out_path}: {len(df)} 筆")
+        return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="請購 / Buyer_detail 資料表 CSV ↔ SQLite")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("csv", nargs="*", default=DEFAULT_CSV_PATHS, help="CSV 路徑 (預設為兩個資料表)")
+    parser.add_argument("--db", default=os.environ.get("PURCHASE_DB", DEFAULT_DB))
+    parser.add_argument("--out", help="匯出到指定資料夾 (預設覆寫原本的 CSV)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = SQLiteTableStore(args.db)
+    for csv_path in args.csv:
+        if args.action == "import":
+            store.import_csv(csv_path)
+        else:
+            out_path = os.path.join(args.out, os.path.basename(csv_path)) if args.out else None
+            if args.out:
+                os.makedirs(args.out, exist_ok=True)
+            store.export_csv(csv_path, out_path)
+
+
+if __name__ == "__main__":
+    main()
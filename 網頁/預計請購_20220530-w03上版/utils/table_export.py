@@ -0,0 +1,83 @@
+"""
+請購清單 / Buyer_detail 匯出 Excel (xlsx)
+
+- openpyxl write-only 模式: 每一列寫入後就轉成 XML 存到暫存檔,記憶體不隨筆數增加
+- 資料直接取自快取的資料表 (不複製 DataFrame),逐列產生
+- 完成的 xlsx 分段 (CHUNK_SIZE) 串流回傳,傳完刪除暫存檔
+- "=" 開頭的文字強制存成文字,不會在 Excel 中被當成公式
+"""
+import os
+import re
+import tempfile
+import logging
+
+from utils.lazy_import import lazy_module
+
+openpyxl = lazy_module("openpyxl")
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Excel 不接受的控制字元
+ILLEGAL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _cell(ws, value):
+    if value is None or (isinstance(value, float) and value != value):  # NaN
+        return None
+    if not isinstance(value, str):
+        return value
+    value = ILLEGAL_CHARACTERS.sub("", value)
+    if value.startswith("="):
+        cell = openpyxl.cell.WriteOnlyCell(ws, value=value)
+        cell.data_type = "s"
+        return cell
+    return value
+
+
+def write_xlsx(columns, rows, sheet_title="Sheet1"):
+    """
+    columns: 欄位名稱;rows: 可迭代的資料列 (與 columns 同順序)
+    回傳 (xlsx 暫存檔路徑, 筆數),傳送完由呼叫端以 remove_file 刪除
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31])
+    ws.freeze_panes = "A2"
+
+    bold = openpyxl.styles.Font(bold=True)
+    header = []
+    for col in columns:
+        cell = openpyxl.cell.WriteOnlyCell(ws, value=str(col))
+        cell.font = bold
+        header.append(cell)
+    ws.append(header)
+
+    count = 0
+    for row in rows:
+        ws.append([_cell(ws, value) for value in row])
+        count += 1
+
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+    except BaseException:
+        os.remove(path)
+        raise
+    logger.info(f"📤 匯出 {sheet_title}: {count} 筆 ({os.path.getsize(path)} bytes)")
+    return path, count
+
+
+def stream_file(path, chunk_size=CHUNK_SIZE):
+    """分段讀出檔案內容"""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"⚠️ 匯出暫存檔刪除失敗 {path}: {e}")
@@ -0,0 +1,384 @@
+"""
+CSV 資料表快取與寫入
+Planned_Purchase_Request_List.csv / Buyer_detail.csv 在整個 process 內只解析一次,
+檔案 mtime / size 變動或本程式寫入後才重新載入
+
+寫入一律經過 write():
+- 每個檔案一把 FileLock ({檔名}.lock),與路由裡的 buyer_file_lock 是同一個物件 (可重入)
+- 先寫暫存檔 + fsync,再 os.replace 原子替換,寫到一半當機不會留下被截斷的 CSV
+  (Windows 上其他程式正開著 CSV 時 os.replace 會 PermissionError,短暫重試幾次)
+- 與寫入前版本比對,把異動 (Id / 欄位 / 舊值→新值) 逐筆附加到 journal
+- 每次有異動的寫入都讓該資料表的版本號 +1 (存在 {journal}.version,重啟後延續),
+  changes() 依版本號從 journal 取出之後的異動,供前端增量同步
+"""
+import os
+import json
+import shutil
+import time
+import tempfile
+import threading
+import logging
+from datetime import datetime
+
+from filelock import FileLock
+
+from utils.lazy_import import lazy_module
+
+pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = "static/data/log/journal"
+JOURNAL_MAX_BYTES = 5 * 1024 * 1024  # 超過就輪替成 .1 (只保留一份舊檔)
+LOCK_TIMEOUT = 10
+DEFAULT_KEY = "Id"
+# os.replace 遇到 PermissionError (WinError 5 / 32: 檔案被其他 handle 開著) 時的重試間隔 (秒)
+REPLACE_RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8)
+
+
+class TableStore:
+    def __init__(self):
+        self._tables = {}  # 絕對路徑 -> (signature, DataFrame)
+        self._file_locks = {}  # 絕對路徑 -> FileLock
+        self._lock = threading.RLock()
+        self._journal_lock = threading.Lock()
+        self._versions = {}  # 絕對路徑 -> 目前版本號
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def _signature(path):
+        """以 (mtime_ns, size) 作為檔案版本"""
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def signature(self, path):
+        """取得目前檔案版本,檔案不存在時回傳 None"""
+        try:
+            return self._signature(path)
+        except FileNotFoundError:
+            return None
+
+    def read(self, path, copy=True):
+        """
+        讀取 CSV(dtype=str, utf-8-sig),檔案未變動時直接回傳快取
+
+        copy=False 時回傳快取本體,呼叫端不可修改
+        """
+        key = self._key(path)
+        signature = self._signature(path)
+
+        with self._lock:
+            cached = self._tables.get(key)
+            if cached is None or cached[0] != signature:
+                df = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+                # 讀檔期間若檔案又被改寫,以讀檔前的版本記錄,下次呼叫會再重新載入
+                self._tables[key] = (signature, df)
+                logger.info(f"📥 載入資料表 {path}: {len(df)} 筆")
+            else:
+                df = cached[1]
+
+        return df.copy() if copy else df
+
+    def lock(self, path, timeout=LOCK_TIMEOUT):
+        """
+        取得檔案專屬的 FileLock ({檔名}.lock)
+        同一個檔案在 process 內共用同一個物件,路由先鎖住再呼叫 write() 不會自己卡死
+        """
+        key = self._key(path)
+        with self._lock:
+            file_lock = self._file_locks.get(key)
+            if file_lock is None:
+                file_lock = FileLock(f"{path}.lock", timeout=timeout)
+                self._file_locks[key] = file_lock
+            return file_lock
+
+    def write(self, df, path, key=DEFAULT_KEY, **kwargs):
+        """
+        原子寫回 CSV 並記錄異動
+        暫存檔 → fsync → os.replace,完成後把新版本放進快取
+        """
+        kwargs.setdefault("index", False)
+        kwargs.setdefault("encoding", "utf-8-sig")
+
+        with self.lock(path):
+            old_df = self._current(path)
+            try:
+                self._atomic_write(df, path, **kwargs)
+            finally:
+                self.invalidate(path)
+
+            try:
+                # 直接以記憶體中的 df 比對,不重新解析剛寫入的檔案
+                self._journal(path, old_df, _written_frame(df, kwargs), key)
+            except Exception as e:
+                # journal 只是紀錄,失敗不影響已完成的寫入
+                logger.warning(f"⚠️ journal 記錄失敗 {path}: {e}")
+
+    @staticmethod
+    def _atomic_write(df, path, **kwargs):
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=folder)
+        os.close(fd)
+        try:
+            df.to_csv(tmp_path, **kwargs)
+            with open(tmp_path, "rb+") as f:
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                shutil.copymode(path, tmp_path)
+            _replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # rename 本身也要落盤 (Windows 不支援開啟目錄)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _current(self, path):
+        """寫入前的版本 (作為 journal 比對基準),檔案不存在或無法解析時回傳 None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            return self.read(path, copy=False)
+        except Exception:
+            return None
+
+    # ---------- journal ----------
+    @staticmethod
+    def journal_path(path):
+        return os.path.join(JOURNAL_DIR, f"{os.path.basename(path)}.jsonl")
+
+    def _journal(self, path, old_df, new_df, key):
+        self._write_journal(path, diff_tables(old_df, new_df, key))
+
+    def _write_journal(self, path, entries):
+        if not entries:
+            return
+
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        table = os.path.basename(path)
+
+        journal = self.journal_path(path)
+        with self._journal_lock:
+            version = self._load_version(path) + 1
+            lines = "".join(
+                json.dumps({"ts": ts, "table": table, "version": version, **entry}, ensure_ascii=False) + "\n"
+                for entry in entries
+            )
+            os.makedirs(JOURNAL_DIR, exist_ok=True)
+            if os.path.exists(journal) and os.path.getsize(journal) > JOURNAL_MAX_BYTES:
+                os.replace(journal, f"{journal}.1")
+            with open(journal, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._save_version(path, version)
+        logger.info(f"📝 {table} 異動 {len(entries)} 筆已寫入 journal (版本 {version})")
+
+    # ---------- 版本號 / 增量同步 ----------
+    @staticmethod
+    def _read_journal(journal):
+        """journal 內容 (新 → 舊),無法解析的列略過"""
+        if not os.path.exists(journal):
+            return
+        with open(journal, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    def _last_journal_version(self, path):
+        journal = self.journal_path(path)
+        for name in (journal, f"{journal}.1"):
+            for entry in self._read_journal(name):
+                return int(entry.get("version", 0))
+        return 0
+
+    def _load_version(self, path):
+        """目前版本號 (呼叫端需持有 _journal_lock);版本檔與 journal 取較大者,避免寫到一半當機後倒退"""
+        key = self._key(path)
+        if key not in self._versions:
+            saved = 0
+            try:
+                with open(f"{self.journal_path(path)}.version", "r", encoding="utf-8") as f:
+                    saved = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pass
+            self._versions[key] = max(saved, self._last_journal_version(path))
+        return self._versions[key]
+
+    def _save_version(self, path, version):
+        self._versions[self._key(path)] = version
+        version_file = f"{self.journal_path(path)}.version"
+        tmp_path = f"{version_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(str(version))
+            os.replace(tmp_path, version_file)
+        except OSError as e:
+            # 重啟時會再從 journal 取回版本號
+            logger.warning(f"⚠️ 版本號寫入失敗 {version_file}: {e}")
+
+    def version(self, path):
+        """資料表目前版本號 (每次有異動的寫入 +1)"""
+        with self._journal_lock:
+            return self._load_version(path)
+
+    def changes(self, path, since):
+        """
+        版本 since 之後的 journal 項目 (舊 → 新),回傳 (目前版本, 項目)
+        無法只靠差異同步時項目為 None,呼叫端應重新讀取整份資料表:
+        journal 已輪替掉需要的部分、since 比目前版本新,或期間有 create / rewrite
+        """
+        current = self.version(path)
+        if since == current:
+            return current, []
+        if since > current or since < 0:
+            return current, None
+
+        journal = self.journal_path(path)
+        entries = []
+        with self._journal_lock:
+            for name in (journal, f"{journal}.1"):
+                for entry in self._read_journal(name):
+                    version = int(entry.get("version", 0))
+                    if version <= since:
+                        break
+                    if version <= current:
+                        entries.append(entry)
+                else:
+                    continue
+                break
+
+        entries.reverse()
+        # 需要的版本必須完整 (since+1 ~ current 都在 journal 裡)
+        if not entries or int(entries[0]["version"]) != since + 1:
+            return current, None
+        if any(entry.get("op") in ("create", "rewrite") for entry in entries):
+            return current, None
+        return current, entries
+
+    def invalidate(self, path=None):
+        """清除指定檔案(或全部)的快取"""
+        with self._lock:
+            if path is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(self._key(path), None)
+
+
+def read_table(path, copy=True):
+    return table_store.read(path, copy=copy)
+
+
+def write_table(df, path, **kwargs):
+    table_store.write(df, path, **kwargs)
+
+
+def _replace(src, dst):
+    """
+    os.replace,遇到 PermissionError 短暫重試
+    Windows 上 read_csv / static/data 的腳本開著目標檔時 (沒有 FILE_SHARE_DELETE),
+    取代會失敗 (WinError 5 / 32);這些讀取不持有檔案鎖,通常很快就會關閉
+    """
+    for delay in REPLACE_RETRY_DELAYS:
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError as e:
+            logger.warning(f"⚠️ {dst} 正被其他程式使用,{delay} 秒後重試: {e}")
+            time.sleep(delay)
+    os.replace(src, dst)
+
+
+def _written_frame(df, kwargs):
+    """實際寫入檔案的欄位 (to_csv 指定 columns 時只比對這些欄位)"""
+    columns = kwargs.get("columns")
+    return df if columns is None else df.loc[:, list(columns)]
+
+
+def _as_text(df):
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+def _row_changes(old_rows, new_rows, ids):
+    """逐列比對 (兩邊已對齊),只回傳有變動的列: [(id, {欄位: [舊, 新]})]"""
+    columns = old_rows.columns.union(new_rows.columns, sort=False)
+    old_rows = _as_text(old_rows.reindex(columns=columns))
+    new_rows = _as_text(new_rows.reindex(columns=columns))
+    changed = old_rows.ne(new_rows)
+    result = []
+    for position in changed.any(axis=1).to_numpy().nonzero()[0]:
+        row_mask = changed.iloc[position]
+        cols = row_mask.index[row_mask.to_numpy()]
+        result.append((ids[position], {
+            col: [old_rows.iat[position, columns.get_loc(col)], new_rows.iat[position, columns.get_loc(col)]]
+            for col in cols
+        }))
+    return result
+
+
+def keyable(df, key=DEFAULT_KEY):
+    """key 欄位存在、唯一且沒有空白 / NaN 時才能依 key 對齊 (空白在 SQLite 存成 NULL,比對不到)"""
+    if key not in df.columns or not df[key].is_unique:
+        return False
+    return not (_as_text(df[[key]])[key] == "").any()
+
+
+def diff_tables(old_df, new_df, key=DEFAULT_KEY):
+    """
+    比對寫入前後的資料表,回傳 journal 項目
+    key 欄位兩邊都可對齊 (keyable) 時依 key 對齊 (insert / update / delete),
+    否則列數相同就依位置比對,列數不同只記錄筆數
+    """
+    if old_df is None:
+        return [{"op": "create", "rows": len(new_df)}]
+
+    if keyable(old_df, key) and keyable(new_df, key):
+        old_keyed = old_df.set_index(old_df[key].astype(str))
+        new_keyed = new_df.set_index(new_df[key].astype(str))
+        common = old_keyed.index.intersection(new_keyed.index, sort=False)
+
+        entries = [{"op": "delete", "id": k} for k in old_keyed.index.difference(new_keyed.index, sort=False)]
+        entries += [{"op": "insert", "id": k} for k in new_keyed.index.difference(old_keyed.index, sort=False)]
+        entries += [
+            {"op": "update", "id": k, "changes": changes}
+            for k, changes in _row_changes(old_keyed.loc[common], new_keyed.loc[common], list(common))
+        ]
+        return entries
+
+    if len(old_df) == len(new_df):
+        ids = (_as_text(new_df[[key]])[key] if key in new_df.columns else pd.Series(range(len(new_df)))).tolist()
+        return [
+            {"op": "update", "row": position, "id": ids[position], "changes": changes}
+            for position, changes in _row_changes(
+                old_df.reset_index(drop=True), new_df.reset_index(drop=True), list(range(len(new_df)))
+            )
+        ]
+
+    return [{"op": "rewrite", "rows_before": len(old_df), "rows_after": len(new_df)}]
+
+
+def create_table_store():
+    """
+    依環境變數選擇儲存引擎
+    PURCHASE_STORAGE=csv (預設) / sqlite,PURCHASE_DB 指定 SQLite 檔案位置
+    """
+    if os.environ.get("PURCHASE_STORAGE", "csv").strip().lower() == "sqlite":
+        from utils.sqlite_store import SQLiteTableStore, DEFAULT_DB
+        return SQLiteTableStore(os.environ.get("PURCHASE_DB", DEFAULT_DB))
+    return TableStore()
+
+
+# 建立全域實例
+table_store = create_table_store()